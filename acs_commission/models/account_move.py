@@ -34,82 +34,102 @@ class AccountMove(models.Model):
         return res
 
     def create_partner_commission(self, partner, amount, commission_on):
+        self._write_partner_commissions({(self.id, partner.id): (amount, commission_on)})
+
+    def _write_partner_commissions(self, values):
+        """Apply ``{(invoice_id, partner_id): (amount, commission_on)}`` with one search and one create.
+
+        Existing lines are updated, or removed when their amount is zero; new
+        lines are only created for a non zero amount.
+        """
         Commission = self.env['acs.commission']
-        commission_line = Commission.search([('partner_id','=',partner.id),('invoice_id','=',self.id)], limit=1)
-        if commission_line:
-            if amount:
-                commission_line.write({
+        existing = {}
+        if values:
+            invoice_ids = list({invoice_id for invoice_id, partner_id in values})
+            for line in Commission.search([('invoice_id', 'in', invoice_ids)]):
+                existing.setdefault((line.invoice_id.id, line.partner_id.id), line)
+
+        to_unlink = Commission
+        to_create = []
+        for (invoice_id, partner_id), (amount, commission_on) in values.items():
+            commission_line = existing.get((invoice_id, partner_id))
+            if commission_line:
+                if amount:
+                    commission_line.write({
+                        'commission_amount': amount,
+                        'commission_on': commission_on,
+                    })
+                    commission_line.acs_update_amount_by_rules()
+                else:
+                    to_unlink |= commission_line
+            elif amount:
+                to_create.append({
+                    'partner_id': partner_id,
                     'commission_amount': amount,
                     'commission_on': commission_on,
+                    'invoice_id': invoice_id,
                 })
-                commission_line.acs_update_amount_by_rules()
-            else:
-                commission_line.unlink()
-
-        elif amount:
-            Commission.create({
-                'partner_id': partner.id,
-                'commission_amount': amount,
-                'commission_on': commission_on,
-                'invoice_id': self.id,
-            })            
+        to_unlink.unlink()
+        if to_create:
+            Commission.create(to_create)
+
+    def _compute_commission_amounts(self, partners=None):
+        """Commission of every partner of the invoices in one pass over their lines.
+
+        Rules come from the cached rule index: partner rules by product then by
+        category, then role rules by product then by category, then the partner
+        percentage. Returns ``{(invoice_id, partner_id): (amount, commission_on)}``.
+        """
+        rule_index = self.env['acs.commission.rule']._get_rule_index()
+        empty = {'product': {}, 'category': {}}
+        result = {}
+        for rec in self:
+            lines = [(line.product_id.product_tmpl_id.id, line.product_id.categ_id.id, line.price_subtotal)
+                     for line in rec.invoice_line_ids if line.product_id]
+            for partner in (partners if partners is not None else rec.commission_partner_ids):
+                partner_rules = rule_index.get(('partner', partner.id), empty)
+                role_rules = rule_index.get(('role', partner.commission_role_id.id), empty)
+                amount = commission_on = 0
+                for product_tmpl_id, product_categ_id, price_subtotal in lines:
+                    matching_rule = (partner_rules['product'].get(product_tmpl_id)
+                        or partner_rules['category'].get(product_categ_id)
+                        or role_rules['product'].get(product_tmpl_id)
+                        or role_rules['category'].get(product_categ_id))
+
+                    if matching_rule:
+                        rule_type, percentage, fixed_amount = matching_rule
+                        if rule_type == 'percentage':
+                            amount += (percentage * price_subtotal)/100
+                        elif rule_type == 'amount':
+                            amount += fixed_amount
+                        commission_on += price_subtotal
+
+                    elif partner.commission_percentage:
+                        amount += (partner.commission_percentage * price_subtotal)/100
+                        commission_on += price_subtotal
+                result[(rec.id, partner.id)] = (amount, commission_on)
+        return result
 
     def compute_partner_commission(self, partner):
-        amount = commission_on = 0
-        Rule = self.env['acs.commission.rule']
-        
-        for line in self.invoice_line_ids:
-            if line.product_id:
-                matching_rule = False
-                product_tmpl_id = line.product_id.product_tmpl_id.id
-                product_categ_id = line.product_id.categ_id.id
-                if partner.commission_rule_ids:
-                    partner_commission_ids = partner.commission_rule_ids.ids
-                    matching_rule = Rule.search([('id','in',partner_commission_ids),
-                        ('product_id','=',product_tmpl_id)], limit=1)
-                    if not matching_rule:
-                        matching_rule = Rule.search([('id','in',partner_commission_ids),
-                        ('product_category_id','=',product_categ_id)], limit=1)
-
-                if not matching_rule and partner.commission_role_id:
-                    role_commission_ids = partner.commission_role_id.commission_rule_ids.ids
-                    matching_rule = Rule.search([('id','in', role_commission_ids),
-                        ('product_id','=',product_tmpl_id)], limit=1)
-                    if not matching_rule:
-                        matching_rule = Rule.search([('id','in', role_commission_ids),
-                        ('product_category_id','=',product_categ_id)], limit=1)
-
-                if matching_rule:
-                    if matching_rule.type == 'percentage':
-                        amount += (matching_rule.percentage * line.price_subtotal)/100
-                    elif matching_rule.type == 'amount':
-                        amount += matching_rule.amount
-                    commission_on += line.price_subtotal
-
-                elif partner.commission_percentage:
-                    amount += (partner.commission_percentage * line.price_subtotal)/100
-                    commission_on += line.price_subtotal
-
-            self.create_partner_commission(partner, amount, commission_on)
-        return amount
+        values = self._compute_commission_amounts(partners=partner)
+        self._write_partner_commissions(values)
+        return sum(amount for amount, commission_on in values.values())
 
     def update_commission_values(self):
-        Commission = self.env['acs.commission']
+        values = self.filtered(lambda rec: rec.commission_type=='automatic')._compute_commission_amounts()
         for rec in self:
-            if rec.commission_type=='automatic':
-                for partner in rec.commission_partner_ids:
-                    self.compute_partner_commission(partner)
-            else:
+            if rec.commission_type!='automatic':
                 if rec.commission_on==0:
                     raise UserError(_("Please Set Amount to calculate Commission"))
 
                 for partner in rec.commission_partner_ids:
-                    amount = (partner.commission_percentage * self.commission_on)/100
-                    self.create_partner_commission(partner, amount, self.commission_on)
+                    amount = (partner.commission_percentage * rec.commission_on)/100
+                    values[(rec.id, partner.id)] = (amount, rec.commission_on)
 
-            #remove extra lines
-            commission_line = Commission.search([('partner_id','not in',rec.commission_partner_ids.ids),('invoice_id','=',self.id)])
-            commission_line.sudo().unlink()
+        #remove extra lines
+        commission_lines = self.env['acs.commission'].search([('invoice_id','in',self.ids)])
+        commission_lines.filtered(lambda line: line.partner_id not in line.invoice_id.commission_partner_ids).sudo().unlink()
+        self._write_partner_commissions(values)
 
     def finalize_commission(self):
         for rec in self:
@@ -119,12 +139,9 @@ class AccountMove(models.Model):
             rec.commission_ids.action_done()
 
     def action_post(self):
-        for rec in self:
-            if rec.commission_partner_ids:
-                if not rec.commission_ids:
-                    rec.update_commission_values()
-                if rec.commission_ids and not rec.commission_created:
-                    rec.finalize_commission()
+        with_partners = self.filtered('commission_partner_ids')
+        with_partners.filtered(lambda rec: not rec.commission_ids).update_commission_values()
+        with_partners.filtered(lambda rec: rec.commission_ids and not rec.commission_created).finalize_commission()
         return super(AccountMove, self).action_post()
 
 # vim:expandtab:smartindent:tabstop=4:softtabstop=4:shiftwidth=4:
\ No newline at end of file
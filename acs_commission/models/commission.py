@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from odoo import fields, models, api, _
+from odoo import fields, models, api, tools, _
 from odoo.exceptions import UserError
 
 class AcsCommissionRole(models.Model):
@@ -40,6 +40,46 @@ class AcsCommissionRule(models.Model):
     ], string='Type', default='percentage')
     description = fields.Text("Description")
 
+    @api.model
+    @tools.ormcache()
+    def _get_rule_index(self):
+        """Commission rules keyed by ``('partner', id)`` and ``('role', id)``.
+
+        Each entry maps ``'product'`` to ``{template_id: rule}`` and ``'category'``
+        to ``{category_id: rule}``, rule being ``(type, percentage, amount)`` of the
+        first rule in sequence. Cached until a rule changes.
+        """
+        index = {}
+        rules = self.sudo().search_read([], ['partner_id', 'role_id', 'product_id', 'product_category_id',
+            'type', 'percentage', 'amount'], order='sequence, id', load=False)
+        for rule in rules:
+            values = (rule['type'], rule['percentage'], rule['amount'])
+            owners = []
+            if rule['partner_id']:
+                owners.append(('partner', rule['partner_id']))
+            if rule['role_id']:
+                owners.append(('role', rule['role_id']))
+            for owner in owners:
+                entry = index.setdefault(owner, {'product': {}, 'category': {}})
+                if rule['product_id']:
+                    entry['product'].setdefault(rule['product_id'], values)
+                if rule['product_category_id']:
+                    entry['category'].setdefault(rule['product_category_id'], values)
+        return index
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env.registry.clear_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.env.registry.clear_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env.registry.clear_cache()
+        return super().unlink()
+
 class AcsCommissionTargetRule(models.Model):
     _name = 'acs.commission.target.rule'
     _description = 'Commission Target Rule'
@@ -57,6 +97,34 @@ class AcsCommissionTargetRule(models.Model):
     target_amount = fields.Float('Target Amount', help="Sum of total Commission on Amount", required=True)
     percentage = fields.Float('Percentage to Release', required=True)
     description = fields.Text("Description")
+
+    @api.model
+    @tools.ormcache()
+    def _get_target_rule_index(self):
+        """Target rules keyed by ``('partner', id)`` and ``('role', id)``, as a tuple of
+        ``(target_amount, percentage)`` in descending sequence. Cached until a rule changes.
+        """
+        index = {}
+        rules = self.sudo().search_read([], ['partner_id', 'role_id', 'target_amount', 'percentage'],
+            order='sequence desc, id', load=False)
+        for rule in rules:
+            for owner in (('partner', rule['partner_id']), ('role', rule['role_id'])):
+                if owner[1]:
+                    index.setdefault(owner, []).append((rule['target_amount'], rule['percentage']))
+        return {owner: tuple(rules) for owner, rules in index.items()}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env.registry.clear_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.env.registry.clear_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env.registry.clear_cache()
+        return super().unlink()
  
 
 class PartnerCommission(models.Model):
@@ -138,27 +206,22 @@ class PartnerCommission(models.Model):
         self.state = 'cancel'
 
     def acs_update_amount_by_rules(self):
-        Rule = self.env['acs.commission.target.rule']
+        target_rule_index = self.env['acs.commission.target.rule']._get_target_rule_index()
         for rec in self:
             if rec.target_based_commission:
                 partner = rec.partner_id
                 if rec.commission_sheet_id:
                     total_commission_base_amount = rec.commission_sheet_id.total_commission_base_amount
-                    matching_rule = Rule
-                    if partner.commission_target_rule_ids:
-                        target_rule_ids = partner.commission_target_rule_ids.ids
-                        matching_rule = Rule.search([('id','in',target_rule_ids),
-                            ('target_amount','<=',total_commission_base_amount)], order='sequence desc', limit=1)
-                        if not matching_rule:
-                            rec.payable_amount = 0
-
-                    elif partner.commission_role_id and partner.commission_role_id.commission_target_rule_ids:
-                        target_rule_ids = partner.commission_role_id.commission_target_rule_ids.ids
-                        matching_rule = Rule.search([('id','in', target_rule_ids),
-                            ('target_amount','<=',total_commission_base_amount)], order='sequence desc', limit=1)
-
-                    if matching_rule:
-                        rec.payable_amount = (matching_rule.percentage * rec.commission_amount)/100
+                    target_rules = target_rule_index.get(('partner', partner.id))
+                    if not target_rules and partner.commission_role_id:
+                        target_rules = target_rule_index.get(('role', partner.commission_role_id.id))
+                    matching_percentage = next((percentage for target_amount, percentage in target_rules or ()
+                        if target_amount <= total_commission_base_amount), None)
+
+                    if matching_percentage is not None:
+                        rec.payable_amount = (matching_percentage * rec.commission_amount)/100
+                    elif target_rule_index.get(('partner', partner.id)):
+                        rec.payable_amount = 0
             else:
                 rec.payable_amount = rec.commission_amount
 
@@ -3,17 +3,30 @@
 from odoo import http
 from odoo.http import request
 from odoo.tools.translate import _
+from odoo.addons.portal.controllers.portal import pager as portal_pager
+from odoo.addons.acs_documents_preview.models.document_preview import PREVIEW_IMAGE_MIMETYPES
+
+# Images shown per gallery page.
+PREVIEW_PAGE_SIZE = 30
 
 
 class AcsImageZoom(http.Controller):
 
-    @http.route(['/my/acs/image/<string:model>/<int:record>'], type='http', auth="user", website=True, sitemap=False)
-    def acs_image_preview(self, model=False, record=False, **kwargs):
-        record = request.env[model].browse([record])
-        attachments = request.env['ir.attachment'].search([
-            ('id', 'in', record.attachment_ids.ids),
-            ('mimetype', 'in', ['image/jpeg','image/jpg','image/png','image/gif']),
-        ])
-        return request.render("acs_documents_preview.acs_image_preview", {'attachments':attachments})
+    #ACS: Thumbnails and preview images are served by /web/image and originals by /web/content, both with ETag and range support.
+    @http.route(['/my/acs/image/<string:model>/<int:record>',
+                 '/my/acs/image/<string:model>/<int:record>/page/<int:page>'], type='http', auth="user", website=True, sitemap=False)
+    def acs_image_preview(self, model=False, record=False, page=1, **kwargs):
+        if model not in request.env:
+            return request.not_found()
+        record = request.env[model].browse([record]).exists()
+        if not record:
+            return request.not_found()
+        Attachment = request.env['ir.attachment']
+        domain = record._acs_get_attachment_domain() + [('mimetype', 'in', PREVIEW_IMAGE_MIMETYPES)]
+        url = '/my/acs/image/%s/%s' % (model, record.id)
+        pager = portal_pager(url=url, total=Attachment.search_count(domain), page=page, step=PREVIEW_PAGE_SIZE)
+        attachments = Attachment.search(domain, limit=PREVIEW_PAGE_SIZE, offset=pager['offset'])
+        attachments._acs_ensure_preview_images()
+        return request.render("acs_documents_preview.acs_image_preview", {'attachments':attachments, 'pager': pager})
 
 # vim:expandtab:smartindent:tabstop=4:softtabstop=4:shiftwidth=4:
\ No newline at end of file
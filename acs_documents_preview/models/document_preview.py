@@ -2,6 +2,53 @@
 
 from odoo import fields, models, api, _
 from odoo.exceptions import ValidationError
+import logging
+
+_logger = logging.getLogger(__name__)
+
+PREVIEW_IMAGE_MIMETYPES = ['image/jpeg','image/jpg','image/png','image/gif']
+
+
+class IrAttachment(models.Model):
+    _inherit = "ir.attachment"
+
+    acs_image_256 = fields.Image("Preview Thumbnail", max_width=256, max_height=256, attachment=True)
+    acs_image_1024 = fields.Image("Preview Image", max_width=1024, max_height=1024, attachment=True)
+    acs_preview_failed = fields.Boolean("Preview Generation Failed", copy=False,
+        help="The preview images could not be generated, the original image is shown.")
+
+    def _acs_has_preview(self):
+        """Images of records with documents, field attachments excluded"""
+        self.ensure_one()
+        return (not self.res_field and self.mimetype in PREVIEW_IMAGE_MIMETYPES and self.res_model in self.env
+                and 'attach_count' in self.env[self.res_model]._fields)
+
+    def _acs_generate_preview_images(self):
+        """Resized copies of the image attachments used by the document preview.
+        Stored as field attachments, so ``/web/image`` serves them with ETags.
+        """
+        for attachment in self.sudo().filtered(lambda att: att._acs_has_preview()):
+            try:
+                attachment.write({
+                    'acs_image_256': attachment.datas,
+                    'acs_image_1024': attachment.datas,
+                })
+            except Exception as e:
+                # A broken image must not block the upload. The preview serves the original
+                # file instead, and the generation is not retried on the next views.
+                _logger.warning("Could not generate preview images of attachment %s: %s", attachment.id, e)
+                attachment.acs_preview_failed = True
+
+    def _acs_ensure_preview_images(self):
+        """Generate the preview images missing on older attachments, except the ones that failed"""
+        self.sudo().with_context(bin_size=True).filtered(
+            lambda att: not att.acs_image_256 and not att.acs_preview_failed)._acs_generate_preview_images()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        attachments = super().create(vals_list)
+        attachments._acs_generate_preview_images()
+        return attachments
 
 
 class ACSDocumntViewerMixin(models.AbstractModel):
@@ -15,16 +62,15 @@ class ACSDocumntViewerMixin(models.AbstractModel):
 
     document_preview_url = fields.Char(compute=_get_document_preview_url, string="Document Preview Link")
 
+    def _acs_get_preview_domain(self):
+        return self._acs_get_attachment_domain() + [('mimetype', 'in', PREVIEW_IMAGE_MIMETYPES)]
+
     def acs_action_attachments_preview(self):
         ''' Open the website page with the preview results view '''
-        attachments = self.env['ir.attachment'].search([
-            ('id', 'in', self.attachment_ids.ids),
-            ('mimetype', 'in', ['image/jpeg','image/jpg','image/png','image/gif']),
-        ])
-        if len(attachments)==0:
+        self.ensure_one()
+        if not self.env['ir.attachment'].search_count(self._acs_get_preview_domain(), limit=1):
             raise ValidationError(_("There are no documents to Preview. Please Add it in chatter."))
 
-        self.ensure_one()
         return {
             'type': 'ir.actions.act_url',
             'name': "Preview",
@@ -34,7 +34,8 @@ class AcsCancelReason(models.Model):
 class Appointment(models.Model):
     _name = 'hms.appointment'
     _description = "Appointment"
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'acs.document.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'acs.document.mixin', 'acs.hms.kpi.mixin']
+    _kpi_rollup_key = 'appointment'
     _order = "id desc"
 
     @api.model
@@ -423,36 +424,37 @@ class Appointment(models.Model):
 
     @api.model_create_multi
     def create(self, vals_list):
-
-        results = self.env['hms.appointment']
-        for values in vals_list:
-            # Store the critical values
-            original_date_to = values.get('date_to')
-
-            if values.get('name', 'New Appointment') == 'New Appointment':
-                values['name'] = self.env['ir.sequence'].next_by_code('hms.appointment') or 'New Appointment'
-
-            # Create using ORM
-            appointment = super(Appointment, self).create([values])
-            results += appointment
-
-            # Check if date_to was changed and force it back if needed
+        # Reserve the references of the whole batch at once
+        unnamed = [values for values in vals_list if values.get('name', 'New Appointment') == 'New Appointment']
+        if unnamed:
+            names = self.env['ir.sequence'].acs_next_block_by_code('hms.appointment', len(unnamed))
+            for values, name in zip(unnamed, names):
+                values['name'] = name or 'New Appointment'
+
+        appointments = super(Appointment, self).create(vals_list)
+
+        # Force back the requested date_to where it was changed during creation
+        fixes = []
+        for appointment, values in zip(appointments, vals_list):
+            original_date_to = fields.Datetime.to_datetime(values.get('date_to'))
             if original_date_to and appointment.date_to != original_date_to:
-                _logger.info("Date_to was changed from %s to %s, forcing back", original_date_to, appointment.date_to)
-                # Use direct SQL to bypass any ORM constraints
-                self.env.cr.execute("""
-                    UPDATE hms_appointment 
-                    SET date_to = %s 
-                    WHERE id = %s
-                """, (original_date_to, appointment.id))
-                # Invalidate the cache for this record
-                appointment.invalidate_recordset(['date_to'])
-
-            # Run post-create logic
-            appointment.update_reminder_dates()
-            appointment.update_appoinemtn_refering()
-
-        return results
+                fixes.append((appointment.id, original_date_to))
+        if fixes:
+            _logger.info("Date_to was changed on %s appointments, forcing back", len(fixes))
+            appointments.flush_recordset(['date_to'])
+            # Use direct SQL to bypass any ORM constraints
+            self.env.cr.execute("""
+                UPDATE hms_appointment
+                SET date_to = data.date_to
+                FROM unnest(%s::int[], %s::timestamp[]) AS data(id, date_to)
+                WHERE hms_appointment.id = data.id
+            """, ([fix[0] for fix in fixes], [fix[1] for fix in fixes]))
+            appointments.invalidate_recordset(['date_to'])
+
+        # Run post-create logic
+        appointments.update_reminder_dates()
+        appointments.update_appoinemtn_refering()
+        return appointments
 
     # FIXED: Override write method to ensure proper duration handling
     def write(self, values):
@@ -565,8 +567,7 @@ class Appointment(models.Model):
         data = self.acs_appointment_common_data(invoice_id)
         #create Invoice lines only if invoice is passed
         if invoice_id:
-            for line in data:
-                inv_line = self.with_context(acs_pricelist_id=self.pricelist_id.id).acs_create_invoice_line(line, invoice_id)
+            self.with_context(acs_pricelist_id=self.pricelist_id.id).acs_create_invoice_lines(data, invoice_id)
         return data
 
     def create_invoice(self):
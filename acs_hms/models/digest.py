@@ -4,6 +4,47 @@ from odoo import fields, models, _
 from odoo.exceptions import AccessError
 
 
+class ACSHmsKpiDaily(models.Model):
+    _inherit = 'acs.hms.kpi.daily'
+
+    def _get_kpi_sources(self):
+        sources = super()._get_kpi_sources()
+        sources.update({
+            'appointment': {
+                'model': 'hms.appointment',
+                'date_field': 'date',
+                'domain': [('state', 'not in', ['cancel', 'cancelled'])],
+                'physician_field': 'physician_id',
+                'department_field': 'department_id',
+                'duration_field': 'appointment_duration',
+                'waiting_field': 'waiting_duration',
+            },
+            'treatment': {
+                'model': 'hms.treatment',
+                'date_field': 'date',
+                'domain': [('state', 'not in', ['cancel'])],
+                'physician_field': 'physician_id',
+                'department_field': 'department_id',
+            },
+            'procedure': {
+                'model': 'acs.patient.procedure',
+                'date_field': 'date',
+                'domain': [('state', 'not in', ['cancel'])],
+                'physician_field': 'physician_id',
+                'department_field': 'department_id',
+                'duration_field': 'duration',
+                'tracked_fields': ['date_stop'],
+            },
+            'evaluation': {
+                'model': 'acs.patient.evaluation',
+                'date_field': 'date',
+                'domain': [('state', 'not in', ['cancel'])],
+                'physician_field': 'physician_id',
+            },
+        })
+        return sources
+
+
 class Digest(models.Model):
     _inherit = 'digest.digest'
 
@@ -25,41 +66,46 @@ class Digest(models.Model):
     def _compute_kpi_acs_appointment_total_value(self):
         if not self.env.user.has_group('acs_hms_base.group_hms_user'):
             raise AccessError(_("Do not have access, skip this data for user's digest email"))
+        KpiDaily = self.env['acs.hms.kpi.daily']
         for record in self:
             start, end, company = record._get_kpi_compute_parameters()
-            appointment = self.env['hms.appointment'].search_count([('company_id', '=', company.id), ('date', '>=', start), ('date', '<', end), ('state', 'not in', ['cancel'])])
+            appointment = KpiDaily._get_kpi_count('appointment', start, end, [company.id])
             record.kpi_acs_appointment_total_value = appointment
 
     def _compute_kpi_acs_treatment_total_value(self):
         if not self.env.user.has_group('acs_hms_base.group_hms_user'):
             raise AccessError(_("Do not have access, skip this data for user's digest email"))
+        KpiDaily = self.env['acs.hms.kpi.daily']
         for record in self:
             start, end, company = record._get_kpi_compute_parameters()
-            treatment = self.env['hms.treatment'].search_count([('company_id', '=', company.id), ('date', '>=', start), ('date', '<', end), ('state', 'not in', ['cancel'])])
+            treatment = KpiDaily._get_kpi_count('treatment', start, end, [company.id])
             record.kpi_acs_treatment_total_value = treatment
 
     def _compute_kpi_acs_procedure_total_value(self):
         if not self.env.user.has_group('acs_hms_base.group_hms_user'):
             raise AccessError(_("Do not have access, skip this data for user's digest email"))
+        KpiDaily = self.env['acs.hms.kpi.daily']
         for record in self:
             start, end, company = record._get_kpi_compute_parameters()
-            procedure = self.env['acs.patient.procedure'].search_count([('company_id', '=', company.id), ('date', '>=', start), ('date', '<', end), ('state', 'not in', ['cancel'])])
+            procedure = KpiDaily._get_kpi_count('procedure', start, end, [company.id])
             record.kpi_acs_procedure_total_value = procedure
 
     def _compute_kpi_acs_evaluation_total_value(self):
         if not self.env.user.has_group('acs_hms_base.group_hms_user'):
             raise AccessError(_("Do not have access, skip this data for user's digest email"))
+        KpiDaily = self.env['acs.hms.kpi.daily']
         for record in self:
             start, end, company = record._get_kpi_compute_parameters()
-            evaluation = self.env['acs.patient.evaluation'].search_count([('company_id', '=', company.id), ('date', '>=', start), ('date', '<', end), ('state', 'not in', ['cancel'])])
+            evaluation = KpiDaily._get_kpi_count('evaluation', start, end, [company.id])
             record.kpi_acs_evaluation_total_value = evaluation
 
     def _compute_kpi_acs_patients_total_value(self):
         if not self.env.user.has_group('acs_hms_base.group_hms_user'):
             raise AccessError(_("Do not have access, skip this data for user's digest email"))
+        KpiDaily = self.env['acs.hms.kpi.daily']
         for record in self:
             start, end, company = record._get_kpi_compute_parameters()
-            patient = self.env['hms.patient'].search_count([('company_id', '=', company.id), ('create_date', '>=', start), ('create_date', '<', end)])
+            patient = KpiDaily._get_kpi_count('patient', start, end, [company.id])
             record.kpi_acs_patients_total_value = patient
 
     def _compute_kpis_actions(self, company, user):
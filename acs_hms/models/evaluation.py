@@ -7,7 +7,8 @@ from dateutil.relativedelta import relativedelta
 class AcsPatientEvaluation(models.Model):
     _name = 'acs.patient.evaluation'
     _description = "Patient Evaluation"
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.kpi.mixin']
+    _kpi_rollup_key = 'evaluation'
     _order = "id desc"
 
     @api.depends('height', 'weight')
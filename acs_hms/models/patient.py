@@ -24,10 +24,9 @@ class ACSPatient(models.Model):
             rec.evaluation_count = len(rec.evaluation_ids)
             rec.patient_procedure_count = len(rec.patient_procedure_ids)
 
-    def _acs_get_attachemnts(self):
-        attachments = super(ACSPatient, self)._acs_get_attachemnts()
-        attachments += self.appointment_ids.mapped('attachment_ids')
-        return attachments
+    def _acs_attachment_owners(self):
+        owners = super(ACSPatient, self)._acs_attachment_owners()
+        return self._acs_add_attachment_owners(owners, 'appointment_ids')
 
     @api.model
     def _get_service_id(self):
@@ -2,7 +2,6 @@
 
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
-import uuid
 
 
 class ACSPrescriptionOrder(models.Model):
@@ -52,13 +51,6 @@ class ACSPrescriptionOrder(models.Model):
     acs_kit_id = fields.Many2one('acs.product.kit', string='Kit')
     acs_kit_qty = fields.Integer("Kit Qty", default=1)
 
-    @api.model_create_multi
-    def create(self, vals_list):
-        res = super().create(vals_list)
-        for record in res:
-            record.unique_code = uuid.uuid4()
-        return res
-
     @api.onchange('group_id')
     def on_change_group_id(self):
         product_lines = []
@@ -27,7 +27,8 @@ class ProcedureGroup(models.Model):
 
 class AcsPatientProcedure(models.Model):
     _name="acs.patient.procedure"
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'acs.document.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'acs.document.mixin', 'acs.hms.kpi.mixin']
+    _kpi_rollup_key = 'procedure'
     _description = "Patient Procedure"
     _order = "id desc"
 
@@ -40,10 +41,9 @@ class AcsPatientProcedure(models.Model):
                 duration = (diff.days * 24) + (diff.seconds/3600)
             rec.duration = duration
 
-    def _acs_get_attachemnts(self):
-        attachments = super(AcsPatientProcedure, self)._acs_get_attachemnts()
-        attachments += self.appointment_ids.mapped('attachment_ids')
-        return attachments
+    def _acs_attachment_owners(self):
+        owners = super(AcsPatientProcedure, self)._acs_attachment_owners()
+        return self._acs_add_attachment_owners(owners, 'appointment_ids')
 
     name = fields.Char(string="Name", tracking=1)
     patient_id = fields.Many2one('hms.patient', string='Patient', required=True, tracking=1)
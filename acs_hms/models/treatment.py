@@ -8,7 +8,8 @@ from datetime import date, datetime, timedelta
 class ACSTreatment(models.Model):
     _name = 'hms.treatment'
     _description = "Treatment"
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'acs.document.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'acs.document.mixin', 'acs.hms.kpi.mixin']
+    _kpi_rollup_key = 'treatment'
 
     @api.depends('medical_alert_ids')
     def _get_alert_count(self):
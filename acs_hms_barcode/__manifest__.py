@@ -26,7 +26,7 @@
     'author': 'Almighty Consulting Solutions Pvt. Ltd.',
     'website': 'https://www.almightycs.com',
     'license': 'OPL-1',
-    "depends": ["acs_hms", "barcodes"],
+    "depends": ["acs_hms", "barcodes", "invoice_barcode"],
     "data": [
         "security/ir.model.access.csv",
         "data/data.xml",
@@ -7,7 +7,10 @@ def isodd(x):
     return bool(x % 2)
 
 class ACSPatient(models.Model):
-    _inherit = "hms.patient"
+    _name = "hms.patient"
+    _inherit = ["hms.patient", "acs.barcode.source.mixin"]
+
+    _barcode_source_fields = ('barcode', 'code', 'active', 'company_id')
 
     barcode = fields.Char(string='Barcode', help="Number used for Patient identification.")
 
@@ -30,6 +33,30 @@ class ACSPatient(models.Model):
         key = (10 - sum % 10) % 10
         self.barcode = ean + str(key)
 
+    @api.model
+    def acs_get_patient_by_barcode(self, barcode):
+        """Patient with the scanned barcode, else with the scanned code"""
+        return self.env['acs.barcode.resolver'].acs_resolve_barcode(barcode, ('hms.patient',))
+
+
+class ResPartner(models.Model):
+    _name = "res.partner"
+    _inherit = ["res.partner", "acs.barcode.source.mixin"]
+
+    #ACS: The patient code is stored on the partner (_inherits), it can change without a write on hms.patient.
+    _barcode_source_fields = ('code', 'active', 'company_id')
+
+
+class BarcodeResolver(models.AbstractModel):
+    _inherit = 'acs.barcode.resolver'
+
+    @api.model
+    def _get_barcode_sources(self):
+        return super()._get_barcode_sources() + [
+            ('hms.patient', 'barcode'),
+            ('hms.patient', 'code'),
+        ]
+
 
 class HmsAppointment(models.Model):
     _name = 'hms.appointment'
@@ -37,9 +64,7 @@ class HmsAppointment(models.Model):
 
     def on_barcode_scanned(self, barcode):
         if barcode and self.state=='draft':
-            patient_id = self.env['hms.patient'].search([('barcode','=',barcode)], limit=1)
-            if not patient_id:
-                patient_id = self.env['hms.patient'].search([('code','=',barcode)], limit=1)
+            patient_id = self.env['hms.patient'].acs_get_patient_by_barcode(barcode)
 
             if patient_id:
                 self.patient_id = patient_id.id
@@ -56,9 +81,7 @@ class PrescriptionOder(models.Model):
 
     def on_barcode_scanned(self, barcode):
         if barcode and self.state=='draft':
-            patient_id = self.env['hms.patient'].search([('barcode','=',barcode)], limit=1)
-            if not patient_id:
-                patient_id = self.env['hms.patient'].search([('code','=',barcode)], limit=1)
+            patient_id = self.env['hms.patient'].acs_get_patient_by_barcode(barcode)
 
             if patient_id:
                 self.patient_id = patient_id.id
@@ -74,9 +97,7 @@ class HmsTreatment(models.Model):
 
     def on_barcode_scanned(self, barcode):
         if barcode and self.state=='draft':
-            patient_id = self.env['hms.patient'].search([('barcode','=',barcode)], limit=1)
-            if not patient_id:
-                patient_id = self.env['hms.patient'].search([('code','=',barcode)], limit=1)
+            patient_id = self.env['hms.patient'].acs_get_patient_by_barcode(barcode)
 
             if patient_id:
                 self.patient_id = patient_id.id
@@ -88,6 +88,7 @@
         'data/sequence.xml',
         'data/mail_template.xml',
         'data/company_data.xml',
+        'data/kpi_data.xml',
 
         'views/hms_base_views.xml',
         'views/patient_view.xml',
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 from . import hms_mixin
+from . import kpi_daily
+from . import portal_counter
 from . import hms_base
 from . import hms_consumable_line
 from . import partner
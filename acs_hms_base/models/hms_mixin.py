@@ -2,27 +2,137 @@
 
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
+from odoo.osv import expression
+from odoo.tools import SQL
+from odoo.tools.sql import column_exists, constraint_definition
 
 import base64
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from io import BytesIO
 
+# Rendered QR codes by (model, unique_code, base_url, box_size), least recently used first.
+QRCODE_CACHE_SIZE = 4096
+_qrcode_cache = OrderedDict()
+_qrcode_cache_lock = threading.Lock()
+
+# Validated codes by (dbname, model, unique_code): (record id or 0, time), least recently used first.
+VALIDATION_CACHE_SIZE = 2048
+# Seconds an unknown code stays cached.
+VALIDATION_NEGATIVE_TTL = 300
+# Validation requests allowed per client address and window of seconds, per worker.
+VALIDATION_RATE_LIMIT = 30
+VALIDATION_RATE_WINDOW = 60
+_validation_cache = OrderedDict()
+_validation_hits = {}
+_validation_lock = threading.Lock()
+
 
 class ACSQrcodeMixin(models.AbstractModel):
     _name = "acs.qrcode.mixin"
     _description = "QrCode Mixin"
 
-    unique_code = fields.Char("Unique UID")
+    _qrcode_box_size = 4
+
+    unique_code = fields.Char("Unique UID", copy=False, default=lambda self: str(uuid.uuid4()))
     qr_image = fields.Binary("QR Code", compute='acs_generate_qrcode')
 
+    #ACS: The unique constraint also indexes the code for the validation pages.
+    _sql_constraints = [
+        ('unique_code_uniq', 'unique (unique_code)', 'The Unique UID must be unique!'),
+    ]
+
+    def _auto_init(self):
+        #ACS: Copies used to share the code of their origin and older records may have none,
+        # give them a new one before the unique constraint is added.
+        cr = self.env.cr
+        if self._auto and column_exists(cr, self._table, 'unique_code') \
+                and not constraint_definition(cr, self._table, '%s_unique_code_uniq' % self._table):
+            cr.execute(SQL("""
+                UPDATE %(table)s SET unique_code = md5(random()::text || id::text)::uuid::text
+                 WHERE unique_code IS NULL OR id IN (
+                    SELECT id FROM (
+                        SELECT id, row_number() OVER (PARTITION BY unique_code ORDER BY id) AS position
+                          FROM %(table)s WHERE unique_code IS NOT NULL) codes
+                     WHERE position > 1)
+            """, table=SQL.identifier(self._table)))
+        return super()._auto_init()
+
+    @api.model
+    def _acs_find_by_unique_code(self, unique_code):
+        """Id of the record with ``unique_code``, 0 when there is none.
+        Kept in a small per worker cache, unknown codes only for a few minutes.
+        """
+        key = (self.env.cr.dbname, self._name, unique_code)
+        now = time.monotonic()
+        with _validation_lock:
+            cached = _validation_cache.get(key)
+            if cached and (cached[0] or now - cached[1] < VALIDATION_NEGATIVE_TTL):
+                _validation_cache.move_to_end(key)
+                return cached[0]
+        res_id = self.sudo().search([('unique_code', '=', unique_code)], limit=1).id or 0
+        with _validation_lock:
+            _validation_cache[key] = (res_id, now)
+            _validation_cache.move_to_end(key)
+            while len(_validation_cache) > VALIDATION_CACHE_SIZE:
+                _validation_cache.popitem(last=False)
+        return res_id
+
+    @api.model
+    def _acs_validation_allowed(self, client):
+        """Count a validation request of ``client``, False once it exceeded the rate limit"""
+        now = time.monotonic()
+        with _validation_lock:
+            if len(_validation_hits) > VALIDATION_CACHE_SIZE:
+                for key, (start, count) in list(_validation_hits.items()):
+                    if now - start >= VALIDATION_RATE_WINDOW:
+                        del _validation_hits[key]
+            start, count = _validation_hits.get(client, (now, 0))
+            if now - start >= VALIDATION_RATE_WINDOW:
+                start, count = now, 0
+            _validation_hits[client] = (start, count + 1)
+        return count < VALIDATION_RATE_LIMIT
+
+    @api.model
+    def acs_validate_unique_code(self, unique_code, client=None):
+        """Record of the QR code ``unique_code`` as superuser, for the public validation pages.
+        Empty when the code is unknown, None when ``client`` exceeded the rate limit.
+        """
+        if client and not self._acs_validation_allowed(client):
+            return None
+        if not unique_code or len(unique_code) > 64:
+            return self.sudo().browse()
+        return self.sudo().browse(self._acs_find_by_unique_code(unique_code)).exists()
+
+    @api.model
+    def _acs_render_qrcode(self, url, box_size):
+        import qrcode
+        data = BytesIO()
+        qrcode.make(url.encode(), box_size=box_size).save(data, optimise=True, format='PNG')
+        return base64.b64encode(data.getvalue()).decode()
+
     def acs_generate_qrcode(self):
+        """QR codes of the validation urls, rendered once per worker and kept in an LRU cache.
+        Reports read the field for all their records at once, so only the misses are rendered.
+        """
         base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        model_name = (self._name).replace('.','')
+        box_size = self._qrcode_box_size
         for rec in self:
-            import qrcode
-            model_name = (rec._name).replace('.','')
-            url = base_url + '/validate/%s/%s' % (model_name,rec.unique_code)
-            data = BytesIO()
-            qrcode.make(url.encode(), box_size=4).save(data, optimise=True, format='PNG')
-            qrcode = base64.b64encode(data.getvalue()).decode()
+            key = (model_name, rec.unique_code, base_url, box_size)
+            with _qrcode_cache_lock:
+                qrcode = _qrcode_cache.get(key)
+                if qrcode is not None:
+                    _qrcode_cache.move_to_end(key)
+            if qrcode is None:
+                url = base_url + '/validate/%s/%s' % (model_name,rec.unique_code)
+                qrcode = self._acs_render_qrcode(url, box_size)
+                with _qrcode_cache_lock:
+                    _qrcode_cache[key] = qrcode
+                    while len(_qrcode_cache) > QRCODE_CACHE_SIZE:
+                        _qrcode_cache.popitem(last=False)
             rec.qr_image = qrcode
 
 
@@ -64,97 +174,90 @@ class ACSHmsMixin(models.AbstractModel):
         return invoice
 
     @api.model
-    def acs_get_invoice_lines(self, product_data, partner, inv_data, fiscal_position_id):
-        lines = [] 
+    def _acs_prepare_invoice_line_vals(self, product_data, partner, move_type, fiscal_position_id, for_move_line=False,
+                                       line_pricelist=False):
+        """Values of the invoice lines of ``product_data``.
+
+        Prices and discounts are resolved once per product, uom, quantity and
+        pricelist, taxes and accounts once per product. Lines are priced with
+        the ``acs_pricelist_id`` of the context, or with ``line_pricelist`` with
+        the ``pricelist_id`` of each line (none when missing). With
+        ``for_move_line`` the values are ready for a direct account.move.line
+        create (account set, uom kept as given).
+        """
+        context_pricelist_id = self.env.context.get('acs_pricelist_id')
+        customer = move_type in ['out_invoice','out_refund']
+        price_cache = {}
+        product_cache = {}
+        vals_list = []
         for data in product_data:
             product = data.get('product_id')
             quantity = data.get('quantity',1.0)
             uom_id = data.get('product_uom_id')
             discount = data.get('discount',0.0)
 
-            if product:
-                acs_pricelist_id = self.env.context.get('acs_pricelist_id')
-
-                if not data.get('price_unit'):
-                    price = product.with_context(acs_pricelist_id=acs_pricelist_id)._acs_get_partner_price(quantity, uom_id, partner)
-                    discount = product.with_context(acs_pricelist_id=acs_pricelist_id)._acs_get_partner_price_discount(quantity, uom_id, partner)
-                else:
-                    price = data.get('price_unit', product.list_price)
-
-                if inv_data.get('move_type','out_invoice') in ['out_invoice','out_refund']:
-                    tax_ids = product.taxes_id
-                else:
-                    tax_ids = product.supplier_taxes_id
+            if not product:
+                vals_list.append({
+                    'name': data.get('name'),
+                    'display_type': data.get('display_type', 'line_section'),
+                })
+                continue
+
+            if not data.get('price_unit'):
+                acs_pricelist_id = data.get('pricelist_id', False) if line_pricelist else context_pricelist_id
+                key = (product.id, uom_id, quantity, acs_pricelist_id)
+                if key not in price_cache:
+                    priced_product = product.with_context(acs_pricelist_id=acs_pricelist_id)
+                    price_cache[key] = (priced_product._acs_get_partner_price(quantity, uom_id, partner),
+                                        priced_product._acs_get_partner_price_discount(quantity, uom_id, partner))
+                price, discount = price_cache[key]
+            else:
+                price = data.get('price_unit', product.list_price)
 
+            if product.id not in product_cache:
+                tax_ids = product.taxes_id if customer else product.supplier_taxes_id
                 if tax_ids:
                     if fiscal_position_id:
                         tax_ids = fiscal_position_id.map_tax(tax_ids._origin)
                     tax_ids = [(6, 0, tax_ids.ids)]
+                account_id = product.property_account_income_id or product.categ_id.property_account_income_categ_id
+                product_cache[product.id] = (tax_ids, account_id.id)
+            tax_ids, account_id = product_cache[product.id]
 
-                lines.append((0, 0, {
-                    'name': data.get('name',product.get_product_multiline_description_sale()),
-                    'product_id': product.id,
-                    'price_unit': price,
-                    'quantity': quantity,
-                    'discount': discount,
-                    'product_uom_id': uom_id or product.uom_id.id or False,
-                    'tax_ids': tax_ids,
-                    'display_type': 'product',
-                }))
-            else:
-                lines.append((0, 0, {
-                    'name': data.get('name'),
-                    'display_type': data.get('display_type', 'line_section'),
-                }))
-                
-        return lines
-
-    @api.model
-    def acs_create_invoice_line(self, product_data, invoice):
-        product = product_data.get('product_id')
-        MoveLine = self.env['account.move.line']
-        quantity = product_data.get('quantity',1.0)
-        uom_id = product_data.get('product_uom_id')
-        discount = product_data.get('discount',0.0)
-        if product:
-            acs_pricelist_id = self.env.context.get('acs_pricelist_id')
-            if not product_data.get('price_unit'):
-                price = product.with_context(acs_pricelist_id=acs_pricelist_id)._acs_get_partner_price(quantity, uom_id, invoice.partner_id)
-                discount = product.with_context(acs_pricelist_id=acs_pricelist_id)._acs_get_partner_price_discount(quantity, uom_id, invoice.partner_id)
-            else:
-                price = product_data.get('price_unit', product.list_price)
-
-            if invoice.move_type in ['out_invoice','out_refund']:
-                tax_ids = product.taxes_id
-            else:
-                tax_ids = product.supplier_taxes_id
-
-            if tax_ids:
-                if invoice.fiscal_position_id:
-                    tax_ids = invoice.fiscal_position_id.map_tax(tax_ids._origin)
-                tax_ids = [(6, 0, tax_ids.ids)]
-
-            account_id = product.property_account_income_id or product.categ_id.property_account_income_categ_id
-            line = MoveLine.with_context(check_move_validity=False).create({
-                'move_id': invoice.id,
-                'name': product_data.get('name',product.get_product_multiline_description_sale()),
+            vals = {
+                'name': data.get('name') or product.get_product_multiline_description_sale(),
                 'product_id': product.id,
-                'account_id': account_id.id,
                 'price_unit': price,
                 'quantity': quantity,
                 'discount': discount,
-                'product_uom_id': uom_id,
+                'product_uom_id': uom_id or product.uom_id.id or False,
                 'tax_ids': tax_ids,
                 'display_type': 'product',
-            })
-        else:
-            line = MoveLine.with_context(check_move_validity=False).create({
-                'move_id': invoice.id,
-                'name': product_data.get('name'),
-                'display_type': 'line_section',
-            })
-            
-        return line
+            }
+            if for_move_line:
+                vals['account_id'] = account_id
+                vals['product_uom_id'] = uom_id
+            vals_list.append(vals)
+        return vals_list
+
+    @api.model
+    def acs_get_invoice_lines(self, product_data, partner, inv_data, fiscal_position_id):
+        vals_list = self._acs_prepare_invoice_line_vals(product_data, partner,
+            inv_data.get('move_type','out_invoice'), fiscal_position_id)
+        return [(0, 0, vals) for vals in vals_list]
+
+    @api.model
+    def acs_create_invoice_lines(self, product_data, invoice, line_pricelist=False):
+        """Create the lines of ``product_data`` on ``invoice`` with a single create, in the same order"""
+        vals_list = self._acs_prepare_invoice_line_vals(product_data, invoice.partner_id,
+            invoice.move_type, invoice.fiscal_position_id, for_move_line=True, line_pricelist=line_pricelist)
+        for vals in vals_list:
+            vals['move_id'] = invoice.id
+        return self.env['account.move.line'].with_context(check_move_validity=False).create(vals_list)
+
+    @api.model
+    def acs_create_invoice_line(self, product_data, invoice):
+        return self.acs_create_invoice_lines([product_data], invoice)
 
     def acs_action_view_invoice(self, invoices):
         action = self.env["ir.actions.actions"]._for_xml_id("account.action_move_out_invoice_type")
@@ -216,25 +319,70 @@ class ACSDocumntMixin(models.AbstractModel):
     _name = "acs.document.mixin"
     _description = "Document Mixin"
 
+    def _acs_attachment_owners(self):
+        """``{record id: {(res_model, res_id)}}``: the records whose attachments are shown
+        in the documents of each record. Extended to add the documents of related records.
+        """
+        return {rec.id: {(self._name, rec._origin.id)} if rec._origin.id else set() for rec in self}
+
+    def _acs_add_attachment_owners(self, owners, field_name):
+        """Add to ``owners`` the attachment owners of the records linked by ``field_name``"""
+        children = self.mapped(field_name)
+        if children:
+            child_owners = children._acs_attachment_owners()
+            for rec in self:
+                for child in rec[field_name]:
+                    owners[rec.id] |= child_owners[child.id]
+        return owners
+
+    @api.model
+    def _acs_attachment_owner_domain(self, owners):
+        res_ids = {}
+        for res_model, res_id in owners:
+            res_ids.setdefault(res_model, set()).add(res_id)
+        if not res_ids:
+            return expression.FALSE_DOMAIN
+        return expression.OR([[('res_model', '=', res_model), ('res_id', 'in', list(ids))]
+                              for res_model, ids in res_ids.items()])
+
+    def _acs_get_attachment_domain(self):
+        owners = set().union(*self._acs_attachment_owners().values())
+        return self._acs_attachment_owner_domain(owners)
+
     def _acs_get_attachemnts(self):
-        attachments = self.env['ir.attachment'].search([
-            ('res_model', '=', self._name),
-            ('res_id', '=', self.id)])
-        return attachments 
+        return self.env['ir.attachment'].search(self._acs_get_attachment_domain())
 
     def _acs_attachemnt_count(self):
+        """Documents of the whole recordset counted with one grouped query"""
+        owners = self._acs_attachment_owners()
+        all_owners = set().union(*owners.values())
+        counts = {}
+        if all_owners:
+            for res_model, res_id, count in self.env['ir.attachment']._read_group(
+                    self._acs_attachment_owner_domain(all_owners), ['res_model', 'res_id'], ['__count']):
+                counts[(res_model, res_id)] = count
+        for rec in self:
+            rec.attach_count = sum(counts.get(owner, 0) for owner in owners[rec.id])
+
+    def _acs_compute_attachment_ids(self):
+        owners = self._acs_attachment_owners()
+        all_owners = set().union(*owners.values())
+        attachment_ids = {}
+        if all_owners:
+            for attachment in self.env['ir.attachment'].search_read(
+                    self._acs_attachment_owner_domain(all_owners), ['res_model', 'res_id']):
+                attachment_ids.setdefault((attachment['res_model'], attachment['res_id']), []).append(attachment['id'])
         for rec in self:
-            attachments = rec._acs_get_attachemnts()
-            rec.attach_count = len(attachments)
-            rec.attachment_ids = [(6,0,attachments.ids)]
+            ids = [att_id for owner in owners[rec.id] for att_id in attachment_ids.get(owner, [])]
+            rec.attachment_ids = [(6, 0, sorted(ids, reverse=True))]
 
     attach_count = fields.Integer(compute="_acs_attachemnt_count", readonly=True, string="Documents")
-    attachment_ids = fields.Many2many('ir.attachment', 'attachment_acs_hms_rel', 'record_id', 'attachment_id', compute="_acs_attachemnt_count", string="Attachments")
+    attachment_ids = fields.Many2many('ir.attachment', 'attachment_acs_hms_rel', 'record_id', 'attachment_id', compute="_acs_compute_attachment_ids", string="Attachments")
 
     def action_view_attachments(self):
         self.ensure_one()
         action = self.env["ir.actions.actions"]._for_xml_id("base.action_attachment")
-        action['domain'] = [('id', 'in', self.attachment_ids.ids)]
+        action['domain'] = self._acs_get_attachment_domain()
         action['context'] = {
                 'default_res_model': self._name,
                 'default_res_id': self.id,
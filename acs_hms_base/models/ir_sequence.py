@@ -8,4 +8,35 @@ class IrSequence(models.Model):
 
     acs_auto_create = fields.Boolean('Auto Create On Company Creation',  default=False, help="Auto Create new sequecte for new company.", copy=False)
 
+    def _acs_next_block(self, count):
+        """Reserve ``count`` consecutive numbers of the sequence in one statement"""
+        self.ensure_one()
+        if count <= 0:
+            return []
+        if self.use_date_range:
+            return [self._next() for dummy in range(count)]
+        if self.implementation == 'standard':
+            self.env.cr.execute("SELECT nextval(%s) FROM generate_series(1, %s)", ('ir_sequence_%03d' % self.id, count))
+            numbers = [row[0] for row in self.env.cr.fetchall()]
+        else:
+            self.flush_recordset(['number_next'])
+            self.env.cr.execute("SELECT number_next FROM ir_sequence WHERE id=%s FOR UPDATE NOWAIT", (self.id,))
+            number_next = self.env.cr.fetchone()[0]
+            self.env.cr.execute("UPDATE ir_sequence SET number_next=number_next+%s WHERE id=%s",
+                                (self.number_increment * count, self.id))
+            self.invalidate_recordset(['number_next'])
+            numbers = [number_next + self.number_increment * index for index in range(count)]
+        return [self.get_next_char(number) for number in numbers]
+
+    @api.model
+    def acs_next_block_by_code(self, sequence_code, count):
+        """Batched ``next_by_code``: a list of ``count`` references, or of False when no sequence matches"""
+        self.check_access('read')
+        company_id = self.env.company.id
+        sequence = self.search([('code', '=', sequence_code), ('company_id', 'in', [company_id, False])],
+                               order='company_id', limit=1)
+        if not sequence:
+            return [False] * count
+        return sequence.sudo()._acs_next_block(count)
+
 # vim:expandtab:smartindent:tabstop=4:softtabstop=4:shiftwidth=4:
\ No newline at end of file
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+
+from odoo import api, fields, models
+from datetime import datetime, time, timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Transaction-level advisory lock serializing rollup refreshes.
+KPI_ROLLUP_LOCK = 4611863
+KPI_ROLLUP_PARAM = 'acs_hms_base.kpi_rollup_sources'
+
+
+class ACSHmsKpiDaily(models.Model):
+    _name = "acs.hms.kpi.daily"
+    _description = "HMS Daily KPI"
+    _order = "date desc, kpi"
+
+    kpi = fields.Char(string="KPI", required=True, index=True)
+    date = fields.Date(string="Date", required=True, index=True)
+    company_id = fields.Many2one('res.company', string='Hospital', ondelete='cascade', index=True)
+    physician_id = fields.Many2one('hms.physician', string='Physician', ondelete='cascade')
+    department_id = fields.Many2one('hr.department', string='Department', ondelete='cascade')
+    count = fields.Integer(string="Count")
+    duration = fields.Float(string="Total Duration", help="Sum of the durations, divide by Count for the average")
+    waiting_duration = fields.Float(string="Total Wait Time", help="Sum of the wait times, divide by Count for the average")
+
+    @api.model
+    def _get_kpi_sources(self):
+        """KPIs stored in the rollup, extended by each module owning a source model.
+
+        Every source gives its ``model``, the Datetime ``date_field`` bucketed
+        per UTC day, an extra ``domain`` and optionally the ``physician_field``,
+        ``department_field``, ``duration_field`` and ``waiting_field`` to keep.
+        ``tracked_fields`` lists the other fields whose changes affect the rollup.
+        """
+        return {
+            'patient': {
+                'model': 'hms.patient',
+                'date_field': 'create_date',
+                'domain': [],
+            },
+        }
+
+    @api.model
+    def _get_kpi_tracked_fields(self, kpi):
+        source = self._get_kpi_sources()[kpi]
+        tracked = {'company_id', source['date_field']}
+        tracked.update(source.get('tracked_fields', ()))
+        if source['domain']:
+            tracked.add('state')
+        for key in ('physician_field', 'department_field', 'duration_field', 'waiting_field'):
+            if source.get(key):
+                tracked.add(source[key])
+        return tracked
+
+    @api.model
+    def _mark_dirty(self, kpi, records):
+        """Queue the days of ``records`` for the next refresh of the rollup"""
+        if not records:
+            return
+        date_field = self._get_kpi_sources()[kpi]['date_field']
+        slices = set()
+        for row in records.sudo().read([date_field, 'company_id'], load=False):
+            if row[date_field]:
+                slices.add((row['company_id'] or False, fields.Date.to_date(row[date_field])))
+        if slices:
+            self.env['acs.hms.kpi.daily.queue'].sudo().create([{
+                'kpi': kpi,
+                'company_id': company_id,
+                'date': day,
+            } for company_id, day in slices])
+
+    @api.model
+    def _compute_kpi_rows(self, kpi, domain):
+        """Aggregate the source records of ``kpi`` matching ``domain`` into rollup values"""
+        source = self._get_kpi_sources()[kpi]
+        Model = self.env[source['model']].sudo().with_context(tz='UTC', active_test=False)
+        date_field = source['date_field']
+        groupby = ['company_id', '%s:day' % date_field]
+        keys = []
+        for key in ('physician_field', 'department_field'):
+            if source.get(key):
+                groupby.append(source[key])
+                keys.append(key)
+        aggregates = ['__count']
+        for key in ('duration_field', 'waiting_field'):
+            if source.get(key):
+                aggregates.append('%s:sum' % source[key])
+
+        vals_list = []
+        for group in Model._read_group(domain + source['domain'], groupby, aggregates):
+            company, day = group[:2]
+            values = dict(zip(keys, group[2:2 + len(keys)]))
+            totals = iter(group[2 + len(keys):])
+            vals = {
+                'kpi': kpi,
+                'company_id': company.id,
+                'date': fields.Date.to_date(day),
+                'physician_id': values['physician_field'].id if 'physician_field' in values else False,
+                'department_id': values['department_field'].id if 'department_field' in values else False,
+                'count': next(totals),
+            }
+            if source.get('duration_field'):
+                vals['duration'] = next(totals) or 0.0
+            if source.get('waiting_field'):
+                vals['waiting_duration'] = next(totals) or 0.0
+            vals_list.append(vals)
+        return vals_list
+
+    @api.model
+    def _rebuild_kpi(self, kpi):
+        """Recompute the whole history of ``kpi``, used when a source is first installed"""
+        self.sudo().search([('kpi', '=', kpi)]).unlink()
+        date_field = self._get_kpi_sources()[kpi]['date_field']
+        vals_list = self._compute_kpi_rows(kpi, [(date_field, '!=', False)])
+        self.sudo().create(vals_list)
+        _logger.info("Rebuilt %s daily rows for KPI %s", len(vals_list), kpi)
+
+    @api.model
+    def _refresh_kpi_days(self, kpi, slices):
+        """Recompute the rollup rows of ``kpi`` for a set of ``(company_id, date)``"""
+        date_field = self._get_kpi_sources()[kpi]['date_field']
+        days = sorted({day for company_id, day in slices})
+        date_from = fields.Datetime.to_datetime(days[0])
+        date_to = fields.Datetime.to_datetime(days[-1] + timedelta(days=1))
+        vals_list = [vals for vals in self._compute_kpi_rows(
+            kpi, [(date_field, '>=', date_from), (date_field, '<', date_to)])
+            if (vals['company_id'] or False, vals['date']) in slices]
+
+        stale = self.sudo().search([('kpi', '=', kpi), ('date', 'in', days)]).filtered(
+            lambda row: (row.company_id.id or False, row.date) in slices)
+        stale.unlink()
+        self.sudo().create(vals_list)
+
+    @api.model
+    def _refresh_rollup(self):
+        """Bring the rollup up to date: backfill new sources, then replay the queued days.
+
+        Only one transaction refreshes at a time; the others read the rollup as is.
+        """
+        self.env.cr.execute("SELECT pg_try_advisory_xact_lock(%s)", (KPI_ROLLUP_LOCK,))
+        if not self.env.cr.fetchone()[0]:
+            return
+        self.env.flush_all()
+
+        sources = self._get_kpi_sources()
+        Param = self.env['ir.config_parameter'].sudo()
+        done = set(filter(None, (Param.get_param(KPI_ROLLUP_PARAM) or '').split(',')))
+        Queue = self.env['acs.hms.kpi.daily.queue'].sudo()
+        missing = [kpi for kpi in sources if kpi not in done]
+        if missing:
+            Queue.search([('kpi', 'in', missing)]).unlink()
+            for kpi in missing:
+                self._rebuild_kpi(kpi)
+            Param.set_param(KPI_ROLLUP_PARAM, ','.join(sorted(done | set(missing))))
+
+        queued = Queue.search_read([], ['kpi', 'company_id', 'date'], load=False)
+        slices_by_kpi = {}
+        for row in queued:
+            if row['kpi'] in sources:
+                slices_by_kpi.setdefault(row['kpi'], set()).add((row['company_id'] or False, row['date']))
+        for kpi, slices in slices_by_kpi.items():
+            self._refresh_kpi_days(kpi, slices)
+        Queue.browse([row['id'] for row in queued]).unlink()
+        self.env.flush_all()
+
+    @api.model
+    def _cron_refresh_rollup(self):
+        self._refresh_rollup()
+
+    @api.model
+    def _get_kpi_values(self, kpi, date_from, date_to, company_ids=None, groupby=()):
+        """Read ``kpi`` between two dates (end excluded) from the rollup as is.
+
+        The rollup is only written by the hourly cron, so reads never write and
+        may miss the changes of the last hour. Returns the ``_read_group``
+        result of ``groupby`` with the count, total duration and total wait
+        time aggregates.
+        """
+        domain = [('kpi', '=', kpi)]
+        if date_from:
+            domain.append(('date', '>=', fields.Date.to_date(date_from)))
+        if date_to:
+            domain.append(('date', '<', fields.Date.to_date(date_to)))
+        if company_ids is not None:
+            domain.append(('company_id', 'in', list(company_ids)))
+        return self.sudo()._read_group(domain, list(groupby),
+                                       ['count:sum', 'duration:sum', 'waiting_duration:sum'])
+
+    @api.model
+    def _count_kpi_source(self, kpi, date_from, date_to, company_ids=None):
+        """Count the source records of ``kpi`` between two UTC datetimes, without the rollup"""
+        source = self._get_kpi_sources()[kpi]
+        Model = self.env[source['model']].sudo().with_context(active_test=False)
+        domain = source['domain'] + [(source['date_field'], '>=', date_from), (source['date_field'], '<', date_to)]
+        if company_ids is not None:
+            domain.append(('company_id', 'in', list(company_ids)))
+        return Model.search_count(domain)
+
+    @api.model
+    def _get_kpi_count(self, kpi, date_from, date_to, company_ids=None):
+        """Count ``kpi`` between two UTC datetimes (end excluded).
+
+        The whole days of the period are read from the rollup, the partial days
+        at its edges, such as the current day of a rolling window, are counted
+        on the source records.
+        """
+        date_from = fields.Datetime.to_datetime(date_from)
+        date_to = fields.Datetime.to_datetime(date_to)
+        first_day = date_from.date() if date_from.time() == time.min else date_from.date() + timedelta(days=1)
+        last_day = date_to.date()
+        if first_day >= last_day:
+            return self._count_kpi_source(kpi, date_from, date_to, company_ids)
+        [(count, duration, waiting)] = self._get_kpi_values(kpi, first_day, last_day, company_ids)
+        count = count or 0
+        day_start = datetime.combine(first_day, time.min)
+        if date_from < day_start:
+            count += self._count_kpi_source(kpi, date_from, day_start, company_ids)
+        day_end = datetime.combine(last_day, time.min)
+        if day_end < date_to:
+            count += self._count_kpi_source(kpi, day_end, date_to, company_ids)
+        return count
+
+
+class ACSHmsKpiDailyQueue(models.Model):
+    _name = "acs.hms.kpi.daily.queue"
+    _description = "HMS Daily KPI Queue"
+    _log_access = False
+
+    # No unique constraint: concurrent transactions may queue the same day.
+    kpi = fields.Char(string="KPI", required=True)
+    date = fields.Date(string="Date", required=True)
+    company_id = fields.Many2one('res.company', string='Hospital', ondelete='cascade')
+
+
+class ACSHmsKpiMixin(models.AbstractModel):
+    _name = "acs.hms.kpi.mixin"
+    _description = "HMS Daily KPI Mixin"
+
+    # Key of the model in acs.hms.kpi.daily._get_kpi_sources()
+    _kpi_rollup_key = False
+
+    def _kpi_mark_dirty(self):
+        if self._kpi_rollup_key:
+            self.env['acs.hms.kpi.daily']._mark_dirty(self._kpi_rollup_key, self)
+
+    def _kpi_is_tracked(self, vals):
+        return self._kpi_rollup_key and not self.env['acs.hms.kpi.daily']._get_kpi_tracked_fields(
+            self._kpi_rollup_key).isdisjoint(vals)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._kpi_mark_dirty()
+        return records
+
+    def write(self, vals):
+        tracked = self._kpi_is_tracked(vals)
+        if tracked:
+            self._kpi_mark_dirty()
+        res = super().write(vals)
+        if tracked:
+            self._kpi_mark_dirty()
+        return res
+
+    def unlink(self):
+        self._kpi_mark_dirty()
+        return super().unlink()
@@ -8,7 +8,8 @@ from datetime import datetime
 class ACSPatient(models.Model):
     _name = 'hms.patient'
     _description = 'Patient'
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'acs.document.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'acs.document.mixin', 'acs.hms.kpi.mixin']
+    _kpi_rollup_key = 'patient'
     _inherits = {
         'res.partner': 'partner_id',
     }
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+import threading
+import time
+
+# Portal home counters by (dbname, user id): (partner stamp, time, values), per worker.
+PORTAL_COUNTER_CACHE_SIZE = 4096
+# Seconds the counters are kept, bounds the changes not stamped (rules, family links...).
+PORTAL_COUNTER_TTL = 600
+_portal_counter_cache = {}
+_portal_counter_lock = threading.Lock()
+
+
+class ACSPortalCounter(models.AbstractModel):
+    _name = "acs.portal.counter"
+    _description = "Portal Counters"
+
+    @api.model
+    def _get_portal_counters(self):
+        """Counters of the portal home page: ``{counter: (model, domain)}``.
+        Extended by each module owning a portal page.
+        """
+        return {}
+
+    @api.model
+    def _compute_portal_counters(self, names):
+        """Count the records of ``names`` under the access rules of the current user"""
+        counters = self._get_portal_counters()
+        values = {}
+        for name in names:
+            model_name, domain = counters[name]
+            Model = self.env[model_name]
+            values[name] = Model.search_count(domain) \
+                if Model.check_access_rights('read', raise_exception=False) else 0
+        return values
+
+    @api.model
+    def _get_portal_stamp(self, partner_id):
+        self.env.cr.execute("SELECT version FROM acs_portal_counter_stamp WHERE partner_id = %s", (partner_id,))
+        row = self.env.cr.fetchone()
+        return row[0] if row else 0
+
+    @api.model
+    def acs_get_portal_counters(self, counters):
+        """Values of the requested portal ``counters`` for the current user.
+
+        For portal users all the counters are computed together and kept until a
+        record of their partner changes, so the other modules read them from the cache.
+        """
+        known = self._get_portal_counters()
+        names = [name for name in counters if name in known]
+        if not names:
+            return {}
+        user = self.env.user
+        if not user._is_portal():
+            return self._compute_portal_counters(names)
+
+        key = (self.env.cr.dbname, user.id)
+        stamp = self._get_portal_stamp(user.commercial_partner_id.id)
+        now = time.monotonic()
+        with _portal_counter_lock:
+            cached = _portal_counter_cache.get(key)
+        if cached and cached[0] == stamp and now - cached[1] < PORTAL_COUNTER_TTL and not set(names) - set(cached[2]):
+            values = cached[2]
+        else:
+            values = self._compute_portal_counters(list(known))
+            with _portal_counter_lock:
+                if len(_portal_counter_cache) >= PORTAL_COUNTER_CACHE_SIZE:
+                    _portal_counter_cache.clear()
+                _portal_counter_cache[key] = (stamp, now, values)
+        return {name: values[name] for name in names}
+
+    @api.model
+    def _bump_portal_stamps(self, partner_ids):
+        """Invalidate the cached counters of the portal users of ``partner_ids``"""
+        if partner_ids:
+            self.env.cr.execute(SQL("""
+                INSERT INTO acs_portal_counter_stamp (partner_id, version)
+                SELECT partner_id, 1 FROM unnest(%s::int[]) AS partner_id
+                ON CONFLICT (partner_id) DO UPDATE SET version = acs_portal_counter_stamp.version + 1
+            """, sorted(partner_ids)))
+
+
+class ACSPortalCounterStamp(models.Model):
+    _name = "acs.portal.counter.stamp"
+    _description = "Portal Counters Stamp"
+    _log_access = False
+
+    # Only read and written in SQL by acs.portal.counter.
+    partner_id = fields.Many2one('res.partner', string='Partner', required=True, ondelete='cascade')
+    version = fields.Integer(string="Version", required=True, default=0)
+
+    _sql_constraints = [
+        ('partner_uniq', 'unique (partner_id)', 'Only one stamp per partner!'),
+    ]
+
+
+class ACSPortalCounterMixin(models.AbstractModel):
+    _name = "acs.portal.counter.mixin"
+    _description = "Portal Counters Mixin"
+
+    # Fields changing the portal counters of the records.
+    _portal_counter_fields = ('patient_id', 'state', 'company_id')
+
+    def _acs_portal_partners(self):
+        """Partners whose portal counters include the records"""
+        return self.sudo().patient_id.partner_id
+
+    def _acs_portal_changed(self):
+        self.env['acs.portal.counter']._bump_portal_stamps(set(self._acs_portal_partners().ids))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._acs_portal_changed()
+        return records
+
+    def write(self, vals):
+        tracked = not set(self._portal_counter_fields).isdisjoint(vals)
+        if tracked:
+            self._acs_portal_changed()
+        res = super().write(vals)
+        if tracked:
+            self._acs_portal_changed()
+        return res
+
+    def unlink(self):
+        self._acs_portal_changed()
+        return super().unlink()
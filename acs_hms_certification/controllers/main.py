@@ -2,6 +2,7 @@
 
 from odoo import http, fields, _
 from odoo.http import request
+from werkzeug.exceptions import TooManyRequests
 from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT
 from odoo.exceptions import AccessError, MissingError
 from odoo.addons.portal.controllers.portal import CustomerPortal, pager as portal_pager, get_records_pager
@@ -12,10 +13,11 @@ class ACSHms(http.Controller):
 
     @http.route(['/validate/certificatemanagement/<certificate_unique_code>'], type='http', auth="public", website=True, sitemap=False)
     def certificate_details(self, certificate_unique_code, **post):
-        if certificate_unique_code:
-            certificate = request.env['certificate.management'].sudo().search([('unique_code','=',certificate_unique_code)], limit=1)
-            if certificate:
-                return request.render("acs_hms_certification.acs_certificate_details", {'certificate': certificate})
+        certificate = request.env['certificate.management'].acs_validate_unique_code(certificate_unique_code, request.httprequest.remote_addr)
+        if certificate is None:
+            raise TooManyRequests()
+        if certificate:
+            return request.render("acs_hms_certification.acs_certificate_details", {'certificate': certificate})
         return request.render("acs_hms.acs_no_details")
 
 
@@ -23,10 +25,8 @@ class HMSPortal(CustomerPortal):
 
     def _prepare_home_portal_values(self, counters):
         values = super()._prepare_home_portal_values(counters)
-        Certificate = request.env['certificate.management']
-        if 'certificate_count' in counters:
-            values['certificate_count'] = Certificate.search_count([]) \
-                if Certificate.check_access_rights('read', raise_exception=False) else 0
+        values.update(request.env['acs.portal.counter'].acs_get_portal_counters(
+            set(counters) & {'certificate_count'}))
         return values
 
     @http.route(['/my/certificates', '/my/certificates/page/<int:page>'], type='http', auth="user", website=True, sitemap=False)
@@ -2,5 +2,6 @@
 
 from . import certificate_management
 from . import res_config
+from . import digest
 
 # vim:expandtab:smartindent:tabstop=4:softtabstop=4:shiftwidth=4:
@@ -1,12 +1,12 @@
 # -*- encoding: utf-8 -*-
 from odoo import _, api, fields, models, tools
 from odoo.exceptions import UserError
-import uuid
 
 
 class CertificateManagement(models.Model):
     _name = 'certificate.management'
-    _inherit = ['certificate.management', 'acs.qrcode.mixin', 'portal.mixin']
+    _inherit = ['certificate.management', 'acs.qrcode.mixin', 'portal.mixin', 'acs.hms.kpi.mixin', 'acs.portal.counter.mixin']
+    _kpi_rollup_key = 'certification'
 
     patient_id = fields.Many2one('hms.patient', string='Patient', ondelete="restrict", 
         help="Patient whose certificate to be attached", tracking=True)
@@ -30,13 +30,6 @@ class CertificateManagement(models.Model):
         for rec in self:
             rec.access_url = '/my/certificates/%s' % (rec.id)
 
-    @api.model_create_multi
-    def create(self, vals_list):
-        res = super().create(vals_list)
-        for record in res:
-            record.unique_code = uuid.uuid4()
-        return res
-
 
 class ACSPatient(models.Model):
     _inherit = 'hms.patient' 
@@ -76,4 +69,14 @@ class HmsAppointment(models.Model):
         }
         return action
 
+
+class ACSPortalCounter(models.AbstractModel):
+    _inherit = 'acs.portal.counter'
+
+    @api.model
+    def _get_portal_counters(self):
+        counters = super()._get_portal_counters()
+        counters['certificate_count'] = ('certificate.management', [])
+        return counters
+
 # vim:expandtab:smartindent:tabstop=4:softtabstop=4:shiftwidth=4:
\ No newline at end of file
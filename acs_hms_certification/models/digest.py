@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models
+
+
+class ACSHmsKpiDaily(models.Model):
+    _inherit = 'acs.hms.kpi.daily'
+
+    def _get_kpi_sources(self):
+        sources = super()._get_kpi_sources()
+        sources['certification'] = {
+            'model': 'certificate.management',
+            'date_field': 'date',
+            'domain': [],
+            'physician_field': 'physician_id',
+        }
+        return sources
+
+
+class Digest(models.Model):
+    _inherit = 'digest.digest'
+
+    def _compute_kpi_acs_certification_total_value(self):
+        for record in self:
+            start, end, company = record._get_kpi_compute_parameters()
+            certification = self.env['acs.hms.kpi.daily']._get_kpi_count('certification', start, end, [company.id])
+            record.kpi_acs_certification_total_value = certification
@@ -2,6 +2,7 @@
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
 from datetime import datetime
+import threading
 import time
 
 import json
@@ -12,6 +13,19 @@ from odoo.tools import DEFAULT_SERVER_DATE_FORMAT as DF, DEFAULT_SERVER_DATETIME
 from odoo.tools.misc import formatLang
 from odoo.release import version
 
+# Seconds during which users of the same companies and record rules share the dashboard statistics.
+DASHBOARD_CACHE_TTL = 60
+# Models counted with the access rules of the user, their rules are part of the cache key.
+DASHBOARD_RULE_MODELS = ['hms.patient', 'hms.physician', 'res.partner', 'resource.calendar',
+                         'hms.appointment', 'hms.treatment', 'hr.employee']
+_dashboard_cache = {}
+_dashboard_cache_lock = threading.Lock()
+
+
+def format_duration(hours):
+    return '{0:02.0f}:{1:02.0f}'.format(*divmod(hours * 60, 60))
+
+
 DASHBOARD_FIELDS = ['is_physician','is_manager', 'identification_id','birthday', 'birthday_color', 'total_patients_color', 'total_treatments_color', 'total_appointments_color', 'total_open_invoice_color', 'total_shedules_color', 'appointment_bar_graph_color', 'patient_line_graph_color', 'my_total_patients_color', 'my_total_appointments_color', 'my_avg_time_color', 'my_total_treatments_color', 'avg_time_color', 'physicians_color']
 
 class ResUsers(models.Model):
@@ -36,115 +50,129 @@ class ResUsers(models.Model):
                 domain = [(field_name,'<',(fields.Datetime.today()+relativedelta(months=1)).strftime('%Y-%m-01')), (field_name,'>=',time.strftime('%Y-%m-01'))]
         return domain
         
-    @api.depends('dashboard_data_filter')
-    def _compute_dashboard_data(self):
+    def _get_dashboard_rule_signature(self):
+        """Record rules applied to the current user on the counted models"""
+        Rule = self.env['ir.rule']
+        return tuple((model, repr(Rule._compute_domain(model, 'read'))) for model in DASHBOARD_RULE_MODELS)
+
+    def _get_dashboard_cache_key(self):
+        self.ensure_one()
+        return (self.env.cr.dbname, tuple(sorted(self.env.companies.ids)), self.dashboard_data_filter,
+                fields.Date.context_today(self), self.env.lang, self._get_dashboard_rule_signature())
+
+    def _get_shared_dashboard_data(self):
+        """Company wide statistics of the dashboard, shared by the users with the same record
+        rules for DASHBOARD_CACHE_TTL seconds"""
+        key = self._get_dashboard_cache_key()
+        now = time.time()
+        cached = _dashboard_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        data = self._compute_shared_dashboard_data()
+        with _dashboard_cache_lock:
+            for expired_key in [k for k, v in _dashboard_cache.items() if v[0] <= now]:
+                del _dashboard_cache[expired_key]
+            _dashboard_cache[key] = (now + DASHBOARD_CACHE_TTL, data)
+        return data
+
+    def _compute_shared_dashboard_data(self):
+        """Compute the company wide statistics with one aggregate query per model.
+        Counted with the access rules of the user, except the open invoices.
+        """
+        self.ensure_one()
+        env = self.env
+        data = {}
+
         #Patients
-        Patient = self.env['hms.patient']
-        patient_domain = self.get_filter('create_date')
-        self.total_patients = Patient.search_count(patient_domain)
-        patient_domain += ['|',('primary_physician_id.user_id','=',self.env.uid), ('assignee_ids','in',self.env.user.partner_id.id)]
-        self.my_total_patients = Patient.search_count(patient_domain)
+        Patient = env['hms.patient']
+        data['total_patients'] = Patient.search_count(self.get_filter('create_date'))
 
         #Physicians
-        Physician = self.env['hms.physician']
-        Partner = self.env['res.partner']
-        physicians_domain = self.get_filter('create_date')
-        self.total_physicians = Physician.search_count(physicians_domain)
-        ref_physicians_domain = self.get_filter('create_date')
-        ref_physicians_domain += [('is_referring_doctor','=',True)]
-        self.total_referring_physicians = Partner.search_count(ref_physicians_domain)
+        Physician = env['hms.physician']
+        Partner = env['res.partner']
+        data['total_physicians'] = Physician.search_count(self.get_filter('create_date'))
+        data['total_referring_physicians'] = Partner.search_count(self.get_filter('create_date') + [('is_referring_doctor','=',True)])
 
         #Schedules
-        Shedules = self.env['resource.calendar']
-        self.total_shedules = Shedules.search_count([])
-
-        #Appointments
-        Appointment = self.env['hms.appointment']
-        appointment_domain = self.get_filter('date')
-        self.total_appointments = Appointment.search_count(appointment_domain)
-        self.my_total_appointments =  Appointment.search_count(appointment_domain+[('physician_id.user_id','=',self.env.uid)])
-
-        appointmnt_data = []
-        if self.is_physician:
-            appointment_list = Appointment.search(appointment_domain+[('physician_id.user_id','=',self.env.uid)], limit=20)
-        else:
-            appointment_list = Appointment.search(appointment_domain, limit=20)
-
-        tzinfo = self.env.context.get('tz') or self.env.user.tz or 'UTC'
-        locale = self.env.context.get('lang') or self.env.user.lang or 'en_US'
-        for appointment in appointment_list:
-            #app_date = format_datetime(appointment.date, tzinfo=tzinfo, locale=locale)
-            app_date = tool_format_datetime(self.env, appointment.date, dt_format=False)
-            appointmnt_data.append({
-                'id': appointment.id,
-                'name': appointment.name,                  
-                'patient': appointment.patient_id.name,
-                'date': app_date or '',
-                'physician': appointment.physician_id.name,
-                'waiting_duration': '{0:02.0f}:{1:02.0f}'.format(*divmod(appointment.waiting_duration * 60, 60)),
-                'appointment_duration': '{0:02.0f}:{1:02.0f}'.format(*divmod(appointment.appointment_duration * 60, 60)),
-                'state': dict(appointment._fields['state']._description_selection(self.env)).get(appointment.state),
-            })
-        self.appointment_data = json.dumps(appointmnt_data)
-
-        #My Avg Time
-        my_appointments_domain = self.get_filter('date')
-        my_appointments_domain += [('physician_id.user_id','=',self.env.uid)]
-        my_total_appointments = Appointment.search(my_appointments_domain)
-        my_avg_cons_time = my_avg_wait_time = 0
-        my_total_appointments_cnt = len(my_total_appointments)
-        for app in my_total_appointments:
-            my_avg_cons_time += app.appointment_duration
-            my_avg_wait_time += app.waiting_duration
-        my_avg_cons_time = my_avg_cons_time/my_total_appointments_cnt if my_total_appointments_cnt else 0
-        self.my_avg_cons_time = '{0:02.0f}:{1:02.0f}'.format(*divmod(my_avg_cons_time * 60, 60))
-        my_avg_wait_time = my_avg_wait_time/my_total_appointments_cnt if my_total_appointments_cnt else 0
-        self.my_avg_wait_time = '{0:02.0f}:{1:02.0f}'.format(*divmod(my_avg_wait_time * 60, 60))
-
-        #Avg Time
-        total_appointments_domain = self.get_filter('date')
-        total_appointments = Appointment.search(total_appointments_domain)
-        avg_cons_time = avg_wait_time = 0
-        total_appointments_cnt = len(total_appointments)
-        self.total_appointments = total_appointments_cnt
-        for app in total_appointments:
-            avg_cons_time += app.appointment_duration
-            avg_wait_time += app.waiting_duration
-        avg_cons_time = avg_cons_time/total_appointments_cnt if total_appointments_cnt else 0
-        self.avg_cons_time = '{0:02.0f}:{1:02.0f}'.format(*divmod(avg_cons_time * 60, 60))
-        avg_wait_time = avg_wait_time/total_appointments_cnt if total_appointments_cnt else 0
-        self.avg_wait_time = '{0:02.0f}:{1:02.0f}'.format(*divmod(avg_wait_time * 60, 60))
+        Shedules = env['resource.calendar']
+        data['total_shedules'] = Shedules.search_count([])
+
+        #Appointments and Avg Time
+        Appointment = env['hms.appointment']
+        [(count, cons_time, wait_time)] = Appointment._read_group(
+            self.get_filter('date'),
+            aggregates=['__count', 'appointment_duration:sum', 'waiting_duration:sum'])
+        data['total_appointments'] = count
+        data['avg_cons_time'] = format_duration(cons_time / count if count else 0)
+        data['avg_wait_time'] = format_duration(wait_time / count if count else 0)
 
         #Total Treatment
-        treatment_domain = self.get_filter('date')
-        Treatment = self.env['hms.treatment']
-        self.total_treatments = Treatment.search_count(treatment_domain)
-        running_treatment_domain = treatment_domain + [('state','=','running')]
-        self.total_running_treatments = Treatment.search_count(running_treatment_domain)
-        my_treatment_domain = treatment_domain + [('physician_id.user_id','=',self.env.uid)]
-        self.my_total_treatments = Treatment.search_count(my_treatment_domain)
-        my_running_treatment_domain = treatment_domain + [('state','=','running'), ('physician_id.user_id','=',self.env.uid)]
-        self.my_total_running_treatments = Treatment.search_count(my_running_treatment_domain)
+        Treatment = env['hms.treatment']
+        treatments = dict(Treatment._read_group(self.get_filter('date'), ['state'], ['__count']))
+        data['total_treatments'] = sum(treatments.values())
+        data['total_running_treatments'] = treatments.get('running', 0)
 
         #Open Invoices
-        Invoice = self.env['account.move'].sudo()
-        open_invoice_domain = self.get_filter('invoice_date')
-        open_invoice_domain += [('move_type','=','out_invoice'),('state','=','posted')]
-        open_invoice = Invoice.search(open_invoice_domain)
-        self.total_open_invoice = len(open_invoice)
-        total = 0
-        for inv in open_invoice:
-            total += inv.amount_residual
-        self.total_open_invoice_amount =total
+        Invoice = env['account.move'].sudo()
+        [(count, residual)] = Invoice._read_group(
+            self.get_filter('invoice_date') + [('move_type','=','out_invoice'),('state','=','posted')],
+            aggregates=['__count', 'amount_residual:sum'])
+        data['total_open_invoice'] = count
+        data['total_open_invoice_amount'] = residual or 0
 
         #Birthday
         today = datetime.now()
         today_month_day = '%-' + today.strftime('%m') + '-' + today.strftime('%d')
-        self.birthday_patients = Patient.search_count([('birthday', 'like', today_month_day)])
-        self.birthday_employee = self.env['hr.employee'].search_count([('birthday', 'like', today_month_day)])
+        data['birthday_patients'] = Patient.search_count([('birthday', 'like', today_month_day)])
+        data['birthday_employee'] = env['hr.employee'].search_count([('birthday', 'like', today_month_day)])
+
+        data['appointment_bar_graph'] = json.dumps(self.get_bar_graph_datas())
+        data['patient_line_graph'] = json.dumps(self.get_line_graph_datas())
+        return data
 
-        self.appointment_bar_graph = json.dumps(self.get_bar_graph_datas())
-        self.patient_line_graph = json.dumps(self.get_line_graph_datas())
+    @api.depends('dashboard_data_filter')
+    def _compute_dashboard_data(self):
+        Patient = self.env['hms.patient']
+        Appointment = self.env['hms.appointment']
+        Treatment = self.env['hms.treatment']
+        for rec in self:
+            rec.update(rec._get_shared_dashboard_data())
+
+            #My Patients
+            patient_domain = rec.get_filter('create_date') + ['|',('primary_physician_id.user_id','=',self.env.uid), ('assignee_ids','in',self.env.user.partner_id.id)]
+            rec.my_total_patients = Patient.search_count(patient_domain)
+
+            #My Appointments and Avg Time
+            appointment_domain = rec.get_filter('date')
+            my_appointments_domain = appointment_domain + [('physician_id.user_id','=',self.env.uid)]
+            [(count, cons_time, wait_time)] = Appointment._read_group(
+                my_appointments_domain, aggregates=['__count', 'appointment_duration:sum', 'waiting_duration:sum'])
+            rec.my_total_appointments = count
+            rec.my_avg_cons_time = format_duration(cons_time / count if count else 0)
+            rec.my_avg_wait_time = format_duration(wait_time / count if count else 0)
+
+            #My Treatments
+            treatments = dict(Treatment._read_group(rec.get_filter('date') + [('physician_id.user_id','=',self.env.uid)], ['state'], ['__count']))
+            rec.my_total_treatments = sum(treatments.values())
+            rec.my_total_running_treatments = treatments.get('running', 0)
+
+            appointmnt_data = []
+            appointment_list = Appointment.search(my_appointments_domain if rec.is_physician else appointment_domain, limit=20)
+            states = dict(Appointment._fields['state']._description_selection(self.env))
+            for appointment in appointment_list:
+                app_date = tool_format_datetime(self.env, appointment.date, dt_format=False)
+                appointmnt_data.append({
+                    'id': appointment.id,
+                    'name': appointment.name,
+                    'patient': appointment.patient_id.name,
+                    'date': app_date or '',
+                    'physician': appointment.physician_id.name,
+                    'waiting_duration': format_duration(appointment.waiting_duration),
+                    'appointment_duration': format_duration(appointment.appointment_duration),
+                    'state': states.get(appointment.state),
+                })
+            rec.appointment_data = json.dumps(appointmnt_data)
 
     dashboard_data_filter = fields.Selection([
             ('today','Today'),
@@ -234,26 +262,16 @@ class ResUsers(models.Model):
                     label = format_date(start_week, 'd MMM', locale=self._context.get('lang') or 'en_US')+'-'+format_date(end_week, 'd MMM', locale=self._context.get('lang') or 'en_US')
             data.append({'label':label,'value':0.0, 'type': 'past' if i<0 else 'future'})
 
-        # Build SQL query to find amount aggregated by week
-        (select_sql_clause, query_args) = ("""SELECT count(id) as total, min(date) as aggr_date
-               FROM hms_appointment WHERE state != 'cancel'""",{})
-        query = ''
-        start_date = (first_day_of_week + timedelta(days=-7))
-        for i in range(0,6):
-            if i == 0:
-                query += "("+select_sql_clause+" and date < '"+start_date.strftime(DF)+"')"
-            elif i == 5:
-                query += " UNION ALL ("+select_sql_clause+" and date >= '"+start_date.strftime(DF)+"')"
-            else:
-                next_date = start_date + timedelta(days=7)
-                query += " UNION ALL ("+select_sql_clause+" and date >= '"+start_date.strftime(DF)+"' and date < '"+next_date.strftime(DF)+"')"
-                start_date = next_date
-
-        self.env.cr.execute(query, query_args)
-        query_results = self.env.cr.dictfetchall()
-        for index in range(0, len(query_results)):
-            if query_results[index].get('aggr_date') != None:
-                data[index]['value'] = query_results[index].get('total')
+        # Daily appointment counts come from the KPI rollup
+        KpiDaily = self.env['acs.hms.kpi.daily']
+        company_ids = self.env.companies.ids + [False]
+        start_date = (first_day_of_week + timedelta(days=-7)).date()
+        end_date = start_date + timedelta(days=28)
+        data[0]['value'] = KpiDaily._get_kpi_values('appointment', False, start_date, company_ids)[0][0] or 0
+        data[5]['value'] = KpiDaily._get_kpi_values('appointment', end_date, False, company_ids)[0][0] or 0
+        for day, count, duration, waiting in KpiDaily._get_kpi_values(
+                'appointment', start_date, end_date, company_ids, groupby=['date:day']):
+            data[1 + (fields.Date.to_date(day) - start_date).days // 7]['value'] += count or 0
 
         [graph_title, graph_key] = ['', _('Appointments')]
         return [{'values': data, 'title': graph_title, 'key': graph_key}]
@@ -263,16 +281,11 @@ class ResUsers(models.Model):
         today = fields.Date.today()
         last_month = today + timedelta(days=-30)
         data_stmt = []
-        # Query to optimize loading of data for bank graphs
-        # last 30 days
-        query = """SELECT count(id) as total, create_date::timestamp::date as date
-               FROM hms_patient WHERE create_date > %s
-                                    AND create_date <= %s
-                                    GROUP BY create_date::timestamp::date
-                                    ORDER BY create_date::timestamp::date"""
- 
-        self.env.cr.execute(query, (last_month, today))
-        data_stmt = self.env.cr.dictfetchall()
+        # New patients per day of the last 30 days, from the KPI rollup
+        groups = self.env['acs.hms.kpi.daily']._get_kpi_values(
+            'patient', last_month + timedelta(days=1), today + timedelta(days=1),
+            self.env.companies.ids + [False], groupby=['date:day'])
+        data_stmt = [{'date': fields.Date.to_date(day), 'total': count} for day, count, duration, waiting in groups]
 
         locale = self._context.get('lang') or 'en_US'
         show_date = last_month
@@ -413,4 +426,4 @@ class ResUsers(models.Model):
         action['domain'] = [('id','in',employee_ids.ids)]
         return action
 
-# vim:expandtab:smartindent:tabstop=4:softtabstop=4:shiftwidth=4:
\ No newline at end of file
+# vim:expandtab:smartindent:tabstop=4:softtabstop=4:shiftwidth=4:
\ No newline at end of file
@@ -4,6 +4,21 @@ from odoo import fields, models, _
 from odoo.exceptions import AccessError
 
 
+class ACSHmsKpiDaily(models.Model):
+    _inherit = 'acs.hms.kpi.daily'
+
+    def _get_kpi_sources(self):
+        sources = super()._get_kpi_sources()
+        sources['hospitalization'] = {
+            'model': 'acs.hospitalization',
+            'date_field': 'hospitalization_date',
+            'domain': [('state', 'not in', ['cancel'])],
+            'physician_field': 'physician_id',
+            'department_field': 'department_id',
+        }
+        return sources
+
+
 class Digest(models.Model):
     _inherit = 'digest.digest'
 
@@ -15,7 +30,7 @@ class Digest(models.Model):
             raise AccessError(_("Do not have access, skip this data for user's digest email"))
         for record in self:
             start, end, company = record._get_kpi_compute_parameters()
-            hospitalization = self.env['acs.hospitalization'].search_count([('company_id', '=', company.id), ('hospitalization_date', '>=', start), ('hospitalization_date', '<', end), ('state', 'not in', ['cancel'])])
+            hospitalization = self.env['acs.hms.kpi.daily']._get_kpi_count('hospitalization', start, end, [company.id])
             record.kpi_acs_hospitalization_total_value = hospitalization
 
     def _compute_kpis_actions(self, company, user):
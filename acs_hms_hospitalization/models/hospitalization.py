@@ -7,7 +7,8 @@ from odoo.exceptions import ValidationError, UserError
 
 class Hospitalization(models.Model):
     _name = "acs.hospitalization"
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'acs.hms.kpi.mixin']
+    _kpi_rollup_key = 'hospitalization'
     _description = "Patient Hospitalization"
     _order = "id desc"
 
@@ -495,10 +496,10 @@ class Hospitalization(models.Model):
         data = consumable_data + accommodation_data + physician_round_data + nurse_round_data + procedure_data + surgery_data + pres_data + lab_data + radiology_data
         #create Invoice lines only if invocie is passed
         if invoice_id:
-            for line in data:
-                pricelist_id = line.get('pricelist_id',False)
-                inv_line = self.with_context(acs_pricelist_id=pricelist_id).acs_create_invoice_line(line, invoice_id)
-                #ACS: As on accomodation history we need to set inv line as special case it is managed here.
+            #Each line is priced with its own pricelist, if any.
+            inv_lines = self.acs_create_invoice_lines(data, invoice_id, line_pricelist=True)
+            #ACS: As on accomodation history we need to set inv line as special case it is managed here.
+            for line, inv_line in zip(data, inv_lines):
                 if line.get('accommodation_history_id'):
                     bed_history = line.get('accommodation_history_id')
                     bed_history.account_move_line_ids = [(4, inv_line.id)]
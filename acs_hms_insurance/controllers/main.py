@@ -14,10 +14,8 @@ class HMSPortal(CustomerPortal):
     #ACS: Incase of fix insurace remove discount.
     def _prepare_home_portal_values(self, counters):
         values = super()._prepare_home_portal_values(counters)
-        Claim = request.env['hms.insurance.claim']
-        if 'insurance_claim_count' in counters:
-            values['insurance_claim_count'] = Claim.search_count([('state','not in',['draft','cancel'])]) \
-                if Claim.check_access_rights('read', raise_exception=False) else 0
+        values.update(request.env['acs.portal.counter'].acs_get_portal_counters(
+            set(counters) & {'insurance_claim_count'}))
         return values
 
     @http.route(['/my/insuranceclaims', '/my/insuranceclaims/page/<int:page>'], type='http', auth="user", website=True, sitemap=False)
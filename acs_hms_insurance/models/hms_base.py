@@ -132,35 +132,37 @@ class Invoice(models.Model):
                 insurance_invoice_id.claim_id = claim_id.id
         return insurance_invoice_id
 
+    def _acs_get_insurance_lines(self):
+        """Product lines of the invoices as ``(product_tmpl_id, product_categ_id, price_subtotal)``
+        by invoice id, read in one go for the policy rule evaluation.
+        """
+        lines = self.env['account.move.line'].search_read([('move_id', 'in', self.ids),
+            ('display_type', '=', 'product'), ('product_id', '!=', False)],
+            ['move_id', 'product_id', 'price_subtotal'], order='move_id, sequence, id', load=False)
+        products = {product['id']: product for product in self.env['product.product'].browse(
+            {line['product_id'] for line in lines}).read(['product_tmpl_id', 'categ_id'], load=False)}
+        lines_by_move = {}
+        for line in lines:
+            product = products[line['product_id']]
+            lines_by_move.setdefault(line['move_id'], []).append(
+                (product['product_tmpl_id'], product['categ_id'], line['price_subtotal']))
+        return lines_by_move
+
+    def acs_get_patientshare_amounts(self, insurance):
+        """Patient share of the policy rules of ``insurance`` for each invoice, by invoice id"""
+        lines_by_move = self._acs_get_insurance_lines()
+        return {move.id: insurance._acs_get_rule_share(lines_by_move.get(move.id, [])) for move in self}
+
+    def acs_get_insurance_shares(self, insurance, insurance_type, insurance_amount, insurance_percentage):
+        """Patient and insurer shares of many invoices at once, by invoice id.
+        See hms.patient.insurance._acs_get_insurance_shares for the values.
+        """
+        lines_by_move = self._acs_get_insurance_lines()
+        return {move.id: insurance._acs_get_insurance_shares(lines_by_move.get(move.id, []),
+            insurance_type, insurance_amount, insurance_percentage) for move in self}
+
     def acs_get_patientshare_amount(self, insurance):
-        amount = 0
-        Rule = self.env['acs.insurance.policy.rule']
-        for line in self.invoice_line_ids.filtered(lambda x: x.product_id):
-            matching_rule = False
-            product_tmpl_id = line.product_id.product_tmpl_id.id
-            product_categ_id = line.product_id.categ_id.id
-            if insurance.policy_rule_ids:
-                rule_ids = insurance.policy_rule_ids.ids
-                matching_rule = Rule.search([('id','in',rule_ids),
-                    ('product_id','=',product_tmpl_id)], limit=1)
-                if not matching_rule:
-                    matching_rule = Rule.search([('id','in',rule_ids),
-                    ('product_category_id','=',product_categ_id)], limit=1)
-
-            if not matching_rule and insurance.insurance_company_id.policy_rule_ids:
-                company_rule_ids = insurance.insurance_company_id.policy_rule_ids.ids
-                matching_rule = Rule.search([('id','in', company_rule_ids),
-                    ('product_id','=',product_tmpl_id)], limit=1)
-                if not matching_rule:
-                    matching_rule = Rule.search([('id','in', company_rule_ids),
-                    ('product_category_id','=',product_categ_id)], limit=1)
-
-            if matching_rule:
-                if matching_rule.rule_type == 'percentage':
-                    amount += (matching_rule.percentage * line.price_subtotal)/100
-                elif matching_rule.rule_type == 'amount':
-                    amount += matching_rule.amount
-        return amount
+        return sum(self.acs_get_patientshare_amounts(insurance).values())
 
 
 class AccountPayment(models.Model):
@@ -204,3 +206,13 @@ class ACSPrescriptionOrder(models.Model):
                 self, 'pharmacy', 'prescription_id', self.insurance_id.pha_create_claim)
             if insurace_invoice and insurace_invoice.claim_id:
                 self.claim_id = insurace_invoice.claim_id.id
+
+
+class ACSPortalCounter(models.AbstractModel):
+    _inherit = 'acs.portal.counter'
+
+    @api.model
+    def _get_portal_counters(self):
+        counters = super()._get_portal_counters()
+        counters['insurance_claim_count'] = ('hms.insurance.claim', [('state','not in',['draft','cancel'])])
+        return counters
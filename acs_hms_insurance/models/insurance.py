@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 
 
 class AcsInsurancePlan(models.Model):
@@ -57,6 +57,66 @@ class AcsInsurancePolicyRules(models.Model):
     amount = fields.Float('Amount')
     description = fields.Text("Description")
 
+    @api.model
+    @tools.ormcache()
+    def _get_rule_index(self):
+        """Patient share rules keyed by ``('policy', id)`` and ``('company', id)``.
+
+        Each entry maps ``'product'`` to ``{template_id: rule}`` and ``'category'``
+        to ``{category_id: rule}``, rule being ``(rule_type, percentage, amount)`` of
+        the first rule in sequence. Cached until a rule changes.
+        """
+        index = {}
+        rules = self.sudo().search_read([], ['insurance_policy_id', 'insurance_company_id', 'product_id',
+            'product_category_id', 'rule_type', 'percentage', 'amount'], order='sequence, id', load=False)
+        for rule in rules:
+            values = (rule['rule_type'], rule['percentage'], rule['amount'])
+            for owner in (('policy', rule['insurance_policy_id']), ('company', rule['insurance_company_id'])):
+                if not owner[1]:
+                    continue
+                entry = index.setdefault(owner, {'product': {}, 'category': {}})
+                if rule['product_id']:
+                    entry['product'].setdefault(rule['product_id'], values)
+                if rule['product_category_id']:
+                    entry['category'].setdefault(rule['product_category_id'], values)
+        return index
+
+    @api.model
+    def _get_matching_rule(self, insurance_id, insurance_company_id, product_tmpl_id, product_categ_id):
+        """Rule values applying to a product: product rule then category rule of the
+        policy, then the same on the insurance company. False when none matches.
+        """
+        index = self._get_rule_index()
+        for owner in (('policy', insurance_id), ('company', insurance_company_id)):
+            entry = index.get(owner)
+            if entry:
+                rule = entry['product'].get(product_tmpl_id) or entry['category'].get(product_categ_id)
+                if rule:
+                    return rule
+        return False
+
+    @api.model
+    def _get_rule_share(self, rule, price_subtotal):
+        rule_type, percentage, amount = rule
+        if rule_type == 'percentage':
+            return (percentage * price_subtotal)/100
+        elif rule_type == 'amount':
+            return amount
+        return 0
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env.registry.clear_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.env.registry.clear_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env.registry.clear_cache()
+        return super().unlink()
+
 
 class InsuranceCompany(models.Model):
     _name = 'hms.insurance.company'
@@ -168,6 +228,68 @@ class Insurance(models.Model):
             self.pha_insurance_limit = plan_id.pha_insurance_limit
             self.pha_create_claim = plan_id.pha_create_claim
 
+    def _acs_get_rule_share(self, lines):
+        """Patient share of the policy rules for ``lines`` given as
+        ``(product_tmpl_id, product_categ_id, price_subtotal)``.
+        """
+        self.ensure_one()
+        Rule = self.env['acs.insurance.policy.rule']
+        amount = 0
+        for product_tmpl_id, product_categ_id, price_subtotal in lines:
+            rule = Rule._get_matching_rule(self.id, self.insurance_company_id.id, product_tmpl_id, product_categ_id)
+            if rule:
+                amount += Rule._get_rule_share(rule, price_subtotal)
+        return amount
+
+    def _acs_get_insurance_shares(self, lines, insurance_type, insurance_amount, insurance_percentage):
+        """Split the untaxed total of ``lines`` between the patient and the insurer the way
+        the insurance invoice split does: a co-payment (plus the rule share when it is shown
+        in the invoice) for fix-amount insurances, the insured percentage otherwise.
+        """
+        self.ensure_one()
+        total = sum(line[2] for line in lines)
+        rule_share = self._acs_get_rule_share(lines) if self.patient_share_in_invoice else 0
+        if insurance_type == 'fix':
+            patient_share = min(max(insurance_amount + rule_share, 0), total)
+            insurance_share = total - patient_share
+        else:
+            insurance_share = (total * insurance_percentage)/100
+            patient_share = total - insurance_share
+        return {
+            'total': total,
+            'rule_share': rule_share,
+            'patient_share': patient_share,
+            'insurance_share': insurance_share,
+        }
+
+    def acs_preview_insurance_share(self, product_data, insurance_for='app'):
+        """Patient and insurer share of products before any invoice exists, for the front desk.
+
+        ``product_data`` is a list of dicts with ``product_id`` (id), and optionally
+        ``quantity``, ``price_unit`` and ``discount``; missing prices come from the policy
+        pricelist. ``insurance_for`` is the prefix of the coverage fields to use
+        (``app``, ``pha``, ...). Amounts are untaxed.
+        """
+        self.ensure_one()
+        Product = self.env['product.product']
+        product_data = [dict(data, product_id=Product.browse(data['product_id'])) for data in product_data]
+        vals_list = self.env['acs.hms.mixin'].with_context(acs_pricelist_id=self.pricelist_id.id)._acs_prepare_invoice_line_vals(
+            product_data, self.patient_id.partner_id, 'out_invoice', False)
+        lines = []
+        for data, vals in zip(product_data, vals_list):
+            product = data['product_id']
+            price_subtotal = vals['price_unit'] * vals['quantity'] * (1 - (vals['discount'] or 0.0)/100)
+            lines.append((product.product_tmpl_id.id, product.categ_id.id, price_subtotal))
+
+        shares = self._acs_get_insurance_shares(lines, self[insurance_for + '_insurance_type'],
+            self[insurance_for + '_insurance_amount'], self[insurance_for + '_insurance_percentage'])
+        limit = self[insurance_for + '_insurance_limit']
+        shares.update({
+            'insurance_limit': limit,
+            'covered': not limit or limit >= shares['total'],
+        })
+        return shares
+
     @api.model
     def archive_expired_policy(self):
         records = self.search([('validity','<', fields.Date.today())])
@@ -5,7 +5,7 @@ from odoo.exceptions import UserError
 
 class InsuranceClaim(models.Model):
     _name = 'hms.insurance.claim'
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'acs.portal.counter.mixin']
     _description = 'Claim'
 
     @api.depends('amount_requested', 'amount_pass')
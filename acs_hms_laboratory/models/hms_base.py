@@ -11,10 +11,9 @@ class ACSAppointment(models.Model):
             rec.request_count = len(rec.lab_request_ids)
             rec.test_count = len(rec.test_ids)
 
-    def _acs_get_attachemnts(self):
-        attachments = super(ACSAppointment, self)._acs_get_attachemnts()
-        attachments += self.test_ids.mapped('attachment_ids')
-        return attachments
+    def _acs_attachment_owners(self):
+        owners = super(ACSAppointment, self)._acs_attachment_owners()
+        return self._acs_add_attachment_owners(owners, 'test_ids')
 
     test_ids = fields.One2many('patient.laboratory.test', 'appointment_id', string='Lab Tests')
     lab_request_ids = fields.One2many('acs.laboratory.request', 'appointment_id', string='Lab Requests')
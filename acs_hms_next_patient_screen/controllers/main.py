@@ -11,14 +11,21 @@ class AcsNextPatientScreen(http.Controller):
     def acs_waiting_screen(self, screen=False, **kw):
         screen = request.env['acs.hms.waiting.screen'].sudo().search([('id','=',screen)])
         ResModel = request.env[screen.res_model_id.model]
-        domain = [('company_id','=',screen.company_id.id)]
-        if screen and screen.physician_ids and screen.acs_physician_field_id:
-            domain += [(screen.acs_physician_field_id.name,'in',screen.physician_ids.ids)]
-        
-        if screen.acs_states_to_include and screen.acs_state_field_id:
-            domain += [(screen.acs_state_field_id.name, 'in', eval(screen.acs_states_to_include))]
-        limit = screen.acs_number_of_records or 5
-        records = ResModel.sudo().search(domain, order="id asc", limit=limit)
-        return request.render("acs_hms_next_patient_screen.next_patient_view",{'acs_ws': screen, 'records': records, 'ResModel': ResModel})
+        records = screen._get_queue_records()
+        return request.render("acs_hms_next_patient_screen.next_patient_view",{
+            'acs_ws': screen,
+            'records': records,
+            'ResModel': ResModel,
+            'revision': screen.acs_get_queue_revision(),
+        })
+
+    #ACS: Polled by the screens between pushes, the page is only reloaded when it changes.
+    @http.route(['/acs/waitingscreen/<int:screen>/revision'], type='json', auth="user")
+    def acs_waiting_screen_revision(self, screen=False, **kw):
+        screen = request.env['acs.hms.waiting.screen'].sudo().browse(screen).exists()
+        return {
+            'revision': screen.acs_get_queue_revision() if screen else False,
+            'channel': screen._get_bus_channel() if screen else False,
+        }
 
 # vim:expandtab:smartindent:tabstop=4:softtabstop=4:shiftwidth=4:
\ No newline at end of file
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
+from odoo.tools.safe_eval import safe_eval
+import hashlib
 
 
 class AcsHmsWaitingScreen(models.Model):
@@ -63,6 +65,78 @@ class AcsHmsWaitingScreen(models.Model):
             if self.res_model_id.model in ['acs.laboratory.request','acs.patient.laboratory.sample']:
                 self.acs_states_to_include = "['draft']"
 
+    @tools.ormcache('self.id')
+    def _get_queue_domain(self):
+        """Domain of the records shown on the screen, compiled once until the screen changes"""
+        domain = [('company_id','=',self.company_id.id)]
+        if self.physician_ids and self.acs_physician_field_id:
+            domain += [(self.acs_physician_field_id.name,'in',self.physician_ids.ids)]
+        if self.acs_states_to_include and self.acs_state_field_id:
+            domain += [(self.acs_state_field_id.name, 'in', safe_eval(self.acs_states_to_include))]
+        return tuple(domain)
+
+    def _get_queue_fields(self):
+        return [field.name for field in (self.acs_physician_field_id, self.acs_patient_field_id,
+                                         self.acs_cabin_field_id, self.acs_state_field_id) if field]
+
+    def _get_queue_records(self):
+        ResModel = self.env[self.res_model_id.model].sudo()
+        return ResModel.search(list(self._get_queue_domain()), order="id asc", limit=self.acs_number_of_records or 5)
+
+    def acs_get_queue_revision(self):
+        """Fingerprint of what the screen shows, changes whenever the queue does"""
+        self.ensure_one()
+        ResModel = self.env[self.res_model_id.model].sudo()
+        rows = ResModel.search_read(list(self._get_queue_domain()), ['name'] + self._get_queue_fields(),
+            order="id asc", limit=self.acs_number_of_records or 5, load=False)
+        return hashlib.sha1(repr(rows).encode()).hexdigest()
+
+    def _get_bus_channel(self):
+        return 'acs_waiting_screen_%s' % self.id
+
+    @api.model
+    @tools.ormcache('model_name')
+    def _get_screen_ids_by_model(self, model_name):
+        return tuple(self.sudo().search([('res_model_id.model', '=', model_name)]).ids)
+
+    @api.model
+    def _acs_queue_changed(self, records, vals=None):
+        """Queue the screens showing ``records`` for a push once the transaction is done.
+        With ``vals``, only changes of the fields shown on the screens count.
+        """
+        screens = self.sudo().browse(self._get_screen_ids_by_model(records._name))
+        if vals is not None:
+            screens = screens.filtered(lambda screen: not set(
+                ['name', 'company_id'] + screen._get_queue_fields()).isdisjoint(vals))
+        if not screens:
+            return
+        screen_ids = self.env.cr.precommit.data.setdefault('acs_waiting_screen.ids', set())
+        if not screen_ids:
+            self.env.cr.precommit.add(self._acs_push_queues)
+        screen_ids.update(screens.ids)
+
+    @api.model
+    def _acs_push_queues(self):
+        screen_ids = self.env.cr.precommit.data.pop('acs_waiting_screen.ids', set())
+        for screen in self.sudo().browse(screen_ids).exists():
+            self.env['bus.bus']._sendone(screen._get_bus_channel(), 'acs_waiting_screen/updated', {
+                'screen_id': screen.id,
+                'revision': screen.acs_get_queue_revision(),
+            })
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env.registry.clear_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.env.registry.clear_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env.registry.clear_cache()
+        return super().unlink()
+
     def acs_open_website_url(self):
         self.ensure_one()
         return {
@@ -71,4 +145,29 @@ class AcsHmsWaitingScreen(models.Model):
             'target': 'new',
         }
 
+
+class AcsWaitingScreenMixin(models.AbstractModel):
+    _name = 'acs.waiting.screen.mixin'
+    _description = "Waiting Screen Mixin"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['acs.hms.waiting.screen']._acs_queue_changed(records)
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env['acs.hms.waiting.screen']._acs_queue_changed(self, vals)
+        return res
+
+    def unlink(self):
+        self.env['acs.hms.waiting.screen']._acs_queue_changed(self)
+        return super().unlink()
+
+
+class HmsAppointment(models.Model):
+    _name = 'hms.appointment'
+    _inherit = ['hms.appointment', 'acs.waiting.screen.mixin']
+
 # vim:expandtab:smartindent:tabstop=4:softtabstop=4:shiftwidth=4:
\ No newline at end of file
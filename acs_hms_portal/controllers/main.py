@@ -18,18 +18,8 @@ class HMSPortal(CustomerPortal):
 
     def _prepare_home_portal_values(self, counters):
         values = super()._prepare_home_portal_values(counters)
-        Appointment = request.env['hms.appointment']
-        Prescription = request.env['prescription.order']
-        Evaluation = request.env['acs.patient.evaluation']
-        if 'appointment_count' in counters:
-            values['appointment_count'] = Appointment.search_count([]) \
-                if Appointment.check_access_rights('read', raise_exception=False) else 0
-        if 'prescription_count' in counters:
-            values['prescription_count'] = Prescription.search_count([]) \
-                if Prescription.check_access_rights('read', raise_exception=False) else 0
-        if 'evaluation_count' in counters:
-            values['evaluation_count'] = Evaluation.search_count([]) \
-                if Evaluation.check_access_rights('read', raise_exception=False) else 0
+        values.update(request.env['acs.portal.counter'].acs_get_portal_counters(
+            set(counters) & {'appointment_count', 'prescription_count', 'evaluation_count'}))
         return values
 
     @http.route(['/my/appointments', '/my/appointments/page/<int:page>'], type='http', auth="user", website=True, sitemap=False)
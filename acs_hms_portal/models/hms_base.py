@@ -4,7 +4,7 @@ from odoo import api, fields, models
 
 class HmsAppointment(models.Model):
     _name = "hms.appointment"
-    _inherit = ['portal.mixin', 'hms.appointment']
+    _inherit = ['portal.mixin', 'hms.appointment', 'acs.portal.counter.mixin']
 
     def _compute_access_url(self):
         super(HmsAppointment, self)._compute_access_url()
@@ -22,7 +22,7 @@ class HmsAppointment(models.Model):
 
 class PrescriptionOrder(models.Model):
     _name = "prescription.order"
-    _inherit = ['portal.mixin', 'prescription.order']
+    _inherit = ['portal.mixin', 'prescription.order', 'acs.portal.counter.mixin']
 
     def _compute_access_url(self):
         super(PrescriptionOrder, self)._compute_access_url()
@@ -40,7 +40,7 @@ class PrescriptionOrder(models.Model):
 
 class AcsPatientEvaluation(models.Model):
     _name = "acs.patient.evaluation"
-    _inherit = ['portal.mixin', 'acs.patient.evaluation']
+    _inherit = ['portal.mixin', 'acs.patient.evaluation', 'acs.portal.counter.mixin']
 
     def _compute_access_url(self):
         super(AcsPatientEvaluation, self)._compute_access_url()
@@ -54,3 +54,25 @@ class AcsPatientEvaluation(models.Model):
             'target': 'self',
             'url': self.get_portal_url(),
         }
+
+
+
+class ACSPortalCounterMixin(models.AbstractModel):
+    _inherit = 'acs.portal.counter.mixin'
+
+    def _acs_portal_partners(self):
+        return super()._acs_portal_partners() | self.sudo().patient_id.acs_family_partner_ids
+
+
+class ACSPortalCounter(models.AbstractModel):
+    _inherit = 'acs.portal.counter'
+
+    @api.model
+    def _get_portal_counters(self):
+        counters = super()._get_portal_counters()
+        counters.update({
+            'appointment_count': ('hms.appointment', []),
+            'prescription_count': ('prescription.order', []),
+            'evaluation_count': ('acs.patient.evaluation', []),
+        })
+        return counters
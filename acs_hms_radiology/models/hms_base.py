@@ -11,10 +11,9 @@ class ACSAppointment(models.Model):
             rec.radiology_request_count = len(rec.radiology_request_ids)
             rec.radiology_test_count = len(rec.radiology_test_ids)
 
-    def _acs_get_attachemnts(self):
-        attachments = super(ACSAppointment, self)._acs_get_attachemnts()
-        attachments += self.radiology_test_ids.mapped('attachment_ids')
-        return attachments
+    def _acs_attachment_owners(self):
+        owners = super(ACSAppointment, self)._acs_attachment_owners()
+        return self._acs_add_attachment_owners(owners, 'radiology_test_ids')
 
     radiology_test_ids = fields.One2many('patient.radiology.test', 'appointment_id', string='Radiology Tests')
     radiology_request_ids = fields.One2many('acs.radiology.request', 'appointment_id', string='Radiology Requests')
@@ -4,6 +4,21 @@ from odoo import fields, models, _
 from odoo.exceptions import AccessError
 
 
+class ACSHmsKpiDaily(models.Model):
+    _inherit = 'acs.hms.kpi.daily'
+
+    def _get_kpi_sources(self):
+        sources = super()._get_kpi_sources()
+        sources['surgery'] = {
+            'model': 'hms.surgery',
+            'date_field': 'start_date',
+            'domain': [('state', 'not in', ['cancel'])],
+            'physician_field': 'primary_physician_id',
+            'department_field': 'department_id',
+        }
+        return sources
+
+
 class Digest(models.Model):
     _inherit = 'digest.digest'
 
@@ -15,7 +30,7 @@ class Digest(models.Model):
             raise AccessError(_("Do not have access, skip this data for user's digest email"))
         for record in self:
             start, end, company = record._get_kpi_compute_parameters()
-            surgery = self.env['hms.surgery'].search_count([('company_id', '=', company.id), ('start_date', '>=', start), ('start_date', '<', end), ('state', 'not in', ['cancel'])])
+            surgery = self.env['acs.hms.kpi.daily']._get_kpi_count('surgery', start, end, [company.id])
             record.kpi_acs_surgery_total_value = surgery
 
     def _compute_kpis_actions(self, company, user):
@@ -37,7 +37,8 @@ class ACSSurgeryTemplate(models.Model):
 class ACSSurgery(models.Model):
     _name = "hms.surgery"
     _description = "Surgery"
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'acs.hms.kpi.mixin']
+    _kpi_rollup_key = 'surgery'
     _order = "id desc"
 
     @api.model
@@ -2,6 +2,7 @@
 
 from odoo import http, fields, _
 from odoo.http import request
+from werkzeug.exceptions import TooManyRequests
 from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT
 from odoo.exceptions import AccessError, MissingError
 from odoo.addons.portal.controllers.portal import CustomerPortal, pager as portal_pager, get_records_pager
@@ -12,10 +13,11 @@ class ACSHms(http.Controller):
 
     @http.route(['/validate/patientlaboratorytest/<labresult_unique_code>'], type='http', auth="public", website=True, sitemap=False)
     def labresult_details(self, labresult_unique_code, **post):
-        if labresult_unique_code:
-            labresult = request.env['patient.laboratory.test'].sudo().search([('unique_code','=',labresult_unique_code)], limit=1)
-            if labresult:
-                return request.render("acs_laboratory.acs_labresult_details", {'labresult': labresult})
+        labresult = request.env['patient.laboratory.test'].acs_validate_unique_code(labresult_unique_code, request.httprequest.remote_addr)
+        if labresult is None:
+            raise TooManyRequests()
+        if labresult:
+            return request.render("acs_laboratory.acs_labresult_details", {'labresult': labresult})
         return request.render("acs_hms.acs_no_details")
 
 
@@ -23,15 +25,8 @@ class HMSPortal(CustomerPortal):
 
     def _prepare_home_portal_values(self, counters):
         values = super()._prepare_home_portal_values(counters)
-        LaboratoryTest = request.env['patient.laboratory.test']
-        if 'lab_result_count' in counters:
-            values['lab_result_count'] = LaboratoryTest.search_count([]) \
-                if LaboratoryTest.check_access_rights('read', raise_exception=False) else 0
-
-        LabRequest = request.env['acs.laboratory.request']
-        if 'lab_request_count' in counters:
-            values['lab_request_count'] = LabRequest.search_count([]) \
-                if LabRequest.check_access_rights('read', raise_exception=False) else 0
+        values.update(request.env['acs.portal.counter'].acs_get_portal_counters(
+            set(counters) & {'lab_result_count', 'lab_request_count'}))
         return values
 
     #Lab Result
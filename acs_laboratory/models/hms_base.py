@@ -32,10 +32,9 @@ class ACSPatient(models.Model):
             rec.request_count = len(rec.request_ids)
             rec.test_count = len(rec.test_ids)
 
-    def _acs_get_attachemnts(self):
-        attachments = super(ACSPatient, self)._acs_get_attachemnts()
-        attachments += self.test_ids.mapped('attachment_ids')
-        return attachments
+    def _acs_attachment_owners(self):
+        owners = super(ACSPatient, self)._acs_attachment_owners()
+        return self._acs_add_attachment_owners(owners, 'test_ids')
 
     request_ids = fields.One2many('acs.laboratory.request', 'patient_id', string='Lab Requests')
     test_ids = fields.One2many('patient.laboratory.test', 'patient_id', string='Tests')
@@ -111,4 +110,17 @@ class IrAttachment(models.Model):
             self.sudo().write({'access_token': str(uuid.uuid4())})
         return self.access_token
 
+
+class ACSPortalCounter(models.AbstractModel):
+    _inherit = 'acs.portal.counter'
+
+    @api.model
+    def _get_portal_counters(self):
+        counters = super()._get_portal_counters()
+        counters.update({
+            'lab_result_count': ('patient.laboratory.test', []),
+            'lab_request_count': ('acs.laboratory.request', []),
+        })
+        return counters
+
 # vim:expandtab:smartindent:tabstop=4:softtabstop=4:shiftwidth=4:
\ No newline at end of file
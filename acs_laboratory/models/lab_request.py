@@ -65,7 +65,7 @@ class PatientLabTestLine(models.Model):
 class LaboratoryRequest(models.Model):
     _name = 'acs.laboratory.request'
     _description = 'Laboratory Request'
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'portal.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'portal.mixin', 'acs.portal.counter.mixin']
     _order = 'date desc, id desc'
 
     @api.depends('line_ids','line_ids.amount_total')
@@ -204,15 +204,32 @@ class LaboratoryRequest(models.Model):
     def create_sample(self):
         Sample = self.env['acs.patient.laboratory.sample']
         patients = self.mapped('patient_id') + self.mapped('group_patient_ids')
+        #ACS: Existing and new samples by (request, sample type), to share them without a search per line.
+        # A test not using other test samples gets its own samples and is no longer also added to
+        # the existing samples of its type, which the former for/else did after every creation.
+        # A test using other test samples is added to the existing or pending samples of its type,
+        # where the former code left it without any sample.
+        existing = {}
+        for sample in self.sample_ids:
+            key = (sample.request_id.id, sample.sample_type_id.id)
+            existing[key] = existing.get(key, Sample) | sample
+        shared_test_ids = {}
+        new_samples = {}
         for line in self.line_ids:
             if line.test_id.sample_type_id:
-                sample_exist = Sample.search([('request_id','=',line.request_id.id),('sample_type_id','=',line.test_id.sample_type_id.id)])
-                if (not sample_exist) or (line.test_id.acs_use_other_test_sample!=True):
+                key = (line.request_id.id, line.test_id.sample_type_id.id)
+                if (key not in existing and key not in new_samples) or (line.test_id.acs_use_other_test_sample!=True):
                     for patient in patients:
                         lab_sample_data = self.prepare_sample_data(line, patient)
-                        Sample.create(lab_sample_data)
-                    else:
-                        sample_exist.test_ids = [(4,line.test_id.id)]
+                        new_samples.setdefault(key, []).append(lab_sample_data)
+                else:
+                    for lab_sample_data in new_samples.get(key, []):
+                        lab_sample_data['test_ids'].append((4,line.test_id.id))
+                    if key in existing:
+                        shared_test_ids.setdefault(key, []).append(line.test_id.id)
+        for key, test_ids in shared_test_ids.items():
+            existing[key].test_ids = [(4,test_id) for test_id in test_ids]
+        Sample.create([vals for vals_list in new_samples.values() for vals in vals_list])
 
     def button_accept(self):
         company_id = self.sudo().company_id
@@ -225,12 +242,8 @@ class LaboratoryRequest(models.Model):
             self.create_sample()
         self.state = 'accepted'
 
+    #ACS: Samples and parent test are set by _acs_create_test_results for the whole request.
     def prepare_test_result_data(self, line, patient):
-        parent_test_id = False
-        if line.parent_line_id and line.parent_line_id.patient_lab_ids:
-            parent_test_ids = line.parent_line_id.patient_lab_ids.filtered(lambda lt: lt.patient_id==patient)
-            if parent_test_ids:
-                parent_test_id = parent_test_ids[0].id
         res = {
             'patient_id': patient.id,
             'physician_id': self.physician_id and self.physician_id.id,
@@ -238,29 +251,61 @@ class LaboratoryRequest(models.Model):
             'user_id': self.env.user.id,
             'date_analysis': self.date,
             'request_id': self.id,
-            'sample_ids': self.sample_ids.filtered(lambda ls: ls.patient_id==patient and ls.test_ids == line.test_id),
-            'parent_test_id': parent_test_id,
         }
         return res
 
-    def button_in_progress(self):
-        self.state = 'in_progress'
-        Critearea = self.env['lab.test.critearea']
+    def _acs_get_result_samples(self):
+        """Ids of the samples taken for a single test, by ``(patient_id, test_id)``"""
+        samples = {}
+        for sample in self.sample_ids:
+            if len(sample.test_ids) == 1:
+                samples.setdefault((sample.patient_id.id, sample.test_ids.id), []).append(sample.id)
+        return samples
+
+    def _acs_create_test_results(self):
+        """Create the results of every line and patient of the request, with their
+        criteria and consumables. Subsequent test lines are created in a second
+        batch to link them to the result of their parent line.
+        """
+        self.ensure_one()
         LabTest = self.env['patient.laboratory.test']
-        Consumable = self.env['hms.consumable.line']
-        gender = self.patient_id.gender
+        patients = self.patient_id + self.group_patient_ids
+        samples = self._acs_get_result_samples()
+        today = fields.Date.today()
 
-        patients = self.mapped('patient_id') + self.mapped('group_patient_ids')
+        parent_results = {}
         for line in self.line_ids:
-            for patient in patients:
-                lab_test_data = self.prepare_test_result_data(line, patient)
-                test_result = LabTest.create(lab_test_data)
-                line.patient_lab_ids = [(4, test_result.id)]
+            for result in line.patient_lab_ids:
+                parent_results.setdefault((line.id, result.patient_id.id), result.id)
+
+        pending = self.line_ids
+        while pending:
+            lines = pending.filtered(lambda l: l.parent_line_id not in pending) or pending
+            pending -= lines
+            keys = []
+            vals_list = []
+            for line in lines:
+                for patient in patients:
+                    lab_test_data = self.prepare_test_result_data(line, patient)
+                    lab_test_data.update({
+                        'sample_ids': [(6, 0, samples.get((patient.id, line.test_id.id), []))],
+                        'parent_test_id': parent_results.get((line.parent_line_id.id, patient.id), False),
+                    })
+                    keys.append((line, patient))
+                    vals_list.append(lab_test_data)
+            test_results = LabTest.create(vals_list)
+
+            critearea_vals = []
+            consumable_vals = []
+            results_by_line = {}
+            for (line, patient), test_result in zip(keys, test_results):
+                parent_results[(line.id, patient.id)] = test_result.id
+                results_by_line.setdefault(line, []).append(test_result.id)
                 for res_line in line.test_id.critearea_ids:
-                    Critearea.create({
+                    critearea_vals.append({
                         'patient_lab_id': test_result.id,
                         'name': res_line.name,
-                        'normal_range': res_line.normal_range_female if gender=='female' else res_line.normal_range_male,
+                        'normal_range': res_line.normal_range_female if patient.gender=='female' else res_line.normal_range_male,
                         'lab_uom_id': res_line.lab_uom_id and res_line.lab_uom_id.id or False,
                         'sequence': res_line.sequence,
                         'remark': res_line.remark,
@@ -268,14 +313,23 @@ class LaboratoryRequest(models.Model):
                     })
 
                 for con_line in line.test_id.consumable_line_ids:
-                    Consumable.create({
+                    consumable_vals.append({
                         'patient_lab_test_id': test_result.id,
                         'name': con_line.name,
                         'product_id': con_line.product_id and con_line.product_id.id or False,
                         'product_uom_id': con_line.product_uom_id and con_line.product_uom_id.id or False,
                         'qty': con_line.qty,
-                        'date': fields.Date.today(),
+                        'date': today,
                     })
+            self.env['lab.test.critearea'].create(critearea_vals)
+            self.env['hms.consumable.line'].create(consumable_vals)
+            for line, result_ids in results_by_line.items():
+                line.patient_lab_ids = [(4, result_id) for result_id in result_ids]
+
+    def button_in_progress(self):
+        self.state = 'in_progress'
+        for rec in self:
+            rec._acs_create_test_results()
 
     def button_done(self):
         if not self.invoice_id:
@@ -2,12 +2,13 @@
 
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
-import uuid
 
 
 class PatientLabTest(models.Model):
     _name = "patient.laboratory.test"
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'portal.mixin', 'acs.document.mixin', 'acs.qrcode.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'portal.mixin', 'acs.document.mixin', 'acs.qrcode.mixin', 'acs.hms.kpi.mixin', 'acs.portal.counter.mixin']
+    _kpi_rollup_key = 'lab_test'
+    _portal_counter_fields = ('patient_id', 'request_id', 'state', 'company_id')
     _description = "Patient Laboratory Test"
     _order = 'date_analysis desc, id desc'
 
@@ -58,6 +59,9 @@ class PatientLabTest(models.Model):
             return self.env.ref('acs_laboratory.mt_lab_test_done')
         return super(PatientLabTest, self)._track_subtype(init_values)
 
+    def _acs_portal_partners(self):
+        return super()._acs_portal_partners() | self.sudo().request_id.patient_id.partner_id
+
     def _compute_display_name(self):
         for rec in self:
             name = rec.name or '-'
@@ -68,18 +72,18 @@ class PatientLabTest(models.Model):
     def _subscribe_physician(self):
         done_subtype = self.env.ref('acs_laboratory.mt_lab_test_done').id
         comment_subtype = self.env.ref('mail.mt_comment').id
-        for rec in self:
-            if rec.physician_id.partner_id and rec.physician_id.partner_id.id not in rec.message_partner_ids.ids:
-                rec.message_subscribe(partner_ids=[rec.physician_id.partner_id.id], subtype_ids=[done_subtype,comment_subtype])
+        #ACS: One subscription per physician for all the tests.
+        for partner, records in self.grouped(lambda rec: rec.physician_id.partner_id).items():
+            records = records.filtered(lambda rec: partner not in rec.message_partner_ids)
+            if partner and records:
+                records.message_subscribe(partner_ids=partner.ids, subtype_ids=[done_subtype,comment_subtype])
 
     @api.model_create_multi
     def create(self, vals_list):
         for vals in vals_list:
             vals['name'] = self.env['ir.sequence'].next_by_code('patient.laboratory.test')
         res = super().create(vals_list)
-        for record in res:
-            record.unique_code = uuid.uuid4()
-            record._subscribe_physician()
+        res._subscribe_physician()
         return res
 
     def write(self, values):
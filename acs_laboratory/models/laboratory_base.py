@@ -2,6 +2,43 @@
 
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
+from functools import lru_cache
+import re
+
+# "low-high", "value", "<high" or ">low", optionally followed by a unit.
+NORMAL_RANGE_RE = re.compile(r'^\s*(<=|>=|<|>)?\s*(-?\d+(?:\.\d+)?)\s*(?:-\s*(-?\d+(?:\.\d+)?))?\s*[^\d]*$')
+
+
+@lru_cache(maxsize=1024)
+def parse_normal_range(normal_range):
+    """``(low, high)`` bounds of a normal range string, None when open or not numeric"""
+    match = NORMAL_RANGE_RE.match(normal_range or '')
+    if not match:
+        return None, None
+    operator, first, second = match.groups()
+    first = float(first)
+    if second is not None:
+        return (None, None) if operator else (first, float(second))
+    if operator in ('<', '<='):
+        return None, first
+    if operator in ('>', '>='):
+        return first, None
+    return first, first
+
+
+def classify_result(result, low, high):
+    """'low', 'normal' or 'high' for a numeric result string, False when it can not be evaluated"""
+    if low is None and high is None:
+        return False
+    try:
+        value = float((result or '').strip())
+    except ValueError:
+        return False
+    if low is not None and value < low:
+        return 'low'
+    if high is not None and value > high:
+        return 'high'
+    return 'normal'
 
 
 class ACSLabTestUom(models.Model):
@@ -97,47 +134,63 @@ class LabTestCritearea(models.Model):
         string='Company', default=lambda self: self.env.company)
     display_type = fields.Selection([
         ('line_section', "Section")], help="Technical field for UX purpose.")
+    range_low = fields.Float('Normal Range Low', compute='_compute_range', store=True,
+        help="Lower bound parsed from the normal range, only meaningful when 'Has Low Bound' is set.")
+    range_high = fields.Float('Normal Range High', compute='_compute_range', store=True,
+        help="Upper bound parsed from the normal range, only meaningful when 'Has High Bound' is set.")
+    range_has_low = fields.Boolean('Has Low Bound', compute='_compute_range', store=True,
+        help="The normal range has a lower bound, unset when open or not numeric.")
+    range_has_high = fields.Boolean('Has High Bound', compute='_compute_range', store=True,
+        help="The normal range has an upper bound, unset when open or not numeric.")
     result_type = fields.Selection([
         ('low', "Low"),
         ('normal', "Normal"),
         ('high', "High"),
         ('positive', "Positive"),
-        ('negative', "Negative")], default='normal', string="Result Type", help="Technical field for UI purpose.")
+        ('negative', "Negative")], default='normal', string="Result Type", help="Technical field for UI purpose.",
+        compute='_compute_result_type', store=True, readonly=False)
     result_value_type = fields.Selection([
         ('quantitative','Quantitative'),
         ('qualitative','Qualitative'),
     ], string='Result Value Type', default='quantitative')
 
+    @api.depends('normal_range')
+    def _compute_range(self):
+        for rec in self:
+            low, high = parse_normal_range(rec.normal_range)
+            rec.range_has_low = low is not None
+            rec.range_has_high = high is not None
+            rec.range_low = low or 0.0
+            rec.range_high = high or 0.0
+
+    #ACS: Computed in batch on every create/write, so results entered through imports or the API are flagged too.
+    @api.depends('result', 'normal_range', 'result_value_type')
+    def _compute_result_type(self):
+        for rec in self:
+            if rec.result_value_type=='quantitative':
+                rec.result_type = rec.result and classify_result(rec.result, *parse_normal_range(rec.normal_range)) or 'normal'
+            else:
+                #ACS: Qualitative results (positive/negative) are set by the user.
+                rec.result_type = rec.result_type or 'normal'
+
     @api.onchange('normal_range_male')
     def onchange_normal_range_male(self):
         if self.normal_range_male and not self.normal_range_female:
             self.normal_range_female = self.normal_range_male
 
-    @api.onchange('result')
-    def onchange_result(self):
-        if self.result and self.result_value_type=='quantitative' and self.normal_range:
-            try:
-                split_value = self.normal_range.split('-')
-                low_range = high_range = 0
-                result = float(self.result)
-                if len(split_value)==2:
-                    low_range = float(split_value[0])
-                    high_range = float(split_value[1])
-                elif len(split_value)==2:
-                    low_range = float(split_value[0])
-                    high_range = float(split_value[0])
-
-                if low_range or high_range:
-                    if result < low_range:
-                        self.result_type = 'low'
-                    elif result > high_range:
-                        self.result_type = 'high'
-                    elif result > low_range and result < high_range:
-                        self.result_type = 'normal'
-                    elif result==low_range or result==high_range:
-                        self.result_type = 'warning'
-            except:
-                pass
+    @api.model
+    def acs_import_results(self, results):
+        """Set the results pushed by an analyzer, ``{criterion_id: result}``.
+
+        All the result types are computed together when the values are flushed.
+        Returns the result type of each updated criterion.
+        """
+        results = {int(criterion_id): value for criterion_id, value in results.items()}
+        criteria = self.browse(list(results)).exists()
+        for criterion in criteria:
+            criterion.result = results[criterion.id]
+        criteria.flush_recordset(['result', 'result_type'])
+        return {criterion.id: criterion.result_type for criterion in criteria}
 
 
 class PatientLabSample(models.Model):
@@ -3,5 +3,6 @@
 from . import model
 from . import wizard
 from . import report
+from . import controllers
 
 # vim:expandtab:smartindent:tabstop=4:softtabstop=4:shiftwidth=4:
\ No newline at end of file
@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+
+from . import main
+
+# vim:expandtab:smartindent:tabstop=4:softtabstop=4:shiftwidth=4:
\ No newline at end of file
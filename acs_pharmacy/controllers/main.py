@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+import tempfile
+from werkzeug.wsgi import wrap_file
+
+from odoo import http, _
+from odoo.http import request, content_disposition
+
+
+class ACSPharmacy(http.Controller):
+
+    @http.route(['/acs/medicine_expiry/export/<int:wizard_id>'], type='http', auth="user")
+    def medicine_expiry_export(self, wizard_id, **kw):
+        wizard = request.env['acs.medicine.expiry'].browse(wizard_id).exists()
+        if not wizard:
+            return request.not_found()
+        # Rows are written to a temporary file, never held in memory as a whole.
+        fileobj = tempfile.TemporaryFile()
+        wizard.export_medicine_data(fileobj)
+        size = fileobj.tell()
+        fileobj.seek(0)
+        if wizard.export_format == 'csv':
+            mimetype = 'text/csv;charset=utf-8'
+        else:
+            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        filename = '%s.%s' % (_('Medicine Expiry'), wizard.export_format)
+        return request.make_response(wrap_file(request.httprequest.environ, fileobj), headers=[
+            ('Content-Type', mimetype),
+            ('Content-Length', size),
+            ('Content-Disposition', content_disposition(filename)),
+        ])
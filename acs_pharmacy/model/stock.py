@@ -5,6 +5,9 @@ from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT
 from odoo.exceptions import UserError, ValidationError
 from datetime import date, datetime, timedelta
 
+EXPIRY_STATE_LAST_RUN_PARAM = 'acs_pharmacy.lot_expiry_state_last_run'
+EXPIRY_DATE_FIELDS = ('removal_date', 'alert_date', 'expiration_date', 'use_date')
+
 
 class StockProductionLot(models.Model):
     _inherit = 'stock.lot'
@@ -37,8 +40,16 @@ class StockProductionLot(models.Model):
                    ('normal', 'Normal'),
                    ('to_remove', 'To remove'),
                    ('best_before', 'After the best before')],
-        string='Expiry state')
+        string='Expiry state', store=True, index=True,
+        help="Stored to be searched and grouped, the dates crossed are applied by an hourly cron: "
+             "a lot may show its previous state for up to one hour after one of its dates.")
+    removal_date = fields.Datetime(index=True)
+    alert_date = fields.Datetime(index=True)
+    expiration_date = fields.Datetime(index=True)
+    use_date = fields.Datetime(index=True)
     locked = fields.Boolean(string='Blocked', default='_get_locked_value', readonly=True)
+    expiry_unlocked = fields.Boolean(string='Unblocked after Use Date', copy=False, readonly=True,
+        help="Unblocked by hand after its use date: the expiry cron leaves it unblocked until its use date changes.")
 
     def _get_product_locked(self, product):
         """Should create locked? (including categories and parents)
@@ -57,16 +68,15 @@ class StockProductionLot(models.Model):
     def onchange_product_id(self):
         self.locked = self._get_product_locked(self.product_id)
 
+    #ACS: Quants follow through their stored related locked field.
     def button_lock(self):
-        stock_quant_obj = self.env['stock.quant']
-        for lot in self:
-            for quant in stock_quant_obj.search([('lot_id', '=', lot.id)]):
-                quant.sudo().locked = True
-            lot.locked = True
+        self.write({'locked': True, 'expiry_unlocked': False})
 
     def button_unlock(self):
-        for lot in self:
-            lot.locked = False
+        now = fields.Datetime.now()
+        expired = self.filtered(lambda lot: lot.use_date and lot.use_date <= now)
+        (self - expired).write({'locked': False})
+        expired.write({'locked': False, 'expiry_unlocked': True})
 
     @api.model_create_multi
     def create(self, vals_list):
@@ -80,13 +90,49 @@ class StockProductionLot(models.Model):
             product = self.env['product.product'].browse(
                 values.get('product_id'))
             values['locked'] = self._get_product_locked(product)
+        if 'use_date' in values and 'expiry_unlocked' not in values:
+            values['expiry_unlocked'] = False
         return super(StockProductionLot, self).write(values)
 
+    @api.model
+    def _get_expiry_crossed_domain(self, date_field, last_run, now):
+        domain = [(date_field, '<=', now)]
+        if last_run:
+            domain.append((date_field, '>', last_run))
+        return domain
+
+    @api.model
+    def _refresh_expiry_state(self, last_run, now):
+        """Recompute the stored expiry state of the lots having a date crossed since ``last_run``"""
+        domain = ['|'] * (len(EXPIRY_DATE_FIELDS) - 1)
+        for date_field in EXPIRY_DATE_FIELDS:
+            domain += self._get_expiry_crossed_domain(date_field, last_run, now)
+        lots = self.with_context(active_test=False).search(domain)
+        if lots:
+            self.env.add_to_compute(self._fields['expiry_state'], lots)
+            lots.flush_recordset(['expiry_state'])
+        return lots
+
     @api.model
     def cron_block_expired_lots(self):
-        expired_lots = self.search([('use_date','<=',fields.Datetime.now())])
-        for lot in expired_lots:
-            lot.button_lock()
+        """Lock every unlocked lot past its use date, read through the use date index.
+        Lots unblocked by hand after their use date are left as they are.
+        """
+        expired_lots = self.search([
+            ('use_date', '<=', fields.Datetime.now()),
+            ('locked', '=', False),
+            ('expiry_unlocked', '=', False),
+        ])
+        expired_lots.button_lock()
+
+    @api.model
+    def cron_refresh_expiry_state(self):
+        """Refresh the stored expiry state of the lots having a date crossed since the last run"""
+        Param = self.env['ir.config_parameter'].sudo()
+        last_run = fields.Datetime.to_datetime(Param.get_param(EXPIRY_STATE_LAST_RUN_PARAM)) or False
+        now = fields.Datetime.now()
+        self._refresh_expiry_state(last_run, now)
+        Param.set_param(EXPIRY_STATE_LAST_RUN_PARAM, fields.Datetime.to_string(now))
 
 
 class StockQuant(models.Model):
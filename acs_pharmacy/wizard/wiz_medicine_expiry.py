@@ -1,6 +1,16 @@
 # -*- coding: utf-8 -*-
 
-from odoo import api, fields, models
+import csv
+import io
+import xlsxwriter
+
+from odoo import api, fields, models, _
+
+# Quants read per search_read while streaming the report.
+MEDICINE_EXPIRY_CHUNK = 2000
+# Rows per table of the PDF report.
+MEDICINE_EXPIRY_PAGE_SIZE = 40
+
 
 class AcsMedicineExpiry(models.TransientModel):
     _name = "acs.medicine.expiry"
@@ -10,29 +20,106 @@ class AcsMedicineExpiry(models.TransientModel):
     date_to = fields.Date(string='Date To')
     user_id = fields.Many2one('res.users', string='User', default=lambda self: self.env.user.id)
     location_ids = fields.Many2many('stock.location', string='Locations')
+    group_by_location = fields.Boolean(string='Group by Product and Location',
+        help="One line per product and location with the total quantity and the earliest expiration date.")
+    export_format = fields.Selection([
+        ('xlsx', 'XLSX'),
+        ('csv', 'CSV')], string='Export Format', default='xlsx', required=True)
 
-    def get_medicine_data(self):
-        medicine_data = []
+    def _get_medicine_domain(self):
         domain = [('location_id.usage','=', 'internal'),('lot_id','!=',False)]
-
         if self.date_from:
             domain += [('removal_date','>=', self.date_from)]
         if self.date_to:
             domain += [('removal_date','<=', self.date_to)]
         if self.location_ids:
             domain += [('location_id','child_of', self.location_ids.ids)]
+        return domain
+
+    def _iter_medicine_data(self):
+        """Rows of the report, read by chunks of quants or grouped by product and location in SQL.
+        Both modes show the names of the records, not their display names.
+        """
+        Quant = self.env['stock.quant']
+        domain = self._get_medicine_domain()
+        if self.group_by_location:
+            for product, location, quantity, removal_date in Quant._read_group(domain,
+                    ['product_id', 'location_id'], ['quantity:sum', 'removal_date:min']):
+                yield {
+                    'name': '',
+                    'product_id': product.name,
+                    'quantity': quantity,
+                    'expiration_date': removal_date,
+                    'location': location.name,
+                }
+            return
+
+        offset = 0
+        while True:
+            # Lots, products and locations are prefetched once per chunk.
+            quants = Quant.search(domain, offset=offset, limit=MEDICINE_EXPIRY_CHUNK, order='removal_date, id')
+            for quant in quants:
+                yield {
+                    'name': quant.lot_id.name,
+                    'product_id': quant.product_id.name,
+                    'quantity': quant.quantity,
+                    'expiration_date': quant.removal_date,
+                    'location': quant.location_id.name,
+                }
+            if len(quants) < MEDICINE_EXPIRY_CHUNK:
+                break
+            offset += MEDICINE_EXPIRY_CHUNK
+            # Keep the memory flat on long reports.
+            self.env.invalidate_all()
+
+    def get_medicine_data(self):
+        return list(self._iter_medicine_data())
 
-        madi_data = self.env['stock.quant'].search(domain)
+    def get_medicine_pages(self):
+        """Rows of the report split in pages for the PDF"""
+        rows = self.get_medicine_data()
+        return [rows[index:index + MEDICINE_EXPIRY_PAGE_SIZE]
+                for index in range(0, len(rows), MEDICINE_EXPIRY_PAGE_SIZE)]
 
-        for medicine in madi_data:
-            medicine_data.append({
-                'name': medicine.lot_id.name,
-                'product_id': medicine.product_id.name,
-                'quantity': medicine.inventory_quantity_auto_apply,
-                'expiration_date': medicine.removal_date,
-                'location': medicine.location_id.name,
-            })
-        return medicine_data
+    def _get_medicine_export_header(self):
+        return [_('Product'), _('Lot/Serial Number'), _('Quantity'), _('Expiration Date'), _('Location')]
+
+    def export_medicine_data(self, fileobj):
+        """Write the report to the binary ``fileobj`` in the chosen format, row by row"""
+        self.ensure_one()
+        keys = ['product_id', 'name', 'quantity', 'expiration_date', 'location']
+        if self.export_format == 'csv':
+            stream = io.TextIOWrapper(fileobj, encoding='utf-8', newline='')
+            writer = csv.writer(stream)
+            writer.writerow(self._get_medicine_export_header())
+            for row in self._iter_medicine_data():
+                writer.writerow([(fields.Datetime.to_string(row[key]) or '') if key == 'expiration_date' else row[key]
+                                 for key in keys])
+            stream.flush()
+            stream.detach()
+        else:
+            workbook = xlsxwriter.Workbook(fileobj, {'constant_memory': True, 'in_memory': False})
+            sheet = workbook.add_worksheet(_('Medicine Expiry'))
+            bold = workbook.add_format({'bold': True})
+            date_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm'})
+            sheet.write_row(0, 0, self._get_medicine_export_header(), bold)
+            for row_index, row in enumerate(self._iter_medicine_data(), 1):
+                for col, key in enumerate(keys):
+                    if key == 'expiration_date':
+                        if row[key]:
+                            sheet.write_datetime(row_index, col, row[key], date_format)
+                    else:
+                        sheet.write(row_index, col, row[key])
+            workbook.close()
+        return fileobj
+
+    def action_export_medicine_expiry(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'target': 'self',
+            'url': '/acs/medicine_expiry/export/%s' % self.id,
+        }
 
     def print_pdf_report(self):
         return self.env.ref('acs_pharmacy.acs_medicine_expiry_report_action').report_action(self)
@@ -40,12 +127,5 @@ class AcsMedicineExpiry(models.TransientModel):
     def action_view_medicine_expiry(self):
         action = self.env["ir.actions.actions"]._for_xml_id("stock.dashboard_open_quants")
         action['views'] = [(self.env.ref('stock.view_stock_quant_tree_editable').id, 'tree')]
-        domain = [('location_id.usage','=', 'internal'),('lot_id','!=',False)]
-        if self.date_from:
-            domain += [('removal_date','>=', self.date_from)]
-        if self.date_to:
-            domain += [('removal_date','<=', self.date_to)]
-        if self.location_ids:
-            domain += [('location_id','child_of', self.location_ids.ids)]
-        action['domain'] = domain
+        action['domain'] = self._get_medicine_domain()
         return action
\ No newline at end of file
@@ -17,9 +17,29 @@ class ir_sequence(models.Model):
     
     barcode_sequence = fields.Boolean('Barcode Sequence', default=False)
 
+    def _next_barcode_block(self, count):
+        """Reserve ``count`` numbers of the sequence at once"""
+        self.ensure_one()
+        if self.use_date_range:
+            return [self._next() for dummy in range(count)]
+        if self.implementation == 'standard':
+            self.env.cr.execute("SELECT nextval(%s) FROM generate_series(1, %s)", ('ir_sequence_%03d' % self.id, count))
+            numbers = [row[0] for row in self.env.cr.fetchall()]
+        else:
+            self.flush_recordset(['number_next'])
+            self.env.cr.execute("SELECT number_next FROM ir_sequence WHERE id=%s FOR UPDATE NOWAIT", (self.id,))
+            number_next = self.env.cr.fetchone()[0]
+            self.env.cr.execute("UPDATE ir_sequence SET number_next=number_next+%s WHERE id=%s",
+                                (self.number_increment * count, self.id))
+            self.invalidate_recordset(['number_next'])
+            numbers = [number_next + self.number_increment * index for index in range(count)]
+        return [self.get_next_char(number) for number in numbers]
+
 
-def isodd(x):
-    return bool(x % 2)
+def ean13_key(code):
+    """Check digit of the first 12 digits of an EAN13"""
+    total = sum(map(int, code[0:12:2])) + 3 * sum(map(int, code[1:12:2]))
+    return str((10 - total % 10) % 10)
 
 class ProductTemplate(models.Model):
     _inherit = 'product.template'
@@ -27,9 +47,7 @@ class ProductTemplate(models.Model):
     barcode_sequence_id = fields.Many2one('ir.sequence', 'Barcode Sequence')
 
     def generate_barcode(self):
-        for template in self:
-            for product in template.product_variant_ids:
-                product._generate_barcode_value()
+        self.product_variant_ids._generate_barcode_values()
 
     @api.onchange('categ_id')
     def onchange_categ_id(self):
@@ -40,9 +58,8 @@ class ProductTemplate(models.Model):
     @api.model_create_multi
     def create(self, vals_list):
         res = super().create(vals_list)
-        for rec in res:
-            if not rec.barcode and self.env.user.company_id.auto_create_barcode:
-                rec.generate_barcode()
+        if self.env.user.company_id.auto_create_barcode:
+            res.product_variant_ids.filtered(lambda product: not product.barcode)._generate_barcode_values()
         return res
 
 
@@ -61,26 +78,19 @@ class ProductProduct(models.Model):
             if self.categ_id.barcode_sequence_id:
                 self.barcode_sequence_id = self.categ_id.barcode_sequence_id
 
-    def _get_barcode_next_code(self):
-        product = self
-        sequence_obj = self.env['ir.sequence']
-        barcode = ''
-        prefix = 0
-        if product.barcode_sequence_id:
-            barcode = product.barcode_sequence_id.next_by_id()
-            prefix = product.barcode_sequence_id.prefix
-        elif product.categ_id.barcode_sequence_id:
-            barcode = product.categ_id.barcode_sequence_id.next_by_id()
-            prefix = product.categ_id.barcode_sequence_id.prefix
-        elif product.company_id and product.company_id.barcode_sequence_id:
-            barcode = product.company_id.barcode_sequence_id.next_by_id()
-            prefix = product.company_id.barcode_sequence_id.prefix
+    def _get_barcode_sequence(self):
+        if self.barcode_sequence_id:
+            return self.barcode_sequence_id
+        elif self.categ_id.barcode_sequence_id:
+            return self.categ_id.barcode_sequence_id
+        elif self.company_id and self.company_id.barcode_sequence_id:
+            return self.company_id.barcode_sequence_id
         elif self.env.user.company_id.barcode_sequence_id:
-            barcode = self.env.user.company_id.barcode_sequence_id.next_by_id()
-            prefix = self.env.user.company_id.barcode_sequence_id.prefix
-        else:
-            raise UserError(_('Configure Barcode seq on Product or Product Category or on Company.'))
+            return self.env.user.company_id.barcode_sequence_id
+        raise UserError(_('Configure Barcode seq on Product or Product Category or on Company.'))
 
+    @api.model
+    def _format_barcode_code(self, barcode, prefix):
         pl = len(prefix) if prefix else 0
         sl = 12 - pl
         barcode = (len(barcode[0:pl]) == pl and barcode[0:pl] or barcode[0:pl].ljust(pl,'0')) + barcode[pl:].rjust(sl,'0')
@@ -89,39 +99,70 @@ class ProductProduct(models.Model):
                   "You will have to redefine the sequence or create a new one"))
         return barcode
 
+    def _get_barcode_next_code(self):
+        sequence = self._get_barcode_sequence()
+        return self._format_barcode_code(sequence.next_by_id(), sequence.prefix)
+
     def _get_barcode_key(self, code):
-        sum = 0
-        for i in range(12):
-            if isodd(i):
-                sum += 3 * int(code[i])
-            else:
-                sum += int(code[i])
-        key = (10 - sum % 10) % 10
-        return str(key)
+        return ean13_key(code)
+
+    def _generate_barcode_values(self):
+        """Give an EAN13 to every product of ``self``.
+
+        Numbers are reserved by block on each barcode sequence, the candidates are
+        checked against the existing barcodes in one query per block, and taken
+        ones are replaced from a new block. All barcodes are stored in one update.
+        """
+        if not self:
+            return
+        Product = self.env['product.product'].sudo().with_context(active_test=False)
+        products_by_sequence = {}
+        for product in self:
+            products_by_sequence.setdefault(product._get_barcode_sequence(), []).append(product.id)
+
+        barcodes = {}
+        for sequence, pending in products_by_sequence.items():
+            while pending:
+                candidates = []
+                for code in sequence._next_barcode_block(len(pending)):
+                    code = self._format_barcode_code(code, sequence.prefix)
+                    candidates.append(code + ean13_key(code))
+                taken = set(barcodes.values())
+                taken.update(row['barcode'] for row in Product.search_read([('barcode', 'in', candidates)], ['barcode']))
+                free = [barcode for barcode in dict.fromkeys(candidates) if barcode not in taken]
+                barcodes.update(zip(pending, free))
+                pending = pending[len(free):]
+
+        #ACS: Every product gets a different barcode, so write() would run the barcode
+        # constraint once per product, each time over all the barcodes of the database.
+        # The values are stored in a single UPDATE instead, and what write() does for
+        # this field is done once for the batch: write date and user, cache invalidation
+        # and recomputations, the barcode constraints and the barcode lookup cache.
+        # The barcode is not tracked, other write() overrides are not run.
+        self.flush_recordset(['barcode', 'write_date', 'write_uid'])
+        self.env.cr.execute("""
+            UPDATE product_product
+            SET barcode = data.barcode, write_date = %s, write_uid = %s
+            FROM unnest(%s::int[], %s::varchar[]) AS data(id, barcode)
+            WHERE product_product.id = data.id
+        """, (self.env.cr.now(), self.env.uid, list(barcodes), list(barcodes.values())))
+        self.invalidate_recordset(['barcode', 'write_date', 'write_uid'])
+        self.modified(['barcode'])
+        self._validate_fields(['barcode'])
+        if 'acs.barcode.resolver' in self.env:
+            self.env['acs.barcode.resolver']._bump_barcode_generation()
 
     def _generate_barcode_value(self):
-        barcode = self._get_barcode_next_code()
-        if not barcode:
-            return False
-        key = self._get_barcode_key(barcode)
-        barcode13 = barcode + key
-
-        matching_products = self.env['product.product'].search([('barcode', '=', barcode13)])
-        if matching_products:
-            self._generate_barcode_value()
-        else:
-            self.barcode = barcode13
+        self._generate_barcode_values()
 
     def generate_barcode(self):
-        for product in self:
-            product._generate_barcode_value()
+        self._generate_barcode_values()
 
     @api.model_create_multi
     def create(self, vals_list):
         res = super().create(vals_list)
-        for rec in res:
-            if not rec.barcode and self.env.user.company_id.auto_create_barcode:
-                rec.generate_barcode()
+        if self.env.user.company_id.auto_create_barcode:
+            res.filtered(lambda product: not product.barcode)._generate_barcode_values()
         return res
             
 # vim:expandtab:smartindent:tabstop=4:softtabstop=4:shiftwidth=4:
\ No newline at end of file
@@ -4,6 +4,20 @@ from odoo import fields, models, _
 from odoo.exceptions import AccessError
 
 
+class ACSHmsKpiDaily(models.Model):
+    _inherit = 'acs.hms.kpi.daily'
+
+    def _get_kpi_sources(self):
+        sources = super()._get_kpi_sources()
+        sources['radiology_test'] = {
+            'model': 'patient.radiology.test',
+            'date_field': 'date_analysis',
+            'domain': [('state', 'not in', ['cancel'])],
+            'physician_field': 'physician_id',
+        }
+        return sources
+
+
 class Digest(models.Model):
     _inherit = 'digest.digest'
 
@@ -15,7 +29,7 @@ class Digest(models.Model):
             raise AccessError(_("Do not have access, skip this data for user's digest email"))
         for record in self:
             start, end, company = record._get_kpi_compute_parameters()
-            labtest = self.env['patient.radiology.test'].search_count([('company_id', '=', company.id), ('date_analysis', '>=', start), ('date_analysis', '<', end), ('state', 'not in', ['cancel'])])
+            labtest = self.env['acs.hms.kpi.daily']._get_kpi_count('radiology_test', start, end, [company.id])
             record.kpi_acs_radiology_test_total_value = labtest
 
     def _compute_kpis_actions(self, company, user):
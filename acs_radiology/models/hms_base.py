@@ -33,10 +33,9 @@ class ACSPatient(models.Model):
             rec.radiology_request_count = len(rec.radiology_request_ids)
             rec.radiology_test_count = len(rec.radiology_test_ids)
 
-    def _acs_get_attachemnts(self):
-        attachments = super(ACSPatient, self)._acs_get_attachemnts()
-        attachments += self.radiology_test_ids.mapped('attachment_ids')
-        return attachments
+    def _acs_attachment_owners(self):
+        owners = super(ACSPatient, self)._acs_attachment_owners()
+        return self._acs_add_attachment_owners(owners, 'radiology_test_ids')
 
     radiology_request_ids = fields.One2many('acs.radiology.request', 'patient_id', string='Radiology Requests')
     radiology_test_ids = fields.One2many('patient.radiology.test', 'patient_id', string='Radiology Tests')
@@ -98,4 +97,17 @@ class IrAttachment(models.Model):
             self.sudo().write({'access_token': str(uuid.uuid4())})
         return self.access_token
 
+
+class ACSPortalCounter(models.AbstractModel):
+    _inherit = 'acs.portal.counter'
+
+    @api.model
+    def _get_portal_counters(self):
+        counters = super()._get_portal_counters()
+        counters.update({
+            'radiology_result_count': ('patient.radiology.test', []),
+            'radiology_request_count': ('acs.radiology.request', []),
+        })
+        return counters
+
 # vim:expandtab:smartindent:tabstop=4:softtabstop=4:shiftwidth=4:
\ No newline at end of file
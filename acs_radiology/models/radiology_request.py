@@ -65,7 +65,7 @@ class PatientLabTestLine(models.Model):
 class RadiologyRequest(models.Model):
     _name = 'acs.radiology.request'
     _description = 'Radiology Request'
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'acs.portal.counter.mixin']
     _order = 'date desc, id desc'
 
     @api.depends('line_ids','line_ids.amount_total')
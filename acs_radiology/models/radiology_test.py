@@ -2,12 +2,13 @@
 
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
-import uuid
 
 
 class PatientLabTest(models.Model):
     _name = "patient.radiology.test"
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'portal.mixin', 'acs.document.mixin', 'acs.qrcode.mixin', 'acs.document.view.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'acs.hms.mixin', 'portal.mixin', 'acs.document.mixin', 'acs.qrcode.mixin', 'acs.document.view.mixin', 'acs.hms.kpi.mixin', 'acs.portal.counter.mixin']
+    _kpi_rollup_key = 'radiology_test'
+    _portal_counter_fields = ('patient_id', 'radiology_request_id', 'state', 'company_id')
     _description = "Patient Radiology Test"
     _order = 'date_analysis desc, id desc'
 
@@ -55,6 +56,9 @@ class PatientLabTest(models.Model):
             return self.env.ref('acs_radiology.mt_radiology_test_done')
         return super(PatientLabTest, self)._track_subtype(init_values)
 
+    def _acs_portal_partners(self):
+        return super()._acs_portal_partners() | self.sudo().radiology_request_id.patient_id.partner_id
+
     def _compute_display_name(self):
         for rec in self:
             name = rec.name or '-'
@@ -75,7 +79,6 @@ class PatientLabTest(models.Model):
             vals['name'] = self.env['ir.sequence'].next_by_code('patient.radiology.test')
         res = super().create(vals_list)
         for record in res:
-            record.unique_code = uuid.uuid4()
             record._subscribe_physician()
         return res
 
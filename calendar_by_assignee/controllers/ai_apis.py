@@ -270,52 +270,58 @@ class AiApis(http.Controller):
             }
         """
         try:
-            result = {
-                'available': True,
-                'conflicts': [],
-                'physician_available': True,
-                'cabin_available': True,
-                'gender_conflict': False,
-                'message': 'Available'
-            }
+            result = request.env['hms.appointment'].check_slots_availability([{
+                'physician_id': physician_id if physician_id and physician_id > 0 else False,
+                'cabin_id': cabin_id if cabin_id and cabin_id > 0 else False,
+                'start': start_datetime,
+                'stop': end_datetime,
+            }], patient_gender or False, exclude_appointment_id or False, check_breaks=False)[0]
+            result.pop('conflicting_appointments')
+            return result
+        except Exception as e:
+            return {'error': str(e)}
 
-            # Check physician
-            if physician_id and physician_id > 0:
-                physician_overlap = request.env['hms.appointment'].search_count([
-                    ('physician_id', '=', physician_id),
-                    ('date', '<', end_datetime),
-                    ('date_to', '>', start_datetime),
-                    ('state', 'not in', ['cancelled', 'done']),
-                    ('id', '!=', exclude_appointment_id or 0)
-                ])
-                if physician_overlap:
-                    result['available'] = False
-                    result['physician_available'] = False
-                    result['conflicts'].append('Physician has another appointment at this time')
-
-            # Check cabin
-            if cabin_id and cabin_id > 0:
-                # Use existing cabin conflict method
-                cabin_conflict = request.env['hms.appointment'].check_cabin_appointment_conflict(
-                    cabin_id, start_datetime, end_datetime,
-                    patient_gender or False,
-                    exclude_appointment_id or False
-                )
-                if cabin_conflict.get('hasConflict'):
-                    result['available'] = False
-                    result['cabin_available'] = False
-                    if cabin_conflict.get('genderConflict'):
-                        result['gender_conflict'] = True
-                        result['conflicts'].append('Gender conflict in the cabin')
-                    else:
-                        result['conflicts'].append('Cabin is already booked at this time')
-
-            if result['available']:
-                result['message'] = 'Available'
-            else:
-                result['message'] = '; '.join(result['conflicts'])
+    @http.route('/ai/check_slots_availability', type='json', auth='user', methods=['POST'])
+    def check_slots_availability(self, slots, patient_gender=None, exclude_appointment_id=None):
+        """
+        Check many candidate slots in one call, including breaks and leaves.
+        Inputs:
+            slots (list of dict): candidate slots with physician_id, cabin_id, start and stop
+            patient_gender (str, optional): patient gender (for gender conflict check)
+            exclude_appointment_id (int, optional): appointment ID to exclude from check
+        Outputs:
+            list of dict: one availability result per slot, in the same order
+        """
+        try:
+            return request.env['hms.appointment'].check_slots_availability(
+                slots, patient_gender or False, exclude_appointment_id or False
+            )
+        except Exception as e:
+            return {'error': str(e)}
 
-            return result
+    @http.route('/ai/find_free_slots', type='json', auth='user', methods=['POST'])
+    def find_free_slots(self, physician_id, cabin_id, start_datetime, end_datetime, duration=30,
+                        patient_gender=None, step=15, limit=5):
+        """
+        Find the first free slots of a physician and cabin within a time window.
+        Inputs:
+            physician_id (int): physician ID (can be 0 if not relevant)
+            cabin_id (int): cabin ID (can be 0 if not relevant)
+            start_datetime (str): window start datetime
+            end_datetime (str): window end datetime
+            duration (int): slot duration in minutes, at least 1
+            patient_gender (str, optional): patient gender (for gender conflict check)
+            step (int): minutes between two candidate starts, at least 1
+            limit (int): maximum number of slots, at most 100
+            The window is searched over 31 days at most.
+        Outputs:
+            list of dict: free slots with start and stop
+        """
+        try:
+            return request.env['hms.appointment'].find_free_slots(
+                physician_id, cabin_id, start_datetime, end_datetime, duration,
+                patient_gender or False, step, limit
+            )
         except Exception as e:
             return {'error': str(e)}
 
@@ -7,23 +7,31 @@ from datetime import datetime, timedelta
 class CalendarByAssigneeController(http.Controller):
 
     @http.route('/calendar_by_assignee/get_day_events', type='json', auth='user')
-    def get_day_events(self, start_date, end_date, physician_ids):
+    def get_day_events(self, start_date, end_date, physician_ids, epoch=False):
         events = request.env['hms.appointment'].get_calendar_events_by_assignee(
-            start_date, end_date, physician_ids
+            start_date, end_date, physician_ids, epoch=epoch
         )
         return events
 
     @http.route('/calendar_by_assignee/get_cabin_day_events', type='json', auth='user')
-    def get_cabin_day_events(self, start_date, end_date, cabin_ids):
+    def get_cabin_day_events(self, start_date, end_date, cabin_ids, epoch=False):
         events = request.env['hms.appointment'].get_calendar_events_by_cabin(
-            start_date, end_date, cabin_ids
+            start_date, end_date, cabin_ids, epoch=epoch
         )
         return events
 
     @http.route('/calendar_by_assignee/get_week_events', type='json', auth='user')
-    def get_week_events(self, week_start, physician_ids):
+    def get_week_events(self, week_start, physician_ids, epoch=False):
         events = request.env['hms.appointment'].get_week_events_by_assignee(
-            week_start, physician_ids
+            week_start, physician_ids, epoch=epoch
+        )
+        return events
+
+    @http.route('/calendar_by_assignee/get_events_since', type='json', auth='user')
+    def get_events_since(self, since, physician_ids=None, cabin_ids=None, start_date=None, end_date=None,
+                         epoch=False):
+        events = request.env['hms.appointment'].get_calendar_events_since(
+            since, physician_ids, cabin_ids, start_date, end_date, epoch=epoch
         )
         return events
 
@@ -45,9 +53,9 @@ class CalendarByAssigneeController(http.Controller):
         return result
 
     @http.route('/calendar_by_assignee/get_cabin_day_events_with_physician', type='json', auth='user')
-    def get_cabin_day_events_with_physician(self, start_date, end_date, cabin_ids, physician_ids):
+    def get_cabin_day_events_with_physician(self, start_date, end_date, cabin_ids, physician_ids, epoch=False):
         events = request.env['hms.appointment'].get_calendar_events_by_cabin_and_physician(
-            start_date, end_date, cabin_ids, physician_ids
+            start_date, end_date, cabin_ids, physician_ids, epoch=epoch
         )
         return events
 
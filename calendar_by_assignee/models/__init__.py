@@ -1,3 +1,7 @@
+from . import calendar_timezone
 from . import calendar_event
+from . import calendar_event_tombstone
+from . import appointment_availability
 from . import calendar_time_config
 from . import appointment_cabin_working_hours
+from . import resource_calendar
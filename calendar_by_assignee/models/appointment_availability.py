@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Appointment states that keep a cabin busy.
+CABIN_BUSY_STATES = ('draft', 'confirm', 'booked', 'arrived', 'waiting', 'treatment',
+                     'in_consultation', 'done', 'pause', 'follow_up')
+# Appointment states that no longer keep a physician busy.
+PHYSICIAN_FREE_STATES = ('cancelled', 'done')
+# Bounds of find_free_slots: longest searched window and most slots returned.
+FREE_SLOTS_MAX_DAYS = 31
+FREE_SLOTS_MAX_LIMIT = 100
+
+
+class AppointmentIntervalIndex(object):
+    """Intervals of one physician or cabin sorted by start.
+
+    Overlap queries bisect the sorted starts instead of scanning every
+    interval; the longest interval bounds how far back an overlapping
+    interval can start.
+    """
+
+    def __init__(self, intervals):
+        self.intervals = sorted(intervals, key=lambda interval: interval['start'])
+        self.starts = [interval['start'] for interval in self.intervals]
+        self.max_length = max((interval['stop'] - interval['start'] for interval in self.intervals),
+                              default=timedelta(0))
+
+    def overlapping(self, start, stop):
+        low = bisect_left(self.starts, start - self.max_length)
+        high = bisect_left(self.starts, stop)
+        return [interval for interval in self.intervals[low:high] if interval['stop'] > start]
+
+
+class AppointmentAvailability(models.Model):
+    _inherit = 'hms.appointment'
+
+    @api.model
+    def _get_booking_indexes(self, date_from, date_to, physician_ids=(), cabin_ids=(),
+                             exclude_ids=(), with_breaks=False):
+        """Load the bookings of ``physician_ids`` and ``cabin_ids`` between two UTC datetimes.
+
+        All bookings are fetched with one search_read and their patients with
+        one read, then split into one interval index per physician and per
+        cabin. With ``with_breaks``, break and leave periods are indexed too.
+        Returns a dict keyed by ``('physician', id)``, ``('cabin', id)``,
+        ``('physician_break', id)`` and ``('cabin_break', id)``.
+        """
+        physician_ids = [int(pid) for pid in physician_ids if pid]
+        cabin_ids = [int(cid) for cid in cabin_ids if cid]
+        intervals = defaultdict(list)
+
+        resource_domain = []
+        if physician_ids and cabin_ids:
+            resource_domain = ['|', ('physician_id', 'in', physician_ids), ('cabin_id', 'in', cabin_ids)]
+        elif physician_ids:
+            resource_domain = [('physician_id', 'in', physician_ids)]
+        elif cabin_ids:
+            resource_domain = [('cabin_id', 'in', cabin_ids)]
+
+        if resource_domain:
+            domain = [
+                ('date', '<', date_to),
+                ('date_to', '>', date_from),
+                ('state', '!=', 'cancelled'),
+            ] + resource_domain
+            exclude_ids = [int(aid) for aid in exclude_ids if aid]
+            if exclude_ids:
+                domain.append(('id', 'not in', exclude_ids))
+            rows = self.search_read(domain, ['name', 'date', 'date_to', 'state', 'physician_id',
+                                             'cabin_id', 'patient_id'], load=False)
+            patient_ids = list({row['patient_id'] for row in rows if row['patient_id']})
+            patients = {patient['id']: patient for patient in
+                        self.env['hms.patient'].browse(patient_ids).read(['name', 'gender'], load=False)}
+
+            for row in rows:
+                patient = patients.get(row['patient_id']) or {}
+                booking = {
+                    'id': row['id'],
+                    'name': row['name'],
+                    'start': row['date'],
+                    'stop': row['date_to'],
+                    'patient_name': patient.get('name') or '',
+                    'patient_gender': patient.get('gender') or False,
+                }
+                if row['physician_id'] in physician_ids and row['state'] not in PHYSICIAN_FREE_STATES:
+                    intervals[('physician', row['physician_id'])].append(booking)
+                if row['cabin_id'] in cabin_ids and row['state'] in CABIN_BUSY_STATES:
+                    intervals[('cabin', row['cabin_id'])].append(booking)
+
+        if with_breaks:
+            tz = self._calendar_tz()
+            start_date = fields.Date.to_string(tz.to_local(date_from).date())
+            end_date = fields.Date.to_string(tz.to_local(date_to).date())
+            resources = []
+            if physician_ids:
+                resources.append(('physician_break', self.env['hms.physician'].get_break_periods_for_range(
+                    physician_ids, start_date, end_date)))
+            if cabin_ids:
+                resources.append(('cabin_break', self.env['appointment.cabin'].get_cabin_break_periods_for_range(
+                    cabin_ids, start_date, end_date)))
+            for kind, periods_by_resource in resources:
+                for resource_id, periods in periods_by_resource.items():
+                    for period in periods:
+                        start = datetime.strptime('%s %s' % (period['date'], period['start_time']), '%Y-%m-%d %H:%M')
+                        stop = datetime.strptime('%s %s' % (period['date'], period['end_time']), '%Y-%m-%d %H:%M')
+                        intervals[(kind, int(resource_id))].append({
+                            'start': tz.to_utc(start),
+                            'stop': tz.to_utc(stop),
+                            'type': period['type'],
+                            'name': period.get('leave_name') or period['type'],
+                        })
+
+        return {key: AppointmentIntervalIndex(values) for key, values in intervals.items()}
+
+    @api.model
+    def _check_slot_with_indexes(self, indexes, physician_id, cabin_id, start, stop, patient_gender=None):
+        """Evaluate one candidate slot against preloaded booking indexes"""
+        empty = AppointmentIntervalIndex([])
+        result = {
+            'available': True,
+            'conflicts': [],
+            'physician_available': True,
+            'cabin_available': True,
+            'gender_conflict': False,
+            'conflicting_appointments': [],
+            'message': 'Available',
+        }
+
+        if physician_id:
+            if indexes.get(('physician', physician_id), empty).overlapping(start, stop):
+                result['physician_available'] = False
+                result['conflicts'].append('Physician has another appointment at this time')
+            for period in indexes.get(('physician_break', physician_id), empty).overlapping(start, stop):
+                result['physician_available'] = False
+                result['conflicts'].append('Physician is on %s at this time' % period['name'])
+
+        if cabin_id:
+            # Sharing a cabin is allowed between patients of the same gender only.
+            if patient_gender:
+                for booking in indexes.get(('cabin', cabin_id), empty).overlapping(start, stop):
+                    if booking['patient_gender'] and booking['patient_gender'] != patient_gender:
+                        result['conflicting_appointments'].append({
+                            'id': booking['id'],
+                            'name': booking['name'],
+                            'patient_name': booking['patient_name'],
+                            'patient_gender': booking['patient_gender'],
+                        })
+                if result['conflicting_appointments']:
+                    result['cabin_available'] = False
+                    result['gender_conflict'] = True
+                    result['conflicts'].append('Gender conflict in the cabin')
+            if indexes.get(('cabin_break', cabin_id), empty).overlapping(start, stop):
+                result['cabin_available'] = False
+                result['conflicts'].append('Cabin is on break at this time')
+
+        if result['conflicts']:
+            result['available'] = False
+            result['message'] = '; '.join(result['conflicts'])
+        return result
+
+    @api.model
+    def check_slots_availability(self, slots, patient_gender=None, exclude_appointment_id=None, check_breaks=True):
+        """Check many candidate slots with a single load of the bookings involved.
+
+        ``slots`` is a list of dicts with ``physician_id``, ``cabin_id``, ``start``
+        and ``stop`` (UTC). Returns one availability dict per slot, in order.
+        """
+        if not slots:
+            return []
+        candidates = []
+        for slot in slots:
+            candidates.append((
+                int(slot.get('physician_id') or 0),
+                int(slot.get('cabin_id') or 0),
+                fields.Datetime.to_datetime(slot['start']),
+                fields.Datetime.to_datetime(slot['stop']),
+            ))
+        indexes = self._get_booking_indexes(
+            min(candidate[2] for candidate in candidates),
+            max(candidate[3] for candidate in candidates),
+            physician_ids={candidate[0] for candidate in candidates},
+            cabin_ids={candidate[1] for candidate in candidates},
+            exclude_ids=[exclude_appointment_id] if exclude_appointment_id else [],
+            with_breaks=check_breaks,
+        )
+        return [self._check_slot_with_indexes(indexes, physician_id, cabin_id, start, stop, patient_gender)
+                for physician_id, cabin_id, start, stop in candidates]
+
+    @api.model
+    def find_free_slots(self, physician_id, cabin_id, date_from, date_to, duration=30,
+                        patient_gender=None, step=15, limit=5):
+        """Return the first ``limit`` free slots of ``duration`` minutes between two UTC datetimes.
+
+        Candidate starts are probed every ``step`` minutes against one
+        preloaded set of booking, break and leave indexes. The window is
+        capped to FREE_SLOTS_MAX_DAYS days and ``limit`` to FREE_SLOTS_MAX_LIMIT.
+        """
+        step = int(step or 0)
+        duration = int(duration or 0)
+        if step < 1:
+            raise ValidationError(_("The step between two slots must be at least one minute."))
+        if duration < 1:
+            raise ValidationError(_("The slot duration must be at least one minute."))
+        limit = min(int(limit or 0), FREE_SLOTS_MAX_LIMIT)
+        date_from = fields.Datetime.to_datetime(date_from)
+        date_to = min(fields.Datetime.to_datetime(date_to), date_from + timedelta(days=FREE_SLOTS_MAX_DAYS))
+        physician_id = int(physician_id or 0)
+        cabin_id = int(cabin_id or 0)
+        length = timedelta(minutes=duration)
+        indexes = self._get_booking_indexes(date_from, date_to, [physician_id], [cabin_id], with_breaks=True)
+
+        free_slots = []
+        start = date_from
+        while start + length <= date_to and len(free_slots) < limit:
+            stop = start + length
+            if self._check_slot_with_indexes(indexes, physician_id, cabin_id, start, stop, patient_gender)['available']:
+                free_slots.append({
+                    'start': fields.Datetime.to_string(start),
+                    'stop': fields.Datetime.to_string(stop),
+                })
+            start += timedelta(minutes=step)
+        return free_slots
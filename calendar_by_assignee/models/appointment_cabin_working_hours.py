@@ -1,4 +1,6 @@
-from odoo import api, fields, models
+from odoo import api, fields, models, tools
+
+from .resource_calendar import float_to_time
 
 class AppointmentCabin(models.Model):
     _inherit = "appointment.cabin"
@@ -10,6 +12,21 @@ class AppointmentCabin(models.Model):
         copy=True,
     )
 
+    @api.model
+    @tools.ormcache('cabin_id')
+    def _get_weekly_break_pattern(self, cabin_id):
+        """Break periods of a cabin, one tuple per weekday.
+
+        Cached until a cabin working hour changes.
+        """
+        pattern = [[] for dummy in range(7)]
+        working_hours = self.env["appointment.cabin.working.hour"].sudo().search(
+            [("cabin_id", "=", cabin_id), ("is_break", "=", True)])
+        for working_hour in working_hours:
+            pattern[int(working_hour.day_code)].append(
+                (float_to_time(working_hour.time_from), float_to_time(working_hour.time_to)))
+        return tuple(tuple(day) for day in pattern)
+
 
 class AppointmentCabinWorkingHour(models.Model):
     _name = "appointment.cabin.working.hour"
@@ -66,3 +83,16 @@ class AppointmentCabinWorkingHour(models.Model):
                 end += 24.0
 
             rec.duration_hours = max(end - start, 0.0)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env.registry.clear_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.env.registry.clear_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env.registry.clear_cache()
+        return super().unlink()
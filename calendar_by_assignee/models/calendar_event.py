@@ -5,6 +5,9 @@ from collections import defaultdict
 from datetime import datetime, timedelta
 import logging
 
+from .calendar_timezone import CalendarTimezone
+from .resource_calendar import date_range_days, expand_weekly_pattern
+
 _logger = logging.getLogger(__name__)
 
 
@@ -49,19 +52,6 @@ class AppointmentCalendar(models.Model):
         tracking=True
     )
 
-    treatment_week = fields.Selection([
-        ('1', 'Week 1'),
-        ('2', 'Week 2'),
-        ('3', 'Week 3'),
-        ('4', 'Week 4'),
-        ('5', 'Week 5'),
-        ('6', 'Week 6'),
-        ('7', 'Week 7'),
-        ('8', 'Week 8'),
-        ('9', 'Week 9'),
-        ('10', 'Week 10'),
-    ], string="Treatment Week")
-
     consultation_type = fields.Selection([
         ('consultation', 'Consultation'),
         ('followup', 'Follow Up'),
@@ -116,21 +106,17 @@ class AppointmentCalendar(models.Model):
             return {}
 
         line = self.treatment_schedule_line_id
-        week_data = {}
-        for week in range(1, 9):
-            date_field = f'wk{week}_date'
-            number_field = f'wk{week}_number'
-            if getattr(line, date_field) or getattr(line, number_field):
-                week_data = {
-                    'week_number': week,
-                    'date': getattr(line, date_field),
-                    'number': getattr(line, number_field),
-                    'session_type_id': line.product_id.id if line.product_id else None,
-                    'session_type_name': line.product_id.name if line.product_id else '',
-                }
-                break
+        week = line.week_ids.filtered(lambda w: w.date or w.number)[:1]
+        if not week:
+            return {}
 
-        return week_data
+        return {
+            'week_number': week.week_number,
+            'date': week.date,
+            'number': week.number,
+            'session_type_id': line.product_id.id if line.product_id else None,
+            'session_type_name': line.product_id.name if line.product_id else '',
+        }
 
     def check_cabin_appointment_conflict(self, cabin_id, start_datetime, end_datetime, patient_gender=None,
                                          exclude_appointment_id=None):
@@ -251,48 +237,25 @@ class AppointmentCalendar(models.Model):
                     'message': 'Invalid date range provided.'
                 }
 
-            domain = [
-                ('cabin_id', '=', cabin_id),
-                ('date', '<', end_dt),
-                ('date_to', '>', start_dt),
-                ('state', 'in', ['draft', 'confirm', 'booked', 'arrived', 'waiting', 'treatment',
-                                 'in_consultation', 'done', 'pause', 'follow_up'])
-            ]
-
+            exclude_ids = []
             if exclude_appointment_id:
                 try:
-                    exclude_id = int(exclude_appointment_id)
-                    domain.append(('id', '!=', exclude_id))
-                    _logger.info("Excluding appointment ID: %s", exclude_id)
+                    exclude_ids.append(int(exclude_appointment_id))
                 except (ValueError, TypeError) as e:
                     _logger.warning("Invalid exclude_appointment_id: %s. Error: %s", exclude_appointment_id, str(e))
 
-            overlapping_appointments = self.search(domain)
-
-            _logger.info("Found %s overlapping appointments for cabin %s", len(overlapping_appointments), cabin_id)
-
-            if not overlapping_appointments:
+            indexes = self._get_booking_indexes(start_dt, end_dt, cabin_ids=[cabin_id], exclude_ids=exclude_ids)
+            if not indexes:
                 return {
                     'hasConflict': False,
                     'genderConflict': False,
                     'message': 'Cabin is available'
                 }
 
-            conflicting_appointments = []
-            for appointment in overlapping_appointments:
-                if appointment.patient_id and appointment.patient_id.gender:
-                    appointment_gender = appointment.patient_id.gender
-
-                    if patient_gender and patient_gender != appointment_gender:
-                        gender_map = {'male': 'Male', 'female': 'Female'}
-                        conflicting_appointments.append({
-                            'id': appointment.id,
-                            'name': appointment.name,
-                            'patient_name': appointment.patient_id.name,
-                            'patient_gender': appointment_gender
-                        })
-
+            slot = self._check_slot_with_indexes(indexes, False, cabin_id, start_dt, end_dt, patient_gender)
+            conflicting_appointments = slot['conflicting_appointments']
             if conflicting_appointments:
+                gender_map = {'male': 'Male', 'female': 'Female'}
                 conflict_messages = []
                 for conf_app in conflicting_appointments:
                     conflict_messages.append(
@@ -331,13 +294,9 @@ class AppointmentCalendar(models.Model):
                 _logger.error("Treatment schedule line not found: %s", line_id)
                 return False
 
-            # Update week field based on week number
-            week_field = f'wk{week_number}_number'
-            if hasattr(line, week_field):
-                line.write({
-                    week_field: week_number_details
-                })
-                _logger.info("Updated week %s for line %s: %s", week_number, line_id, week_number_details)
+            # Update the number of the week record
+            line._get_week(week_number).write({'number': week_number_details})
+            _logger.info("Updated week %s for line %s: %s", week_number, line_id, week_number_details)
 
             # Link appointment to treatment schedule
             self.write({
@@ -355,78 +314,52 @@ class AppointmentCalendar(models.Model):
             _logger.error("Error linking to treatment schedule: %s", str(e))
             return False
 
-    @api.model
-    def create(self, vals):
-        """Override create to validate gap and overlap and handle timezone conversion"""
-        _logger.info("📝 Creating appointment with initial values: %s", vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Override create to convert local times to UTC, link treatment schedules and check cabins set-wise"""
+        _logger.info("📝 Creating %s appointments", len(vals_list))
 
-        if 'notes' in vals:
-            _logger.info("📝 LOG: Creating appointment with notes: %s", vals['notes'])
-
-        if 'date' in vals and vals['date']:
-            date_str = vals['date']
-            if isinstance(date_str, str):
-                date_dt = fields.Datetime.from_string(date_str)
-                _logger.info("📝 LOG: Original local start time: %s", date_str)
-                date_dt = date_dt - timedelta(hours=3)
-                vals['date'] = fields.Datetime.to_string(date_dt)
-                _logger.info("📝 LOG: Converted UTC start time: %s", vals['date'])
-
-        if 'date_to' in vals and vals['date_to']:
-            date_to_str = vals['date_to']
-            if isinstance(date_to_str, str):
-                date_to_dt = fields.Datetime.from_string(date_to_str)
-                _logger.info("📝 LOG: Original local end time: %s", date_to_str)
-                date_to_dt = date_to_dt - timedelta(hours=3)
-                vals['date_to'] = fields.Datetime.to_string(date_to_dt)
-                _logger.info("📝 LOG: Converted UTC end time: %s", vals['date_to'])
-
-        # Handle treatment schedule linking
-        treatment_schedule_id = vals.get('treatment_schedule_id')
-        treatment_schedule_line_id = vals.get('treatment_schedule_line_id')
-        treatment_week = vals.get('treatment_week')
-        week_number_details = vals.pop('week_number_details', None)  # Extract week number details
-
-        appointment = super(AppointmentCalendar, self).create(vals)
+        week_details = []
+        for vals in vals_list:
+            self._calendar_vals_to_utc(vals)
+            week_details.append(vals.pop('week_number_details', None))  # Extract week number details
+
+        appointments = super(AppointmentCalendar, self).create(vals_list)
 
         # Link to treatment schedule if needed
-        if treatment_schedule_line_id and treatment_week and week_number_details:
-            appointment.link_to_treatment_schedule(
-                treatment_schedule_line_id,
-                int(treatment_week),
-                week_number_details
-            )
-
-        if 'cabin_id' in vals and 'patient_id' in vals:
-            patient = self.env['hms.patient'].browse(vals['patient_id'])
-            patient_gender = patient.gender if patient else None
-
-            cabin_conflict = appointment.check_cabin_appointment_conflict(
-                vals.get('cabin_id'),
-                vals.get('date'),
-                vals.get('date_to'),
-                patient_gender,
-                appointment.id
-            )
-
-            if cabin_conflict and cabin_conflict['hasConflict']:
-                if cabin_conflict['genderConflict']:
-                    raise ValidationError(
-                        f"Cannot schedule appointment: Gender conflict in consultation room.\n"
-                        f"Existing appointment: {cabin_conflict['conflictingAppointment']}"
-                    )
-                else:
-                    raise ValidationError(
-                        f"Cannot schedule appointment: Cabin already has appointments at this time.\n"
-                        f"Existing appointment: {cabin_conflict['conflictingAppointment']}"
-                    )
+        for appointment, vals, week_number_details in zip(appointments, vals_list, week_details):
+            if vals.get('treatment_schedule_line_id') and vals.get('treatment_week') and week_number_details:
+                appointment.link_to_treatment_schedule(
+                    vals['treatment_schedule_line_id'],
+                    int(vals['treatment_week']),
+                    week_number_details
+                )
 
-        _logger.info("✅ LOG: Appointment created successfully with ID: %s, Treatment Schedule Line ID: %s, Treatment Week: %s, Notes: %s",
-                     appointment.id,
-                     appointment.treatment_schedule_line_id.id if appointment.treatment_schedule_line_id else 'None',
-                     appointment.treatment_week or 'None',
-                     appointment.notes or 'None')
-        return appointment
+        checked = appointments.browse([
+            appointment.id for appointment, vals in zip(appointments, vals_list)
+            if 'cabin_id' in vals and 'patient_id' in vals])
+        checked._check_cabin_gender_conflicts()
+
+        _logger.info("✅ LOG: Appointments created successfully with IDs: %s", appointments.ids)
+        return appointments
+
+    def _check_cabin_gender_conflicts(self):
+        """Raise if a cabin is shared with patients of another gender, with one load of the bookings"""
+        slots = self.filtered(lambda a: a.cabin_id and a.date and a.date_to)
+        if not slots:
+            return
+        indexes = self._get_booking_indexes(
+            min(slots.mapped('date')), max(slots.mapped('date_to')), cabin_ids=slots.cabin_id.ids)
+        for appointment in slots:
+            result = self._check_slot_with_indexes(
+                indexes, False, appointment.cabin_id.id, appointment.date, appointment.date_to,
+                appointment.patient_id.gender or None)
+            if result['gender_conflict']:
+                conflict_info = "".join(f"\n- {app['name']} (Patient: {app['patient_name']})"
+                                        for app in result['conflicting_appointments'])
+                raise ValidationError(
+                    f"Cannot schedule appointment: Gender conflict in consultation room.{conflict_info}"
+                )
 
     def write(self, vals):
         """Override write to validate gap and overlap and handle timezone conversion"""
@@ -435,23 +368,7 @@ class AppointmentCalendar(models.Model):
         if 'notes' in vals:
             _logger.info("📝 LOG: Updating appointment notes: %s", vals['notes'])
 
-        if 'date' in vals and vals['date']:
-            date_str = vals['date']
-            if isinstance(date_str, str):
-                date_dt = fields.Datetime.from_string(date_str)
-                _logger.info("📝 LOG: Original local start time: %s", date_str)
-                date_dt = date_dt - timedelta(hours=3)
-                vals['date'] = fields.Datetime.to_string(date_dt)
-                _logger.info("📝 LOG: Converted UTC start time: %s", vals['date'])
-
-        if 'date_to' in vals and vals['date_to']:
-            date_to_str = vals['date_to']
-            if isinstance(date_to_str, str):
-                date_to_dt = fields.Datetime.from_string(date_to_str)
-                _logger.info("📝 LOG: Original local end time: %s", date_to_str)
-                date_to_dt = date_to_dt - timedelta(hours=3)
-                vals['date_to'] = fields.Datetime.to_string(date_to_dt)
-                _logger.info("📝 LOG: Converted UTC end time: %s", vals['date_to'])
+        self._calendar_vals_to_utc(vals)
 
         for appointment in self:
             physician_id = vals.get('physician_id', appointment.physician_id.id)
@@ -487,6 +404,13 @@ class AppointmentCalendar(models.Model):
                             f"Cannot schedule appointment: Cabin already has appointments at this time."
                         )
 
+        # Let clients syncing the previous physician/cabin or date range drop the event.
+        moved = self.filtered(lambda a: ('physician_id' in vals and a.physician_id.id != vals['physician_id'])
+                              or ('cabin_id' in vals and a.cabin_id.id != vals['cabin_id'])
+                              or ('date' in vals and a.date != fields.Datetime.to_datetime(vals['date']))
+                              or ('date_to' in vals and a.date_to != fields.Datetime.to_datetime(vals['date_to'])))
+        self.env['calendar.appointment.tombstone']._record(moved, reason='moved')
+
         result = super(AppointmentCalendar, self).write(vals)
 
         for appointment in self:
@@ -498,6 +422,10 @@ class AppointmentCalendar(models.Model):
 
         return result
 
+    def unlink(self):
+        self.env['calendar.appointment.tombstone']._record(self, reason='deleted')
+        return super(AppointmentCalendar, self).unlink()
+
     @api.depends('date', 'date_to')
     def _compute_calendar_dates(self):
         """Compute start and stop dates for calendar display"""
@@ -524,396 +452,273 @@ class AppointmentCalendar(models.Model):
             else:
                 record.partner_ids = [(5, 0, 0)]
 
+    # Columns read from hms.appointment by the calendar event feed.
+    _CALENDAR_FEED_FIELDS = [
+        'name', 'date', 'date_to', 'duration', 'state', 'notes', 'consultation_type',
+        'treatment_week', 'physician_id', 'department_id', 'patient_id', 'cabin_id',
+        'treatment_schedule_id', 'treatment_schedule_line_id',
+    ]
+
+    # Safety margin re-sent on every delta sync, see get_calendar_events_since.
+    _CALENDAR_SYNC_OVERLAP = timedelta(seconds=10)
+
     @api.model
-    def get_calendar_events_by_assignee(self, start_datetime, end_datetime, physician_ids):
-        """Get appointments for calendar display - normalizing timezone"""
-        try:
-            _logger.info("Getting calendar events by assignee - Input: start=%s, end=%s, physicians=%s",
-                         start_datetime, end_datetime, physician_ids)
+    def _calendar_parse_range(self, start_datetime, end_datetime):
+        """UTC bounds of a range given as local time strings"""
+        tz = self._calendar_tz()
+        if isinstance(start_datetime, str):
+            start_datetime = tz.to_utc(fields.Datetime.from_string(start_datetime))
+        if isinstance(end_datetime, str):
+            end_datetime = tz.to_utc(fields.Datetime.from_string(end_datetime))
+        return start_datetime, end_datetime
 
-            if isinstance(start_datetime, str):
-                start_dt = fields.Datetime.from_string(start_datetime)
-            else:
-                start_dt = start_datetime
+    @api.model
+    def _calendar_week_range(self, week_start):
+        if 'T' in week_start:
+            week_start = week_start.split('T')[0]
+        week_start_dt = datetime.strptime(week_start, '%Y-%m-%d')
+        week_end_dt = week_start_dt + timedelta(days=7, hours=23, minutes=59, seconds=59)
+        tz = self._calendar_tz()
+        return tz.to_utc(week_start_dt), tz.to_utc(week_end_dt)
 
-            if isinstance(end_datetime, str):
-                end_dt = fields.Datetime.from_string(end_datetime)
+    @api.model
+    def _calendar_feed_read_related(self, rows):
+        """Read the records referenced by the feed rows, one query per model.
+
+        Returns a dict mapping the appointment field name to ``{id: values}``.
+        """
+        related_specs = {
+            'patient_id': ('hms.patient', ['name', 'gender', 'partner_id', 'phone', 'mobile', 'code']),
+            'physician_id': ('hms.physician', ['name', 'code']),
+            'department_id': ('hr.department', ['name']),
+            'cabin_id': ('appointment.cabin', ['name']),
+        }
+        related = {}
+        for field_name, (model_name, field_names) in related_specs.items():
+            record_ids = list({row[field_name] for row in rows if row[field_name]})
+            values = {}
+            if record_ids:
+                for record in self.env[model_name].browse(record_ids).read(field_names, load=False):
+                    values[record['id']] = record
+            related[field_name] = values
+        return related
+
+    @api.model
+    def _calendar_feed_serialize(self, rows, related, epoch=False):
+        """Build the calendar event dict of every feed row.
+
+        Start and stop are local time strings, or UTC epoch seconds with ``epoch``.
+        """
+        one_hour = timedelta(hours=1)
+        starts = [row['date'] for row in rows]
+        stops = [row['date_to'] or (row['date'] + one_hour if row['date'] else False) for row in rows]
+        if epoch:
+            starts = CalendarTimezone.epoch_many(starts)
+            stops = CalendarTimezone.epoch_many(stops)
+        else:
+            tz = self._calendar_tz()
+            starts = tz.format_many(starts)
+            stops = tz.format_many(stops)
+        patients = related['patient_id']
+        physicians = related['physician_id']
+        departments = related['department_id']
+        cabins = related['cabin_id']
+
+        events = []
+        for row, start, stop in zip(rows, starts, stops):
+            patient = patients.get(row['patient_id']) or {}
+            physician = physicians.get(row['physician_id']) or {}
+            department = departments.get(row['department_id']) or {}
+            cabin = cabins.get(row['cabin_id']) or {}
+            patient_name = patient.get('name') or ''
+            notes = row['notes'] or ''
+            events.append({
+                'id': row['id'],
+                'name': row['name'] or 'Appointment',
+                'start': start,
+                'stop': stop,
+                'duration': row['duration'],
+                'doctor_id': row['physician_id'] or None,
+                'appointment_status': row['state'],
+                'doctor_name': physician.get('name') or '',
+                'doctor_code': physician.get('code') or '',
+                'doctor_specialty': department.get('name') or 'No Department',
+                'partner_names': [patient_name] if patient.get('partner_id') else [],
+                'patient_name': patient_name,
+                'patient_phone': patient.get('phone') or '',
+                'patient_mobile': patient.get('mobile') or '',
+                'patient_id': [row['patient_id'], patient_name] if row['patient_id'] else None,
+                'patient_gender': patient.get('gender') or None,
+                'patient_code': patient.get('code') or '',
+                'cabin_name': cabin.get('name') or '',
+                'cabin_id': row['cabin_id'] or None,
+                'color_index': self._get_appointment_color(row['state']),
+                'is_all_day': False,
+                'description': notes,
+                'consultation_type': row['consultation_type'] or 'consultation',
+                'treatment_schedule_id': row['treatment_schedule_id'] or None,
+                'treatment_schedule_line_id': row['treatment_schedule_line_id'] or None,
+                'treatment_week': row['treatment_week'] or '',
+                'notes': notes,
+            })
+        return events
+
+    @api.model
+    def _get_calendar_event_feed(self, domain, group_field, by_day=False, epoch=False):
+        """Load the calendar events matching ``domain`` grouped by ``group_field``.
+
+        Appointments are fetched with a single search_read and the related
+        patients, physicians, departments and cabins with one read per model,
+        instead of dereferencing them appointment by appointment. With
+        ``by_day`` the events of each group are further split by local date.
+        """
+        rows = self.search_read(domain, self._CALENDAR_FEED_FIELDS, order='date, id', load=False)
+        events = self._calendar_feed_serialize(rows, self._calendar_feed_read_related(rows), epoch=epoch)
+        if by_day:
+            days = self._calendar_tz().format_many([row['date'] for row in rows], '%Y-%m-%d')
+
+        result = defaultdict(lambda: defaultdict(list)) if by_day else defaultdict(list)
+        for index, (row, event) in enumerate(zip(rows, events)):
+            group_id = row[group_field]
+            if not group_id:
+                continue
+            if by_day:
+                result[group_id][days[index]].append(event)
             else:
-                end_dt = end_datetime
+                result[group_id].append(event)
 
-            physician_ids = [int(pid) for pid in physician_ids]
+        _logger.info("Calendar feed returned %s events for %s %s groups", len(events), len(result), group_field)
+        return {group_id: dict(values) for group_id, values in result.items()} if by_day else dict(result)
 
-            appointments = self.search([
+    @api.model
+    def get_calendar_events_by_assignee(self, start_datetime, end_datetime, physician_ids, epoch=False):
+        """Get appointments for calendar display - normalizing timezone"""
+        try:
+            start_dt, end_dt = self._calendar_parse_range(start_datetime, end_datetime)
+            physician_ids = [int(pid) for pid in physician_ids]
+            return self._get_calendar_event_feed([
                 ('date', '>=', start_dt),
                 ('date', '<=', end_dt),
                 ('physician_id', 'in', physician_ids)
-            ])
-
-            _logger.info("Found %s appointments for physicians %s in range %s to %s",
-                         len(appointments), physician_ids, start_datetime, end_datetime)
-
-            result = defaultdict(list)
-            for appointment in appointments:
-                if appointment.physician_id and appointment.physician_id.id in physician_ids:
-                    partner_names = []
-                    patient_name = ""
-                    patient_phone = ""
-                    patient_mobile = ""
-                    patient_id = None
-                    patient_gender = None
-
-                    if appointment.patient_id:
-                        patient_id = appointment.patient_id.id
-                        patient_name = appointment.patient_id.name
-                        patient_gender = appointment.patient_id.gender
-                        if appointment.patient_id.partner_id:
-                            partner_names = [appointment.patient_id.partner_id.name]
-                        patient_phone = appointment.patient_id.phone or ""
-                        patient_mobile = appointment.patient_id.mobile or ""
-
-                    local_start = appointment.date
-                    local_stop = appointment.date_to or appointment.date + timedelta(hours=1)
-
-                    if appointment.date:
-                        local_start = appointment.date + timedelta(hours=3)
-                        _logger.debug("Appointment %s - UTC start: %s, Local start: %s",
-                                      appointment.id, appointment.date, local_start)
-
-                    if appointment.date_to:
-                        local_stop = appointment.date_to + timedelta(hours=3)
-                        _logger.debug("Appointment %s - UTC end: %s, Local end: %s",
-                                      appointment.id, appointment.date_to, local_stop)
-                    else:
-                        local_stop = local_start + timedelta(hours=1)
-
-                    event_data = {
-                        'id': appointment.id,
-                        'name': appointment.name or 'Appointment',
-                        'start': local_start.strftime('%Y-%m-%d %H:%M:%S') if isinstance(local_start,
-                                                                                         datetime) else local_start,
-                        'stop': local_stop.strftime('%Y-%m-%d %H:%M:%S') if isinstance(local_stop,
-                                                                                       datetime) else local_stop,
-                        'duration': appointment.duration,
-                        'doctor_id': appointment.physician_id.id,
-                        'appointment_status': appointment.state,
-                        'doctor_name': appointment.physician_id.name,
-                        'doctor_code': appointment.physician_id.code or '',
-                        'doctor_specialty': appointment.department_id.name or 'No Department',
-                        'partner_names': partner_names,
-                        'patient_name': patient_name,
-                        'patient_phone': patient_phone,
-                        'patient_mobile': patient_mobile,
-                        'patient_id': [patient_id, patient_name] if patient_id else None,
-                        'patient_gender': patient_gender,
-                        'cabin_name': appointment.cabin_id.name if appointment.cabin_id else '',
-                        'cabin_id': appointment.cabin_id.id if appointment.cabin_id else None,
-                        'color_index': self._get_appointment_color(appointment.state),
-                        'is_all_day': False,
-                        'description': appointment.notes or '',
-                        'consultation_type': appointment.consultation_type or 'consultation',
-                        'treatment_schedule_id': appointment.treatment_schedule_id.id if appointment.treatment_schedule_id else None,
-                        'treatment_schedule_line_id': appointment.treatment_schedule_line_id.id if appointment.treatment_schedule_line_id else None,
-                        'treatment_week': appointment.treatment_week or '',
-                        'notes': appointment.notes or '',
-                        'patient_code': appointment.patient_id.code if appointment.patient_id and appointment.patient_id.code else '',
-
-                    }
-                    result[appointment.physician_id.id].append(event_data)
-
-            _logger.info("Returning %s events for %s physicians",
-                         sum(len(v) for v in result.values()), len(result))
-            return dict(result)
+            ], 'physician_id', epoch=epoch)
 
         except Exception as e:
             _logger.error("Error in get_calendar_events_by_assignee: %s", str(e))
             return {}
 
     @api.model
-    def get_calendar_events_by_cabin(self, start_datetime, end_datetime, cabin_ids):
+    def get_calendar_events_by_cabin(self, start_datetime, end_datetime, cabin_ids, epoch=False):
         """Get appointments for calendar display grouped by cabin - normalizing timezone"""
         try:
-            _logger.info("Getting calendar events by cabin - Input: start=%s, end=%s, cabins=%s",
-                         start_datetime, end_datetime, cabin_ids)
-
-            if isinstance(start_datetime, str):
-                start_dt = fields.Datetime.from_string(start_datetime)
-            else:
-                start_dt = start_datetime
-
-            if isinstance(end_datetime, str):
-                end_dt = fields.Datetime.from_string(end_datetime)
-            else:
-                end_dt = end_datetime
-
+            start_dt, end_dt = self._calendar_parse_range(start_datetime, end_datetime)
             cabin_ids = [int(cid) for cid in cabin_ids]
-
-            appointments = self.search([
+            return self._get_calendar_event_feed([
                 ('date', '>=', start_dt),
                 ('date', '<=', end_dt),
                 ('cabin_id', 'in', cabin_ids)
-            ])
-
-            _logger.info("Found %s appointments for cabins %s in range %s to %s",
-                         len(appointments), cabin_ids, start_datetime, end_datetime)
-
-            result = defaultdict(list)
-            for appointment in appointments:
-                if appointment.cabin_id and appointment.cabin_id.id in cabin_ids:
-                    partner_names = [];
-                    patient_name = ""
-                    patient_phone = ""
-                    patient_mobile = ""
-                    patient_gender = None
-
-                    if appointment.patient_id:
-                        patient_name = appointment.patient_id.name
-                        patient_gender = appointment.patient_id.gender
-                        if appointment.patient_id.partner_id:
-                            partner_names = [appointment.patient_id.partner_id.name]
-                        patient_phone = appointment.patient_id.phone or ""
-                        patient_mobile = appointment.patient_id.mobile or ""
-
-                    local_start = appointment.date + timedelta(hours=3) if appointment.date else appointment.date
-                    local_stop = appointment.date_to + timedelta(hours=3) if appointment.date_to else (
-                        appointment.date + timedelta(hours=1) if appointment.date else None)
-
-                    if appointment.date:
-                        _logger.debug("Appointment %s - UTC start: %s, Local start: %s",
-                                      appointment.id, appointment.date, local_start)
-
-                    if appointment.date_to:
-                        local_stop = appointment.date_to + timedelta(hours=3)
-                        _logger.debug("Appointment %s - UTC end: %s, Local end: %s",
-                                      appointment.id, appointment.date_to, local_stop)
-                    else:
-                        local_stop = local_start + timedelta(hours=1)
-
-                    event_data = {
-                        'id': appointment.id,
-                        'name': appointment.name or 'Appointment',
-                        'start': local_start.strftime('%Y-%m-%d %H:%M:%S') if isinstance(local_start,
-                                                                                         datetime) else local_start,
-                        'stop': local_stop.strftime('%Y-%m-%d %H:%M:%S') if isinstance(local_stop,
-                                                                                       datetime) else local_stop,
-                        'duration': appointment.duration,
-                        'cabin_id': appointment.cabin_id.id,
-                        'appointment_status': appointment.state,
-                        'cabin_name': appointment.cabin_id.name,
-                        'doctor_name': appointment.physician_id.name if appointment.physician_id else '',
-                        'doctor_specialty': appointment.department_id.name if appointment.department_id else 'No Department',
-                        'partner_names': partner_names,
-                        'patient_name': patient_name,
-                        'patient_code': appointment.patient_id.code if appointment.patient_id and appointment.patient_id.code else '',
-                        'patient_phone': patient_phone,
-                        'patient_mobile': patient_mobile,
-                        'patient_gender': patient_gender,
-                        'color_index': self._get_appointment_color(appointment.state),
-                        'is_all_day': False,
-                        'description': appointment.notes or '',
-                        'consultation_type': appointment.consultation_type or 'consultation',
-                        'treatment_schedule_id': appointment.treatment_schedule_id.id if appointment.treatment_schedule_id else None,
-                        'treatment_schedule_line_id': appointment.treatment_schedule_line_id.id if appointment.treatment_schedule_line_id else None,
-                        'treatment_week': appointment.treatment_week or '',
-                        'notes': appointment.notes or '',
-                    }
-                    result[appointment.cabin_id.id].append(event_data)
-
-            _logger.info("Returning events for %s cabins", len(result))
-            return dict(result)
+            ], 'cabin_id', epoch=epoch)
 
         except Exception as e:
             _logger.error("Error in get_calendar_events_by_cabin: %s", str(e))
             return {}
 
     @api.model
-    def get_week_events_by_assignee(self, week_start, physician_ids):
+    def get_week_events_by_assignee(self, week_start, physician_ids, epoch=False):
         """Get week appointments for calendar display - normalizing timezone"""
         try:
-            _logger.info("Getting week events by assignee - Input: week_start=%s, physicians=%s",
-                         week_start, physician_ids)
-
-            if 'T' in week_start:
-                week_start = week_start.split('T')[0]
-
-            week_start_dt = datetime.strptime(week_start, '%Y-%m-%d')
-            week_end = week_start_dt + timedelta(days=7)
-            week_end_str = week_end.strftime('%Y-%m-%d 23:59:59')
-            week_start_str = week_start_dt.strftime('%Y-%m-%d 00:00:00')
-
+            week_start_dt, week_end_dt = self._calendar_week_range(week_start)
             physician_ids = [int(pid) for pid in physician_ids]
-
-            appointments = self.search([
-                ('date', '>=', week_start_str),
-                ('date', '<=', week_end_str),
+            return self._get_calendar_event_feed([
+                ('date', '>=', week_start_dt),
+                ('date', '<=', week_end_dt),
                 ('physician_id', 'in', physician_ids)
-            ])
-
-            _logger.info("Found %s appointments for physicians %s in week starting %s",
-                         len(appointments), physician_ids, week_start)
-
-            result = defaultdict(lambda: defaultdict(list))
-            for appointment in appointments:
-                if appointment.physician_id and appointment.physician_id.id in physician_ids:
-                    appointment_date = appointment.date
-                    if isinstance(appointment_date, str):
-                        if 'T' in appointment_date:
-                            event_date = appointment_date.split('T')[0]
-                        else:
-                            event_date = appointment_date.split(' ')[0]
-                    else:
-                        event_date = appointment_date.strftime('%Y-%m-%d')
-
-                    partner_names = [];
-                    patient_name = ""
-                    patient_phone = ""
-                    patient_mobile = ""
-                    patient_gender = None
-
-                    if appointment.patient_id:
-                        patient_name = appointment.patient_id.name
-                        patient_gender = appointment.patient_id.gender
-                        if appointment.patient_id.partner_id:
-                            partner_names = [appointment.patient_id.partner_id.name]
-                        patient_phone = appointment.patient_id.phone or ""
-                        patient_mobile = appointment.patient_id.mobile or ""
-
-                    local_start = appointment.date + timedelta(hours=3) if appointment.date else appointment.date
-                    local_stop = appointment.date_to + timedelta(hours=3) if appointment.date_to else (
-                        appointment.date + timedelta(hours=1) if appointment.date else None)
-
-                    if appointment.date:
-                        _logger.debug("Appointment %s - Week view - UTC start: %s, Local start: %s",
-                                      appointment.id, appointment.date, local_start)
-
-                    event_data = {
-                        'id': appointment.id,
-                        'name': appointment.name or 'Appointment',
-                        'start': local_start.strftime('%Y-%m-%d %H:%M:%S') if isinstance(local_start,
-                                                                                         datetime) else local_start,
-                        'stop': local_stop.strftime('%Y-%m-%d %H:%M:%S') if isinstance(local_stop,
-                                                                                       datetime) else local_stop,
-                        'duration': appointment.duration,
-                        'appointment_status': appointment.state,
-                        'doctor_id': appointment.physician_id.id,
-                        'doctor_name': appointment.physician_id.name,
-                        'doctor_code': appointment.physician_id.code or '',
-                        'doctor_specialty': appointment.department_id.name or 'No Department',
-                        'partner_names': partner_names,
-                        'patient_name': patient_name,
-                        'patient_phone': patient_phone,
-                        'patient_mobile': patient_mobile,
-                        'patient_gender': patient_gender,
-                        'cabin_name': appointment.cabin_id.name if appointment.cabin_id else '',
-                        'color_index': self._get_appointment_color(appointment.state),
-                        'is_all_day': False,
-                        'consultation_type': appointment.consultation_type or 'consultation',
-                        'treatment_schedule_id': appointment.treatment_schedule_id.id if appointment.treatment_schedule_id else None,
-                        'treatment_schedule_line_id': appointment.treatment_schedule_line_id.id if appointment.treatment_schedule_line_id else None,
-                        'treatment_week': appointment.treatment_week or '',
-                        'notes': appointment.notes or '',
-                    }
-                    result[appointment.physician_id.id][event_date].append(event_data)
-
-            _logger.info("Week events prepared for %s physicians", len(result))
-            return dict(result)
+            ], 'physician_id', by_day=True, epoch=epoch)
 
         except Exception as e:
             _logger.error("Error in get_week_events_by_assignee: %s", str(e))
             return {}
 
     @api.model
-    def get_week_events_by_cabin(self, week_start, cabin_ids):
+    def get_week_events_by_cabin(self, week_start, cabin_ids, epoch=False):
         """Get week appointments for calendar display grouped by cabin - normalizing timezone"""
         try:
-            _logger.info("Getting week events by cabin - Input: week_start=%s, cabins=%s",
-                         week_start, cabin_ids)
-
-            if 'T' in week_start:
-                week_start = week_start.split('T')[0]
+            week_start_dt, week_end_dt = self._calendar_week_range(week_start)
+            cabin_ids = [int(cid) for cid in cabin_ids]
+            return self._get_calendar_event_feed([
+                ('date', '>=', week_start_dt),
+                ('date', '<=', week_end_dt),
+                ('cabin_id', 'in', cabin_ids)
+            ], 'cabin_id', by_day=True, epoch=epoch)
 
-            week_start_dt = datetime.strptime(week_start, '%Y-%m-%d')
-            week_end = week_start_dt + timedelta(days=7)
-            week_end_str = week_end.strftime('%Y-%m-d 23:59:59')
-            week_start_str = week_start_dt.strftime('%Y-%m-%d 00:00:00')
+        except Exception as e:
+            _logger.error("Error in get_week_events_by_cabin: %s", str(e))
+            return {}
 
+    @api.model
+    def get_calendar_events_by_cabin_and_physician(self, start_datetime, end_datetime, cabin_ids, physician_ids, epoch=False):
+        """Get appointments for calendar display grouped by cabin and filtered by physician - normalizing timezone"""
+        try:
+            start_dt, end_dt = self._calendar_parse_range(start_datetime, end_datetime)
             cabin_ids = [int(cid) for cid in cabin_ids]
+            physician_ids = [int(pid) for pid in physician_ids]
 
-            appointments = self.search([
-                ('date', '>=', week_start_str),
-                ('date', '<=', week_end_str),
+            domain = [
+                ('date', '>=', start_dt),
+                ('date', '<=', end_dt),
                 ('cabin_id', 'in', cabin_ids)
-            ])
-
-            _logger.info("Found %s appointments for cabins %s in week starting %s",
-                         len(appointments), cabin_ids, week_start)
-
-            result = defaultdict(lambda: defaultdict(list))
-            for appointment in appointments:
-                if appointment.cabin_id and appointment.cabin_id.id in cabin_ids:
-                    appointment_date = appointment.date
-                    if isinstance(appointment_date, str):
-                        if 'T' in appointment_date:
-                            event_date = appointment_date.split('T')[0]
-                        else:
-                            event_date = appointment_date.split(' ')[0]
-                    else:
-                        event_date = appointment_date.strftime('%Y-%m-%d')
-
-                    partner_names = [];
-                    patient_name = ""
-                    patient_phone = ""
-                    patient_mobile = ""
-                    patient_gender = None
-
-                    if appointment.patient_id:
-                        patient_name = appointment.patient_id.name
-                        patient_gender = appointment.patient_id.gender
-                        if appointment.patient_id.partner_id:
-                            partner_names = [appointment.patient_id.partner_id.name]
-                        patient_phone = appointment.patient_id.phone or ""
-                        patient_mobile = appointment.patient_id.mobile or ""
-
-                    local_start = appointment.date + timedelta(hours=3) if appointment.date else appointment.date
-                    local_stop = appointment.date_to + timedelta(hours=3) if appointment.date_to else (
-                        appointment.date + timedelta(hours=1) if appointment.date else None)
-
-                    if appointment.date:
-                        _logger.debug("Appointment %s - Cabin week view - UTC start: %s, Local start: %s",
-                                      appointment.id, appointment.date, local_start)
-
-                    event_data = {
-                        'id': appointment.id,
-                        'name': appointment.name or 'Appointment',
-                        'start': local_start.strftime('%Y-%m-%d %H:%M:%S') if isinstance(local_start,
-                                                                                         datetime) else local_start,
-                        'stop': local_stop.strftime('%Y-%m-%d %H:%M:%S') if isinstance(local_stop,
-                                                                                       datetime) else local_stop,
-                        'duration': appointment.duration,
-                        'appointment_status': appointment.state,
-                        'cabin_id': appointment.cabin_id.id,
-                        'cabin_name': appointment.cabin_id.name,
-                        'doctor_name': appointment.physician_id.name or '',
-                        'doctor_specialty': appointment.department_id.name or 'No Department',
-                        'partner_names': partner_names,
-                        'patient_name': patient_name,
-                        'patient_phone': patient_phone,
-                        'patient_mobile': patient_mobile,
-                        'patient_gender': patient_gender,
-                        'color_index': self._get_appointment_color(appointment.state),
-                        'is_all_day': False,
-                        'consultation_type': appointment.consultation_type or 'consultation',
-                        'treatment_schedule_id': appointment.treatment_schedule_id.id if appointment.treatment_schedule_id else None,
-                        'treatment_schedule_line_id': appointment.treatment_schedule_line_id.id if appointment.treatment_schedule_line_id else None,
-                        'treatment_week': appointment.treatment_week or '',
-                        'notes': appointment.notes or '',
-                    }
-                    result[appointment.cabin_id.id][event_date].append(event_data)
+            ]
+            if physician_ids:
+                domain.append(('physician_id', 'in', physician_ids))
+            return self._get_calendar_event_feed(domain, 'cabin_id', epoch=epoch)
 
-            _logger.info("Week cabin events prepared for %s cabins", len(result))
-            return dict(result)
+        except Exception as e:
+            _logger.error("Error in get_calendar_events_by_cabin_and_physician: %s", str(e))
+            return {}
+
+    @api.model
+    def get_calendar_events_since(self, since, physician_ids=None, cabin_ids=None,
+                                  start_datetime=None, end_datetime=None, epoch=False):
+        """Get the appointments created, changed or removed since the ``since`` watermark.
+
+        Events are grouped by cabin when ``cabin_ids`` is given, by physician otherwise.
+        ``deleted`` lists the ids of appointments that were deleted or moved away
+        from the filtered physicians/cabins; clients drop them before merging
+        ``events`` and pass ``watermark`` back on the next call.
+        """
+        try:
+            watermark = fields.Datetime.now()
+            since_dt = fields.Datetime.from_string(since) if isinstance(since, str) else since
+            # Transactions still running at the previous call commit with an older write_date.
+            since_dt = since_dt - self._CALENDAR_SYNC_OVERLAP
+            physician_ids = [int(pid) for pid in physician_ids or []]
+            cabin_ids = [int(cid) for cid in cabin_ids or []]
+
+            domain = [('write_date', '>=', since_dt)]
+            tombstone_domain = [('create_date', '>=', since_dt)]
+            if cabin_ids:
+                domain.append(('cabin_id', 'in', cabin_ids))
+                tombstone_domain.append(('cabin_id', 'in', cabin_ids))
+            if physician_ids:
+                domain.append(('physician_id', 'in', physician_ids))
+                if not cabin_ids:
+                    tombstone_domain.append(('physician_id', 'in', physician_ids))
+            start_dt, end_dt = self._calendar_parse_range(start_datetime, end_datetime)
+            if start_dt:
+                domain.append(('date', '>=', start_dt))
+            if end_dt:
+                domain.append(('date', '<=', end_dt))
+
+            tombstones = self.env['calendar.appointment.tombstone'].sudo().search_read(
+                tombstone_domain, ['appointment_id'])
+            return {
+                'watermark': fields.Datetime.to_string(watermark),
+                'events': self._get_calendar_event_feed(domain, 'cabin_id' if cabin_ids else 'physician_id',
+                                                       epoch=epoch),
+                'deleted': sorted({tombstone['appointment_id'] for tombstone in tombstones}),
+            }
 
         except Exception as e:
-            _logger.error("Error in get_week_events_by_cabin: %s", str(e))
+            _logger.error("Error in get_calendar_events_since: %s", str(e))
             return {}
 
     @api.model
@@ -935,25 +740,12 @@ class AppointmentCalendar(models.Model):
                 appointment.treatment_week or 'None',
                 appointment.notes or 'None')
 
-            if new_start:
-                if len(new_start) == 16:
-                    new_start += ':00'
-
-                _logger.info("📝 LOG: New local start time: %s", new_start)
-                new_start_dt = fields.Datetime.from_string(new_start)
-                new_start_dt = new_start_dt - timedelta(hours=3)
-                update_vals['date'] = fields.Datetime.to_string(new_start_dt)
-                _logger.info("📝 LOG: Converted UTC start time: %s", update_vals['date'])
-
-            if new_stop:
-                if len(new_stop) == 16:
-                    new_stop += ':00'
-
-                _logger.info("📝 LOG: New local end time: %s", new_stop)
-                new_stop_dt = fields.Datetime.from_string(new_stop)
-                new_stop_dt = new_stop_dt - timedelta(hours=3)
-                update_vals['date_to'] = fields.Datetime.to_string(new_stop_dt)
-                _logger.info("📝 LOG: Converted UTC end time: %s", update_vals['date_to'])
+            # Local times are passed as datetimes so that write does not convert them again
+            new_start_dt, new_stop_dt = self._calendar_tz().parse_many([new_start, new_stop])
+            if new_start_dt:
+                update_vals['date'] = new_start_dt
+            if new_stop_dt:
+                update_vals['date_to'] = new_stop_dt
 
             if new_physician_id and new_physician_id != appointment.physician_id.id:
                 update_vals['physician_id'] = new_physician_id
@@ -1008,206 +800,95 @@ class AppointmentCalendar(models.Model):
         }
         return color_map.get(state, 1)
 
-    @api.model
-    def get_calendar_events_by_cabin_and_physician(self, start_datetime, end_datetime, cabin_ids, physician_ids):
-        """Get appointments for calendar display grouped by cabin and filtered by physician - normalizing timezone"""
-        try:
-            _logger.info(
-                "Getting calendar events by cabin and physician - Input: start=%s, end=%s, cabins=%s, physicians=%s",
-                start_datetime, end_datetime, cabin_ids, physician_ids)
-
-            if isinstance(start_datetime, str):
-                start_dt = fields.Datetime.from_string(start_datetime)
-            else:
-                start_dt = start_datetime
-
-            if isinstance(end_datetime, str):
-                end_dt = fields.Datetime.from_string(end_datetime)
-            else:
-                end_dt = end_datetime
-
-            cabin_ids = [int(cid) for cid in cabin_ids]
-            physician_ids = [int(pid) for pid in physician_ids]
-
-            domain = [
-                ('date', '>=', start_dt),
-                ('date', '<=', end_dt),
-                ('cabin_id', 'in', cabin_ids)
-            ]
-
-            if physician_ids:
-                domain.append(('physician_id', 'in', physician_ids))
-
-            appointments = self.search(domain)
-
-            _logger.info("Found %s appointments for cabins %s and physicians %s in range %s to %s",
-                         len(appointments), cabin_ids, physician_ids, start_datetime, end_datetime)
-
-            result = defaultdict(list)
-            for appointment in appointments:
-                if appointment.cabin_id and appointment.cabin_id.id in cabin_ids:
-                    partner_names = [];
-                    patient_name = ""
-                    patient_phone = ""
-                    patient_mobile = ""
-                    patient_gender = None
-
-                    if appointment.patient_id:
-                        patient_name = appointment.patient_id.name
-                        patient_gender = appointment.patient_id.gender
-                        if appointment.patient_id.partner_id:
-                            partner_names = [appointment.patient_id.partner_id.name]
-                        patient_phone = appointment.patient_id.phone or ""
-                        patient_mobile = appointment.patient_id.mobile or ""
-
-                    local_start = appointment.date + timedelta(hours=3) if appointment.date else appointment.date
-                    local_stop = appointment.date_to + timedelta(hours=3) if appointment.date_to else (
-                        appointment.date + timedelta(hours=1) if appointment.date else None)
-
-                    if appointment.date:
-                        _logger.debug("Appointment %s - Cabin/physician view - UTC start: %s, Local start: %s",
-                                      appointment.id, appointment.date, local_start)
-
-                    event_data = {
-                        'id': appointment.id,
-                        'name': appointment.name or 'Appointment',
-                        'start': local_start.strftime('%Y-%m-%d %H:%M:%S') if isinstance(local_start,
-                                                                                         datetime) else local_start,
-                        'stop': local_stop.strftime('%Y-%m-%d %H:%M:%S') if isinstance(local_stop,
-                                                                                       datetime) else local_stop,
-                        'duration': appointment.duration,
-                        'cabin_id': appointment.cabin_id.id,
-                        'appointment_status': appointment.state,
-                        'cabin_name': appointment.cabin_id.name,
-                        'doctor_name': appointment.physician_id.name if appointment.physician_id else '',
-                        'doctor_specialty': appointment.department_id.name if appointment.department_id else 'No Department',
-                        'partner_names': partner_names,
-                        'patient_name': patient_name,
-                        'patient_code': appointment.patient_id.code if appointment.patient_id and appointment.patient_id.code else '',
-                        'patient_phone': patient_phone,
-                        'patient_mobile': patient_mobile,
-                        'patient_gender': patient_gender,
-                        'color_index': self._get_appointment_color(appointment.state),
-                        'is_all_day': False,
-                        'description': appointment.notes or '',
-                        'consultation_type': appointment.consultation_type or 'consultation',
-                        'treatment_schedule_id': appointment.treatment_schedule_id.id if appointment.treatment_schedule_id else None,
-                        'treatment_schedule_line_id': appointment.treatment_schedule_line_id.id if appointment.treatment_schedule_line_id else None,
-                        'treatment_week': appointment.treatment_week or '',
-                        'notes': appointment.notes or '',
-                    }
-                    result[appointment.cabin_id.id].append(event_data)
-
-            _logger.info("Returning events for %s cabins", len(result))
-            return dict(result)
-
-        except Exception as e:
-            _logger.error("Error in get_calendar_events_by_cabin_and_physician: %s", str(e))
-            return {}
-
 
 class Physician(models.Model):
     _inherit = 'hms.physician'
 
     employee_id = fields.Many2one('hr.employee', string='Related Employee')
 
+    @api.model
+    def _get_employees_by_physician(self, physicians):
+        """Map physician ids to their employee, with one search for those linked by user only"""
+        employees = {physician.id: physician.employee_id for physician in physicians if physician.employee_id}
+        missing = physicians.filtered(lambda physician: not physician.employee_id and physician.user_id)
+        if missing:
+            employee_by_user = {employee.user_id.id: employee for employee in self.env['hr.employee'].search([
+                ('user_id', 'in', missing.user_id.ids)
+            ])}
+            for physician in missing:
+                if physician.user_id.id in employee_by_user:
+                    employees[physician.id] = employee_by_user[physician.user_id.id]
+        return employees
+
+    @api.model
+    def _get_leave_periods(self, employee_ids, start_date, end_date):
+        """Expand the validated leaves of ``employee_ids`` over the range of local dates, read in one query.
+
+        Leaves are stored in UTC, they are split into days and formatted in the
+        calendar timezone, like the break periods.
+        """
+        periods = defaultdict(list)
+        if not employee_ids or 'hr.leave' not in self.env:
+            return periods
+
+        tz = self.env['hms.appointment']._calendar_tz()
+        leaves = self.env['hr.leave'].search_read([
+            ('employee_id', 'in', employee_ids),
+            ('state', '=', 'validate'),
+            ('date_from', '<', tz.to_utc(datetime.combine(end_date + timedelta(days=1), datetime.min.time()))),
+            ('date_to', '>', tz.to_utc(datetime.combine(start_date, datetime.min.time()))),
+        ], ['employee_id', 'date_from', 'date_to', 'holiday_status_id'])
+
+        for leave in leaves:
+            start_dt = tz.to_local(leave['date_from'])
+            end_dt = tz.to_local(leave['date_to'])
+            leave_name = leave['holiday_status_id'] and leave['holiday_status_id'][1] or 'Leave'
+            current_date = max(start_dt.date(), start_date)
+            while current_date <= min(end_dt.date(), end_date):
+                periods[leave['employee_id'][0]].append({
+                    'date': current_date.strftime('%Y-%m-%d'),
+                    'start_time': start_dt.strftime('%H:%M') if start_dt.date() == current_date else '00:00',
+                    'end_time': end_dt.strftime('%H:%M') if end_dt.date() == current_date else '23:59',
+                    'day_name': current_date.strftime('%A'),
+                    'type': 'leave',
+                    'leave_name': leave_name
+                })
+                current_date += timedelta(days=1)
+        return periods
+
     @api.model
     def get_break_periods_for_range(self, physician_ids, start_date, end_date):
-        """Get break and leave periods for physicians in date range"""
-        try:
-            result = {}
+        """Get break and leave periods for physicians in date range.
 
+        Each working schedule is expanded once per call from its cached
+        weekly pattern, and the leaves of all physicians are read together.
+        """
+        try:
             if not isinstance(physician_ids, list):
                 physician_ids = [physician_ids]
 
-            physician_ids = [int(pid) for pid in physician_ids]
-
-            physicians = self.browse(physician_ids)
+            physicians = self.browse([int(pid) for pid in physician_ids])
+            start_date = fields.Date.to_date(start_date)
+            end_date = fields.Date.to_date(end_date)
+            days = date_range_days(start_date, end_date)
 
-            for physician in physicians:
-                periods = []
-
-                if physician.resource_calendar_id:
-                    current_date = fields.Date.from_string(start_date)
-                    end_date_obj = fields.Date.from_string(end_date)
-
-                    while current_date <= end_date_obj:
-                        day_of_week = current_date.weekday()
-                        break_periods = physician.resource_calendar_id.attendance_ids.filtered(
-                            lambda a: int(a.dayofweek) == day_of_week and a.is_break == True
-                        )
+            expanded = {}
+            for calendar in physicians.resource_calendar_id:
+                expanded[calendar.id] = expand_weekly_pattern(
+                    self.env['resource.calendar']._get_weekly_break_pattern(calendar.id), days)
 
-                        for break_period in break_periods:
-                            def float_to_time(float_hour):
-                                hours = int(float_hour)
-                                minutes = int((float_hour - hours) * 60)
-                                return f"{hours:02d}:{minutes:02d}"
-
-                            periods.append({
-                                'date': current_date.strftime('%Y-%m-%d'),
-                                'start_time': float_to_time(break_period.hour_from),
-                                'end_time': float_to_time(break_period.hour_to),
-                                'day_name': current_date.strftime('%A'),
-                                'type': 'break'
-                            })
-
-                        current_date += timedelta(days=1)
-
-                employee = physician.employee_id
-
-                if not employee and physician.user_id:
-                    employee = self.env['hr.employee'].search([
-                        ('user_id', '=', physician.user_id.id)
-                    ], limit=1)
-
-                if employee:
-                    leaves = self.env['hr.leave'].search([
-                        ('employee_id', '=', employee.id),
-                        ('state', '=', 'validate'),
-                        ('date_from', '<=', end_date + ' 23:59:59'),
-                        ('date_to', '>=', start_date + ' 00:00:00')
-                    ])
-
-                    for leave in leaves:
-                        leave_start_date = fields.Date.from_string(leave.date_from)
-                        leave_end_date = fields.Date.from_string(leave.date_to)
-
-                        current_date = leave_start_date
-                        while current_date <= leave_end_date:
-                            date_str = current_date.strftime('%Y-%m-%d')
-
-                            if current_date >= fields.Date.from_string(start_date) and \
-                                    current_date <= fields.Date.from_string(end_date):
-
-                                leave_start_time = '00:00'
-                                leave_end_time = '23:59'
-
-                                if leave.date_from and leave.date_to:
-                                    start_dt = fields.Datetime.from_string(leave.date_from)
-                                    end_dt = fields.Datetime.from_string(leave.date_to)
-
-                                    if start_dt.date() == current_date and end_dt.date() == current_date:
-                                        leave_start_time = start_dt.strftime('%H:%M')
-                                        leave_end_time = end_dt.strftime('%H:%M')
-                                    elif start_dt.date() == current_date:
-                                        leave_start_time = start_dt.strftime('%H:%M')
-                                    elif end_dt.date() == current_date:
-                                        leave_end_time = end_dt.strftime('%H:%M')
-
-                                periods.append({
-                                    'date': date_str,
-                                    'start_time': leave_start_time,
-                                    'end_time': leave_end_time,
-                                    'day_name': current_date.strftime('%A'),
-                                    'type': 'leave',
-                                    'leave_name': leave.holiday_status_id.name or 'Leave'
-                                })
-
-                            current_date += timedelta(days=1)
+            employees = self._get_employees_by_physician(physicians)
+            leave_periods = self._get_leave_periods(
+                list({employee.id for employee in employees.values()}), start_date, end_date)
 
+            result = {}
+            for physician in physicians:
+                periods = list(expanded.get(physician.resource_calendar_id.id, []))
+                if physician.id in employees:
+                    periods += leave_periods.get(employees[physician.id].id, [])
                 result[physician.id] = periods
 
-            _logger.info("Break and leave periods loaded for physicians %s: %s", physician_ids, result)
+            _logger.debug("Break and leave periods loaded for %s physicians", len(result))
             return result
         except Exception as e:
             _logger.error("Error in get_break_periods_for_range: %s", str(e))
@@ -1219,51 +900,18 @@ class AppointmentCabin(models.Model):
 
     @api.model
     def get_cabin_break_periods_for_range(self, cabin_ids, start_date, end_date):
-        """Get break periods for cabins in date range"""
+        """Get break periods for cabins in date range, from their cached weekly pattern"""
         try:
-            result = {}
-
             if not isinstance(cabin_ids, list):
                 cabin_ids = [cabin_ids]
 
-            cabin_ids = [int(cid) for cid in cabin_ids]
-
-            cabins = self.browse(cabin_ids)
-
-            for cabin in cabins:
-                periods = []
-
-                if cabin.cabin_working_hour_ids:
-                    current_date = fields.Date.from_string(start_date)
-                    end_date_obj = fields.Date.from_string(end_date)
-
-                    while current_date <= end_date_obj:
-                        day_of_week = str(current_date.weekday())
-
-                        break_periods = cabin.cabin_working_hour_ids.filtered(
-                            lambda a: a.day_code == day_of_week and a.is_break == True
-                        )
-
-                        for breakPeriod in break_periods:
-                            def float_to_time(float_hour):
-                                hours = int(float_hour)
-                                minutes = int((float_hour - hours) * 60)
-                                return f"{hours:02d}:{minutes:02d}"
-
-                            periods.append({
-                                'date': current_date.strftime('%Y-%m-%d'),
-                                'start_time': float_to_time(breakPeriod.time_from),
-                                'end_time': float_to_time(breakPeriod.time_to),
-                                'day_name': current_date.strftime('%A'),
-                                'type': 'break'
-                            })
-
-                        current_date += timedelta(days=1)
-
-                result[cabin.id] = periods
+            days = date_range_days(fields.Date.to_date(start_date), fields.Date.to_date(end_date))
+            result = {}
+            for cabin_id in [int(cid) for cid in cabin_ids]:
+                result[cabin_id] = expand_weekly_pattern(self._get_weekly_break_pattern(cabin_id), days)
 
-            _logger.info("Cabin break periods loaded: %s", result)
+            _logger.debug("Break periods loaded for %s cabins", len(result))
             return result
         except Exception as e:
             _logger.error("Error in get_cabin_break_periods_for_range: %s", str(e))
-            return {}
\ No newline at end of file
+            return {}
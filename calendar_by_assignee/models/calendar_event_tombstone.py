@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+from datetime import timedelta
+
+
+class CalendarAppointmentTombstone(models.Model):
+    _name = 'calendar.appointment.tombstone'
+    _description = 'Calendar Appointment Tombstone'
+    _order = 'create_date, id'
+
+    # Plain integers: the appointment and its former owners may no longer exist.
+    appointment_id = fields.Integer(string='Appointment ID', required=True)
+    physician_id = fields.Integer(string='Former Physician ID', index=True)
+    cabin_id = fields.Integer(string='Former Cabin ID', index=True)
+    reason = fields.Selection([
+        ('deleted', 'Deleted'),
+        ('moved', 'Moved'),
+    ], string='Reason', required=True, default='deleted')
+    create_date = fields.Datetime(index=True)
+
+    @api.model
+    def _record(self, appointments, reason='deleted'):
+        """Remember where ``appointments`` were shown before leaving the calendar"""
+        if not appointments:
+            return self.browse()
+        return self.sudo().create([{
+            'appointment_id': appointment.id,
+            'physician_id': appointment.physician_id.id,
+            'cabin_id': appointment.cabin_id.id,
+            'reason': reason,
+        } for appointment in appointments])
+
+    @api.autovacuum
+    def _gc_tombstones(self):
+        """Tombstones are only useful to clients that synced recently"""
+        limit_date = fields.Datetime.now() - timedelta(days=7)
+        self.sudo().search([('create_date', '<', limit_date)]).unlink()
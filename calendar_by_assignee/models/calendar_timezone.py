@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+from bisect import bisect_right
+from datetime import datetime
+import pytz
+
+EPOCH = datetime(1970, 1, 1)
+CALENDAR_DT_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class CalendarTimezone(object):
+    """Converts naive UTC datetimes to and from one local timezone.
+
+    The UTC offset only changes at the DST transitions of the zone, so it is
+    looked up once per transition window and reused for every datetime that
+    falls in the same window.
+    """
+
+    def __init__(self, tz_name):
+        self.name = tz_name
+        self.tz = pytz.timezone(tz_name)
+        # Only DstTzInfo zones have transitions, static zones keep one offset.
+        self.transitions = getattr(self.tz, '_utc_transition_times', None) or []
+        self.offsets = {}
+
+    def offset(self, utc_dt):
+        """UTC offset of the zone at the naive UTC datetime ``utc_dt``"""
+        window = bisect_right(self.transitions, utc_dt)
+        offset = self.offsets.get(window)
+        if offset is None:
+            offset = self.offsets[window] = pytz.utc.localize(utc_dt).astimezone(self.tz).utcoffset()
+        return offset
+
+    def to_local(self, utc_dt):
+        return utc_dt + self.offset(utc_dt) if utc_dt else utc_dt
+
+    def to_utc(self, local_dt):
+        """Naive UTC datetime of a naive local datetime, non-existent times are shifted forward"""
+        if not local_dt:
+            return local_dt
+        return self.tz.localize(local_dt, is_dst=False).astimezone(pytz.utc).replace(tzinfo=None)
+
+    def format_many(self, utc_dts, dt_format=CALENDAR_DT_FORMAT):
+        """Local strings of a list of UTC datetimes, falsy values are kept as is"""
+        return [(utc_dt + self.offset(utc_dt)).strftime(dt_format) if utc_dt else utc_dt
+                for utc_dt in utc_dts]
+
+    def parse_many(self, local_strings):
+        """UTC datetimes of a list of local datetime strings, falsy values are kept as is"""
+        return [self.to_utc(fields.Datetime.from_string(value + ':00' if len(value) == 16 else value))
+                if value else value for value in local_strings]
+
+    @staticmethod
+    def epoch_many(utc_dts):
+        """Epoch seconds of a list of UTC datetimes, timezone independent"""
+        return [int((utc_dt - EPOCH).total_seconds()) if utc_dt else None for utc_dt in utc_dts]
+
+
+# One converter per timezone, shared by all requests of the worker.
+_calendar_timezones = {}
+
+
+class AppointmentCalendarTimezone(models.Model):
+    _inherit = 'hms.appointment'
+
+    @api.model
+    def _calendar_tz_name(self):
+        """Timezone of the calendar: the user's, else the company's, else UTC"""
+        company = self.env.company
+        tz_name = (self.env.context.get('tz') or self.env.user.tz or company.partner_id.tz
+                   or company.resource_calendar_id.tz or 'UTC')
+        return tz_name if tz_name in pytz.all_timezones_set else 'UTC'
+
+    @api.model
+    def _calendar_tz(self):
+        tz_name = self._calendar_tz_name()
+        converter = _calendar_timezones.get(tz_name)
+        if converter is None:
+            converter = _calendar_timezones[tz_name] = CalendarTimezone(tz_name)
+        return converter
+
+    @api.model
+    def _calendar_vals_to_utc(self, vals):
+        """Convert the local ``date``/``date_to`` strings of ``vals`` to UTC in place"""
+        string_fields = [name for name in ('date', 'date_to') if vals.get(name) and isinstance(vals[name], str)]
+        if string_fields:
+            converted = self._calendar_tz().parse_many([vals[name] for name in string_fields])
+            for name, value in zip(string_fields, converted):
+                vals[name] = fields.Datetime.to_string(value)
+        return vals
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+from odoo import models, api, tools
+from datetime import timedelta
+
+
+def float_to_time(float_hour):
+    hours = int(float_hour)
+    minutes = int(round((float_hour - hours) * 60))
+    return f"{hours:02d}:{minutes:02d}"
+
+
+def expand_weekly_pattern(pattern, days):
+    """Expand a weekly break pattern over ``days``.
+
+    ``pattern`` holds one tuple of ``(start_time, end_time)`` per weekday
+    (Monday first) and ``days`` is the list returned by ``date_range_days``.
+    """
+    periods = []
+    for date_str, weekday, day_name in days:
+        for start_time, end_time in pattern[weekday]:
+            periods.append({
+                'date': date_str,
+                'start_time': start_time,
+                'end_time': end_time,
+                'day_name': day_name,
+                'type': 'break'
+            })
+    return periods
+
+
+def date_range_days(start_date, end_date):
+    """Return ``(date string, weekday, day name)`` for every day of the range, bounds included"""
+    days = []
+    current_date = start_date
+    while current_date <= end_date:
+        days.append((current_date.strftime('%Y-%m-%d'), current_date.weekday(), current_date.strftime('%A')))
+        current_date += timedelta(days=1)
+    return days
+
+
+class ResourceCalendar(models.Model):
+    _inherit = 'resource.calendar'
+
+    @api.model
+    @tools.ormcache('calendar_id')
+    def _get_weekly_break_pattern(self, calendar_id):
+        """Break periods of a working schedule, one tuple per weekday.
+
+        Cached until an attendance of any working schedule changes.
+        """
+        pattern = [[] for dummy in range(7)]
+        attendances = self.env['resource.calendar.attendance'].sudo().search(
+            [('calendar_id', '=', calendar_id)], order='dayofweek, hour_from')
+        has_break_flag = 'is_break' in attendances._fields
+        for attendance in attendances:
+            if (has_break_flag and attendance.is_break) or attendance.day_period == 'lunch':
+                pattern[int(attendance.dayofweek)].append(
+                    (float_to_time(attendance.hour_from), float_to_time(attendance.hour_to)))
+        return tuple(tuple(day) for day in pattern)
+
+
+class ResourceCalendarAttendance(models.Model):
+    _inherit = 'resource.calendar.attendance'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env.registry.clear_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.env.registry.clear_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env.registry.clear_cache()
+        return super().unlink()
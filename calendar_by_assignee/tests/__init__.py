@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+
+from . import test_calendar_sync
+from . import test_free_slots
+from . import test_leave_periods
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestCalendarSync(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tz='UTC'))
+        cls.physician = cls.env['hms.physician'].create({
+            'name': 'Sync Physician',
+            'login': 'calendar_sync_physician',
+        })
+        cls.patient = cls.env['hms.patient'].create({'name': 'Sync Patient'})
+        cls.appointment = cls.env['hms.appointment'].create({
+            'patient_id': cls.patient.id,
+            'physician_id': cls.physician.id,
+            'product_id': cls.env.ref('acs_hms.hms_consultation_service_0').id,
+            'date': datetime(2030, 1, 7, 9, 0),
+            'date_to': datetime(2030, 1, 7, 9, 30),
+        })
+
+    def _sync(self, since):
+        return self.env['hms.appointment'].get_calendar_events_since(
+            fields.Datetime.to_string(since), physician_ids=[self.physician.id],
+            start_datetime='2030-01-06 00:00:00', end_datetime='2030-01-13 00:00:00')
+
+    def test_moved_out_of_window(self):
+        """An appointment moved outside the synced range is reported as deleted"""
+        since = fields.Datetime.now() - timedelta(hours=1)
+        self.appointment.write({
+            'date': datetime(2030, 2, 4, 9, 0),
+            'date_to': datetime(2030, 2, 4, 9, 30),
+        })
+        result = self._sync(since)
+        self.assertIn(self.appointment.id, result['deleted'])
+
+    def test_unchanged_date_no_tombstone(self):
+        """Writing the same dates does not report the appointment as deleted"""
+        since = fields.Datetime.now() - timedelta(hours=1)
+        self.appointment.write({'date': self.appointment.date, 'date_to': self.appointment.date_to})
+        result = self._sync(since)
+        self.assertNotIn(self.appointment.id, result['deleted'])
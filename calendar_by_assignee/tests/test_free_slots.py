@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from odoo.exceptions import ValidationError
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestFreeSlots(TransactionCase):
+
+    def test_step_must_be_positive(self):
+        Appointment = self.env['hms.appointment']
+        for step in (0, -15):
+            with self.assertRaises(ValidationError):
+                Appointment.find_free_slots(0, 0, datetime(2030, 1, 7, 8, 0), datetime(2030, 1, 7, 18, 0), step=step)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from datetime import date, datetime
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestLeavePeriods(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        if 'hr.leave' not in cls.env:
+            return
+        # Asia/Riyadh is UTC+3 all year long.
+        cls.env = cls.env(context=dict(cls.env.context, tz='Asia/Riyadh'))
+        cls.employee = cls.env['hr.employee'].create({'name': 'Leave Physician'})
+        cls.physician = cls.env['hms.physician'].create({
+            'name': 'Leave Physician',
+            'login': 'calendar_leave_physician',
+            'employee_id': cls.employee.id,
+        })
+        leave_type = cls.env['hr.leave.type'].create({
+            'name': 'Test Leave',
+            'requires_allocation': 'no',
+            'request_unit': 'hour',
+        })
+        cls.leave = cls.env['hr.leave'].create({
+            'employee_id': cls.employee.id,
+            'holiday_status_id': leave_type.id,
+            'request_date_from': date(2030, 1, 8),
+            'request_date_to': date(2030, 1, 8),
+        })
+        # 09:00-12:00 in Riyadh.
+        cls.leave.write({
+            'date_from': datetime(2030, 1, 8, 6, 0),
+            'date_to': datetime(2030, 1, 8, 9, 0),
+        })
+        cls.leave.write({'state': 'validate'})
+
+    def setUp(self):
+        super().setUp()
+        if 'hr.leave' not in self.env:
+            self.skipTest("Leaves are not installed")
+
+    def test_leave_period_in_local_time(self):
+        periods = self.env['hms.physician'].get_break_periods_for_range(
+            [self.physician.id], '2030-01-08', '2030-01-08')[self.physician.id]
+        leaves = [period for period in periods if period['type'] == 'leave']
+        self.assertEqual([(leave['date'], leave['start_time'], leave['end_time']) for leave in leaves],
+                         [('2030-01-08', '09:00', '12:00')])
+
+    def test_slots_inside_leave_unavailable(self):
+        during, after = self.env['hms.appointment'].check_slots_availability([
+            {'physician_id': self.physician.id, 'cabin_id': 0,
+             'start': datetime(2030, 1, 8, 7, 0), 'stop': datetime(2030, 1, 8, 7, 30)},
+            {'physician_id': self.physician.id, 'cabin_id': 0,
+             'start': datetime(2030, 1, 8, 9, 30), 'stop': datetime(2030, 1, 8, 10, 0)},
+        ])
+        self.assertIn('Physician is on Test Leave at this time', during['conflicts'])
+        self.assertNotIn('Physician is on Test Leave at this time', after['conflicts'])
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     "name": "HMS Treatment Schedule",
-    "version": "18.0.1.0.0",
+    "version": "18.0.1.1.0",
     "category": "Healthcare",
     "summary": "Treatment Schedule Management with Custom Calendar View",
     "description": """
@@ -10,7 +10,7 @@
         Features:
         - Treatment Schedule management with patient records
         - Custom JavaScript Calendar-like view for scheduling
-        - Session types management (8 weeks support)
+        - Session types management with per-week records
         - Integration with appointments
         - Professional report generation
     """,
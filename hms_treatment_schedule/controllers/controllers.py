@@ -13,27 +13,16 @@ class TreatmentScheduleController(http.Controller):
     def get_schedule_data(self, **kwargs):
         """Get treatment schedule data for JavaScript view"""
         try:
-            _logger.info("=" * 50)
-            _logger.info("API CALL: get_schedule_data")
-            _logger.info("Request kwargs: %s", kwargs)
-
             schedule_id = kwargs.get('schedule_id')
-
-            _logger.info("schedule_id: %s", schedule_id)
-
             if not schedule_id:
                 _logger.error("ERROR: No schedule_id provided in request")
                 return {'error': 'No schedule ID provided'}
 
-            data = request.env['hms.treatment.schedule'].get_schedule_data(schedule_id)
-            _logger.info("SUCCESS: Data fetched for schedule_id=%s", schedule_id)
-            _logger.info("Data keys: %s", list(data.keys()) if data else 'No data')
-            _logger.info("=" * 50)
-
-            return data
+            return request.env['hms.treatment.schedule'].get_schedule_data(
+                schedule_id, kwargs.get('if_modified_since')
+            )
         except Exception as e:
             _logger.error("EXCEPTION in get_schedule_data: %s", str(e), exc_info=True)
-            _logger.error("=" * 50)
             return {'error': str(e)}
 
     @http.route('/treatment_schedule/update_schedule_field', type='json', auth='user', methods=['POST'], csrf=False)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo.tools.sql import column_exists, table_exists
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Move the wkN_* columns and relation tables of schedule lines to hms.treatment.schedule.week"""
+    if not version:
+        return
+
+    for week_number in range(1, 11):
+        date_column = f'wk{week_number}_date'
+        number_column = f'wk{week_number}_number'
+        rel_table = f'treatment_schedule_line_wk{week_number}_appointment_rel'
+        has_columns = (column_exists(cr, 'hms_treatment_schedule_line', date_column)
+                       and column_exists(cr, 'hms_treatment_schedule_line', number_column))
+        has_rel = table_exists(cr, rel_table)
+        if not has_columns and not has_rel:
+            continue
+
+        conditions = []
+        if has_columns:
+            conditions.append(f'line.{date_column} IS NOT NULL')
+            conditions.append(f"COALESCE(line.{number_column}, '') != ''")
+        if has_rel:
+            conditions.append(f'EXISTS (SELECT 1 FROM {rel_table} rel WHERE rel.line_id = line.id)')
+
+        cr.execute(f"""
+            INSERT INTO hms_treatment_schedule_week
+                (line_id, schedule_id, week_number, date, number, appointments_count,
+                 create_uid, create_date, write_uid, write_date)
+            SELECT line.id, line.schedule_id, %s,
+                   {f'line.{date_column}' if has_columns else 'NULL'},
+                   {f'line.{number_column}' if has_columns else 'NULL'},
+                   0, line.create_uid, line.create_date, line.write_uid, line.write_date
+              FROM hms_treatment_schedule_line line
+             WHERE {' OR '.join(conditions)}
+            ON CONFLICT (line_id, week_number) DO NOTHING
+        """, (week_number,))
+        _logger.info("Migrated %s treatment schedule lines for week %s", cr.rowcount, week_number)
+
+        if has_rel:
+            cr.execute(f"""
+                INSERT INTO hms_treatment_schedule_week_appointment_rel (week_id, appointment_id)
+                SELECT week.id, rel.appointment_id
+                  FROM {rel_table} rel
+                  JOIN hms_treatment_schedule_week week
+                    ON week.line_id = rel.line_id AND week.week_number = %s
+                ON CONFLICT DO NOTHING
+            """, (week_number,))
+
+    cr.execute("""
+        UPDATE hms_treatment_schedule_week week
+           SET appointments_count = counts.total
+          FROM (SELECT week_id, COUNT(*) AS total
+                  FROM hms_treatment_schedule_week_appointment_rel
+              GROUP BY week_id) counts
+         WHERE counts.week_id = week.id
+    """)
@@ -2,6 +2,7 @@
 
 from . import hms_treatment_schedule
 from . import hms_treatment_schedule_line
+from . import hms_treatment_schedule_week
 from . import hms_patient_inherit
 from . import hms_appointment_inherit
 from . import hms_appointment
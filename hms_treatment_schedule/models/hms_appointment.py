@@ -2,6 +2,8 @@
 import logging
 from odoo import models, fields, api, _
 
+from .hms_treatment_schedule_week import WEEK_SELECTION
+
 _logger = logging.getLogger(__name__)
 
 
@@ -19,18 +21,7 @@ class HmsAppointment(models.Model):
         store=True,
     )
 
-    treatment_week = fields.Selection([
-        ('1', 'Week 1'),
-        ('2', 'Week 2'),
-        ('3', 'Week 3'),
-        ('4', 'Week 4'),
-        ('5', 'Week 5'),
-        ('6', 'Week 6'),
-        ('7', 'Week 7'),
-        ('8', 'Week 8'),
-        ('9', 'Week 9'),
-        ('10', 'Week 10'),
-    ], string="Treatment Week")
+    treatment_week = fields.Selection(WEEK_SELECTION, string="Treatment Week")
 
     def action_print_treatment_schedule_from_appointment(self):
         """Open treatment schedules for the patient"""
@@ -92,7 +83,7 @@ class HmsAppointment(models.Model):
         appointment = self.create(appointment_data)
 
         # Link the appointment to the schedule line
-        line.write({f'wk{week_number}_appointment_ids': [(4, appointment.id)]})
+        line._get_week(week_number).write({'appointment_ids': [(4, appointment.id)]})
 
         _logger.info(
             "Appointment Created from Treatment Schedule: ID=%s, Name=%s",
@@ -3,6 +3,8 @@ import logging
 from odoo import fields, models, api, _
 from odoo.exceptions import UserError
 
+from .hms_treatment_schedule_week import MAX_WEEKS
+
 _logger = logging.getLogger(__name__)
 
 
@@ -40,7 +42,7 @@ class HmsTreatmentSchedule(models.Model):
     )
 
     total_weeks = fields.Selection(
-        selection=[(str(i), str(i)) for i in range(1, 11)],
+        selection=[(str(i), str(i)) for i in range(1, MAX_WEEKS + 1)],
         string="Total Weeks",
         required=True,
         default='1',
@@ -103,22 +105,10 @@ class HmsTreatmentSchedule(models.Model):
         for rec in self:
             rec.total_sessions = len(rec.line_ids)
 
-    @api.depends('line_ids.wk1_appointments_count', 'line_ids.wk2_appointments_count',
-                 'line_ids.wk3_appointments_count', 'line_ids.wk4_appointments_count',
-                 'line_ids.wk5_appointments_count', 'line_ids.wk6_appointments_count',
-                 'line_ids.wk7_appointments_count', 'line_ids.wk8_appointments_count',
-                 'line_ids.wk9_appointments_count', 'line_ids.wk10_appointments_count')
+    @api.depends('line_ids.week_ids.appointments_count')
     def _compute_total_appointments(self):
         for rec in self:
-            total = 0
-            for line in rec.line_ids:
-                total += (line.wk1_appointments_count + line.wk2_appointments_count +
-                          line.wk3_appointments_count + line.wk4_appointments_count +
-                          line.wk5_appointments_count + line.wk6_appointments_count +
-                          line.wk7_appointments_count + line.wk8_appointments_count +
-                          line.wk9_appointments_count + line.wk10_appointments_count)
-            rec.total_appointments = total
-            _logger.debug("Total appointments computed for schedule %s: %d", rec.name, total)
+            rec.total_appointments = sum(rec.line_ids.week_ids.mapped('appointments_count'))
 
     @api.model_create_multi
     def create(self, vals_list):
@@ -228,101 +218,61 @@ class HmsTreatmentSchedule(models.Model):
             'target': 'current',
         }
 
-    @api.model
-    def get_schedule_data(self, schedule_id):
-        """Get treatment schedule data for JavaScript view"""
-        _logger.info("=" * 50)
-        _logger.info("MODEL: get_schedule_data called with schedule_id=%s", schedule_id)
+    def _get_schedule_token(self):
+        """Version token of the schedule grid.
+
+        Changes whenever the schedule, one of its lines or weeks, or a linked
+        appointment is written, added or removed.
+        """
+        self.ensure_one()
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT GREATEST(s.write_date, MAX(l.write_date), MAX(w.write_date), MAX(a.write_date)),
+                   COUNT(DISTINCT l.id), COUNT(DISTINCT w.id), COUNT(r.appointment_id)
+              FROM hms_treatment_schedule s
+         LEFT JOIN hms_treatment_schedule_line l ON l.schedule_id = s.id
+         LEFT JOIN hms_treatment_schedule_week w ON w.line_id = l.id
+         LEFT JOIN hms_treatment_schedule_week_appointment_rel r ON r.week_id = w.id
+         LEFT JOIN hms_appointment a ON a.id = r.appointment_id
+             WHERE s.id = %s
+          GROUP BY s.id, s.write_date
+        """, (self.id,))
+        last_write, lines, weeks, links = self.env.cr.fetchone()
+        return '%s/%s/%s/%s' % (last_write.isoformat() if last_write else '', lines, weeks, links)
 
+    @api.model
+    def get_schedule_data(self, schedule_id, if_modified_since=None):
+        """Get treatment schedule data for JavaScript view.
+
+        Lines, weeks and appointments are read in bulk. Each session type
+        carries ``week_dates``, ``week_numbers``, ``week_counts`` and
+        ``week_appointments`` arrays indexed by week (week 1 first), the
+        latter holding ids of the top level ``appointments`` map. When
+        ``if_modified_since`` matches the current ``token``, only
+        ``{'not_modified': True, 'token': token}`` is returned.
+        """
         schedule = self.browse(int(schedule_id))
         if not schedule.exists():
-            _logger.error("ERROR: Schedule not found: ID=%s", schedule_id)
-            _logger.info("=" * 50)
+            _logger.warning("Schedule not found: ID=%s", schedule_id)
             return {}
+        schedule.check_access('read')
 
-        # Get session types (products)
-        session_types = []
-        for line in schedule.line_ids:
-            session_data = {
-                'id': line.id,
-                'sequence': line.sequence,
-                'product_id': line.product_id.id,
-                'product_name': line.product_id.display_name,
-            }
-
-            # Add week data dynamically based on total_weeks
-            total_weeks = int(schedule.total_weeks)
-            for week_num in range(1, total_weeks + 1):
-                date_field = f'wk{week_num}_date'
-                number_field = f'wk{week_num}_number'
-                appointments_field = f'wk{week_num}_appointment_ids'
-                count_field = f'wk{week_num}_appointments_count'
-
-                if hasattr(line, date_field):
-                    session_data[f'wk{week_num}_date'] = str(getattr(line, date_field)) if getattr(line,
-                                                                                                   date_field) else ''
-                else:
-                    session_data[f'wk{week_num}_date'] = ''
-
-                if hasattr(line, number_field):
-                    session_data[f'wk{week_num}_number'] = getattr(line, number_field) or ''
-                else:
-                    session_data[f'wk{week_num}_number'] = ''
+        token = schedule._get_schedule_token()
+        if if_modified_since and if_modified_since == token:
+            return {'not_modified': True, 'token': token}
 
-                if hasattr(line, count_field):
-                    session_data[f'wk{week_num}_appointments_count'] = getattr(line, count_field) or 0
-                else:
-                    session_data[f'wk{week_num}_appointments_count'] = 0
-
-                # Get appointments details - FIXED: Check if field exists and has appointments
-                appointments_list = []
-                if hasattr(line, appointments_field):
-                    appointments = getattr(line, appointments_field)
-                    if appointments:
-                        for app in appointments:
-                            try:
-                                appointment_data = {
-                                    'id': app.id,
-                                    'name': app.name or '',
-                                    'date': str(app.date) if app.date else '',
-                                    'state': app.state or '',
-                                    'patient_id': app.patient_id.id if app.patient_id else None,
-                                    'patient_name': app.patient_id.name if app.patient_id else '',
-                                }
-
-                                # Add physician info if available
-                                if hasattr(app, 'physician_id') and app.physician_id:
-                                    appointment_data['physician_id'] = app.physician_id.id
-                                    appointment_data['physician_name'] = app.physician_id.name
-                                else:
-                                    appointment_data['physician_id'] = None
-                                    appointment_data['physician_name'] = ''
-
-                                appointments_list.append(appointment_data)
-                            except Exception as e:
-                                _logger.error("Error processing appointment %s: %s", app.id if app else 'unknown',
-                                              str(e))
-                                continue
-
-                session_data[f'wk{week_num}_appointments'] = appointments_list
-                _logger.debug("Week %s has %d appointments", week_num, len(appointments_list))
-
-            session_types.append(session_data)
-            _logger.debug("Added session type %s with %d appointments total",
-                          line.product_id.display_name,
-                          sum([len(session_data.get(f'wk{i}_appointments', [])) for i in range(1, total_weeks + 1)]))
-
-        # Generate dynamic weeks list
         total_weeks = int(schedule.total_weeks)
-        weeks_list = [f'WK{i}' for i in range(1, total_weeks + 1)]
+        lines = self.env['hms.treatment.schedule.line'].search([('schedule_id', '=', schedule.id)])
+        session_types, appointments_data = lines._get_session_types_data(total_weeks)
 
         data = {
             'id': schedule.id,
+            'token': token,
             'name': schedule.name,
             'state': schedule.state,
             'date': str(schedule.date) if schedule.date else '',
             'total_weeks': schedule.total_weeks,
-            'weeks_list': weeks_list,
+            'weeks_list': [f'WK{i}' for i in range(1, total_weeks + 1)],
             'patient_id': schedule.patient_id.id,
             'patient_name': schedule.patient_id.name,
             'physician_id': schedule.physician_id.id if schedule.physician_id else None,
@@ -330,29 +280,11 @@ class HmsTreatmentSchedule(models.Model):
             'notes': schedule.notes or '',
             'special_instructions': schedule.special_instructions or '',
             'session_types': session_types,
+            'appointments': appointments_data,
             'total_sessions': schedule.total_sessions,
             'total_appointments': schedule.total_appointments or 0,
         }
-
-        _logger.info("SUCCESS: Schedule data fetched")
-        _logger.info("Schedule ID: %s", data['id'])
-        _logger.info("Schedule Name: %s", data['name'])
-        _logger.info("Total Weeks: %s", data['total_weeks'])
-        _logger.info("Patient: %s", data['patient_name'])
-        _logger.info("Session types count: %d", len(session_types))
-        _logger.info("Total appointments: %d", data['total_appointments'])
-
-        # Log appointments count for debugging
-        for st in session_types:
-            for week in range(1, total_weeks + 1):
-                appointments = st.get(f'wk{week}_appointments', [])
-                if appointments:
-                    _logger.debug("Session %s WK%d has %d appointments: %s",
-                                  st['product_name'], week, len(appointments),
-                                  [a['name'] for a in appointments])
-
-        _logger.info("=" * 50)
-
+        _logger.debug("Schedule data fetched: ID=%s, lines=%d", schedule.id, len(lines))
         return data
 
     @api.model
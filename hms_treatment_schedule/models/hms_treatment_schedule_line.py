@@ -2,8 +2,13 @@
 import logging
 from odoo import fields, models, api
 
+from .hms_treatment_schedule_week import MAX_WEEKS
+
 _logger = logging.getLogger(__name__)
 
+# Number of weeks exposed through the wkN_* fields.
+LEGACY_WEEKS = 10
+
 
 class HmsTreatmentScheduleLine(models.Model):
     _name = "hms.treatment.schedule.line"
@@ -26,190 +31,146 @@ class HmsTreatmentScheduleLine(models.Model):
         required=True,
     )
 
-    # Week 1
-    wk1_date = fields.Date(string="WK1 Date")
-    wk1_number = fields.Char(string="WK1")
-    wk1_appointment_ids = fields.Many2many(
-        'hms.appointment',
-        'treatment_schedule_line_wk1_appointment_rel',
-        'line_id', 'appointment_id',
-        string='WK1 Appointments'
-    )
-    wk1_appointments_count = fields.Integer(
-        string="WK1 Appointments",
-        compute="_compute_wk_appointments_count",
-        store=True
+    week_ids = fields.One2many(
+        "hms.treatment.schedule.week",
+        "line_id",
+        string="Weeks",
+        copy=True,
     )
 
-    # Week 2
-    wk2_date = fields.Date(string="WK2 Date")
-    wk2_number = fields.Char(string="WK2")
+    # Per-week fields of the first weeks, kept for the list view, the report
+    # and the calendar popup. The values are stored on week_ids.
+    wk1_date = fields.Date(string="WK1 Date", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk1_number = fields.Char(string="WK1", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk1_appointment_ids = fields.Many2many(
+        'hms.appointment', 'treatment_schedule_line_wk1_appointment_rel', 'line_id', 'appointment_id',
+        string='WK1 Appointments', compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk1_appointments_count = fields.Integer(string="WK1 Appointments", compute="_compute_week_fields")
+
+    wk2_date = fields.Date(string="WK2 Date", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk2_number = fields.Char(string="WK2", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
     wk2_appointment_ids = fields.Many2many(
-        'hms.appointment',
-        'treatment_schedule_line_wk2_appointment_rel',
-        'line_id', 'appointment_id',
-        string='WK2 Appointments'
-    )
-    wk2_appointments_count = fields.Integer(
-        string="WK2 Appointments",
-        compute="_compute_wk_appointments_count",
-        store=True
-    )
+        'hms.appointment', 'treatment_schedule_line_wk2_appointment_rel', 'line_id', 'appointment_id',
+        string='WK2 Appointments', compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk2_appointments_count = fields.Integer(string="WK2 Appointments", compute="_compute_week_fields")
 
-    # Week 3
-    wk3_date = fields.Date(string="WK3 Date")
-    wk3_number = fields.Char(string="WK3")
+    wk3_date = fields.Date(string="WK3 Date", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk3_number = fields.Char(string="WK3", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
     wk3_appointment_ids = fields.Many2many(
-        'hms.appointment',
-        'treatment_schedule_line_wk3_appointment_rel',
-        'line_id', 'appointment_id',
-        string='WK3 Appointments'
-    )
-    wk3_appointments_count = fields.Integer(
-        string="WK3 Appointments",
-        compute="_compute_wk_appointments_count",
-        store=True
-    )
+        'hms.appointment', 'treatment_schedule_line_wk3_appointment_rel', 'line_id', 'appointment_id',
+        string='WK3 Appointments', compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk3_appointments_count = fields.Integer(string="WK3 Appointments", compute="_compute_week_fields")
 
-    # Week 4
-    wk4_date = fields.Date(string="WK4 Date")
-    wk4_number = fields.Char(string="WK4")
+    wk4_date = fields.Date(string="WK4 Date", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk4_number = fields.Char(string="WK4", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
     wk4_appointment_ids = fields.Many2many(
-        'hms.appointment',
-        'treatment_schedule_line_wk4_appointment_rel',
-        'line_id', 'appointment_id',
-        string='WK4 Appointments'
-    )
-    wk4_appointments_count = fields.Integer(
-        string="WK4 Appointments",
-        compute="_compute_wk_appointments_count",
-        store=True
-    )
+        'hms.appointment', 'treatment_schedule_line_wk4_appointment_rel', 'line_id', 'appointment_id',
+        string='WK4 Appointments', compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk4_appointments_count = fields.Integer(string="WK4 Appointments", compute="_compute_week_fields")
 
-    # Week 5
-    wk5_date = fields.Date(string="WK5 Date")
-    wk5_number = fields.Char(string="WK5")
+    wk5_date = fields.Date(string="WK5 Date", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk5_number = fields.Char(string="WK5", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
     wk5_appointment_ids = fields.Many2many(
-        'hms.appointment',
-        'treatment_schedule_line_wk5_appointment_rel',
-        'line_id', 'appointment_id',
-        string='WK5 Appointments'
-    )
-    wk5_appointments_count = fields.Integer(
-        string="WK5 Appointments",
-        compute="_compute_wk_appointments_count",
-        store=True
-    )
+        'hms.appointment', 'treatment_schedule_line_wk5_appointment_rel', 'line_id', 'appointment_id',
+        string='WK5 Appointments', compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk5_appointments_count = fields.Integer(string="WK5 Appointments", compute="_compute_week_fields")
 
-    # Week 6
-    wk6_date = fields.Date(string="WK6 Date")
-    wk6_number = fields.Char(string="WK6")
+    wk6_date = fields.Date(string="WK6 Date", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk6_number = fields.Char(string="WK6", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
     wk6_appointment_ids = fields.Many2many(
-        'hms.appointment',
-        'treatment_schedule_line_wk6_appointment_rel',
-        'line_id', 'appointment_id',
-        string='WK6 Appointments'
-    )
-    wk6_appointments_count = fields.Integer(
-        string="WK6 Appointments",
-        compute="_compute_wk_appointments_count",
-        store=True
-    )
+        'hms.appointment', 'treatment_schedule_line_wk6_appointment_rel', 'line_id', 'appointment_id',
+        string='WK6 Appointments', compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk6_appointments_count = fields.Integer(string="WK6 Appointments", compute="_compute_week_fields")
 
-    # Week 7
-    wk7_date = fields.Date(string="WK7 Date")
-    wk7_number = fields.Char(string="WK7")
+    wk7_date = fields.Date(string="WK7 Date", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk7_number = fields.Char(string="WK7", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
     wk7_appointment_ids = fields.Many2many(
-        'hms.appointment',
-        'treatment_schedule_line_wk7_appointment_rel',
-        'line_id', 'appointment_id',
-        string='WK7 Appointments'
-    )
-    wk7_appointments_count = fields.Integer(
-        string="WK7 Appointments",
-        compute="_compute_wk_appointments_count",
-        store=True
-    )
+        'hms.appointment', 'treatment_schedule_line_wk7_appointment_rel', 'line_id', 'appointment_id',
+        string='WK7 Appointments', compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk7_appointments_count = fields.Integer(string="WK7 Appointments", compute="_compute_week_fields")
 
-    # Week 8
-    wk8_date = fields.Date(string="WK8 Date")
-    wk8_number = fields.Char(string="WK8")
+    wk8_date = fields.Date(string="WK8 Date", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk8_number = fields.Char(string="WK8", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
     wk8_appointment_ids = fields.Many2many(
-        'hms.appointment',
-        'treatment_schedule_line_wk8_appointment_rel',
-        'line_id', 'appointment_id',
-        string='WK8 Appointments'
-    )
-    wk8_appointments_count = fields.Integer(
-        string="WK8 Appointments",
-        compute="_compute_wk_appointments_count",
-        store=True
-    )
+        'hms.appointment', 'treatment_schedule_line_wk8_appointment_rel', 'line_id', 'appointment_id',
+        string='WK8 Appointments', compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk8_appointments_count = fields.Integer(string="WK8 Appointments", compute="_compute_week_fields")
 
-    # Week 9
-    wk9_date = fields.Date(string="WK9 Date")
-    wk9_number = fields.Char(string="WK9")
+    wk9_date = fields.Date(string="WK9 Date", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk9_number = fields.Char(string="WK9", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
     wk9_appointment_ids = fields.Many2many(
-        'hms.appointment',
-        'treatment_schedule_line_wk9_appointment_rel',
-        'line_id', 'appointment_id',
-        string='WK9 Appointments'
-    )
-    wk9_appointments_count = fields.Integer(
-        string="WK9 Appointments",
-        compute="_compute_wk_appointments_count",
-        store=True
-    )
+        'hms.appointment', 'treatment_schedule_line_wk9_appointment_rel', 'line_id', 'appointment_id',
+        string='WK9 Appointments', compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk9_appointments_count = fields.Integer(string="WK9 Appointments", compute="_compute_week_fields")
 
-    # Week 10
-    wk10_date = fields.Date(string="WK10 Date")
-    wk10_number = fields.Char(string="WK10")
+    wk10_date = fields.Date(string="WK10 Date", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk10_number = fields.Char(string="WK10", compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
     wk10_appointment_ids = fields.Many2many(
-        'hms.appointment',
-        'treatment_schedule_line_wk10_appointment_rel',
-        'line_id', 'appointment_id',
-        string='WK10 Appointments'
-    )
-    wk10_appointments_count = fields.Integer(
-        string="WK10 Appointments",
-        compute="_compute_wk_appointments_count",
-        store=True
-    )
+        'hms.appointment', 'treatment_schedule_line_wk10_appointment_rel', 'line_id', 'appointment_id',
+        string='WK10 Appointments', compute="_compute_week_fields", inverse="_inverse_week_fields", readonly=False)
+    wk10_appointments_count = fields.Integer(string="WK10 Appointments", compute="_compute_week_fields")
 
-    @api.depends(
-        'wk1_appointment_ids', 'wk2_appointment_ids', 'wk3_appointment_ids',
-        'wk4_appointment_ids', 'wk5_appointment_ids', 'wk6_appointment_ids',
-        'wk7_appointment_ids', 'wk8_appointment_ids', 'wk9_appointment_ids',
-        'wk10_appointment_ids'
-    )
-    def _compute_wk_appointments_count(self):
-        """Compute appointments count for each week"""
+    @api.depends('week_ids.week_number', 'week_ids.date', 'week_ids.number',
+                 'week_ids.appointment_ids', 'week_ids.appointments_count')
+    def _compute_week_fields(self):
         for rec in self:
-            rec.wk1_appointments_count = len(rec.wk1_appointment_ids)
-            rec.wk2_appointments_count = len(rec.wk2_appointment_ids)
-            rec.wk3_appointments_count = len(rec.wk3_appointment_ids)
-            rec.wk4_appointments_count = len(rec.wk4_appointment_ids)
-            rec.wk5_appointments_count = len(rec.wk5_appointment_ids)
-            rec.wk6_appointments_count = len(rec.wk6_appointment_ids)
-            rec.wk7_appointments_count = len(rec.wk7_appointment_ids)
-            rec.wk8_appointments_count = len(rec.wk8_appointment_ids)
-            rec.wk9_appointments_count = len(rec.wk9_appointment_ids)
-            rec.wk10_appointments_count = len(rec.wk10_appointment_ids)
-
-            _logger.debug(
-                "Computed appointments count for line %s: WK1=%d, WK2=%d, WK3=%d, WK4=%d, WK5=%d, WK6=%d, WK7=%d, WK8=%d, WK9=%d, WK10=%d",
-                rec.id,
-                rec.wk1_appointments_count,
-                rec.wk2_appointments_count,
-                rec.wk3_appointments_count,
-                rec.wk4_appointments_count,
-                rec.wk5_appointments_count,
-                rec.wk6_appointments_count,
-                rec.wk7_appointments_count,
-                rec.wk8_appointments_count,
-                rec.wk9_appointments_count,
-                rec.wk10_appointments_count
-            )
+            weeks = {week.week_number: week for week in rec.week_ids}
+            for week_number in range(1, LEGACY_WEEKS + 1):
+                week = weeks.get(week_number, rec.env['hms.treatment.schedule.week'])
+                rec[f'wk{week_number}_date'] = week.date
+                rec[f'wk{week_number}_number'] = week.number
+                rec[f'wk{week_number}_appointment_ids'] = week.appointment_ids
+                rec[f'wk{week_number}_appointments_count'] = week.appointments_count
+
+    def _inverse_week_fields(self):
+        for rec in self:
+            for week_number in range(1, LEGACY_WEEKS + 1):
+                appointments = rec[f'wk{week_number}_appointment_ids']
+                vals = {
+                    'date': rec[f'wk{week_number}_date'],
+                    'number': rec[f'wk{week_number}_number'],
+                }
+                week = rec._get_week(week_number, create=any(vals.values()) or bool(appointments))
+                if not week:
+                    continue
+                vals = {key: value for key, value in vals.items() if week[key] != value}
+                if week.appointment_ids != appointments:
+                    vals['appointment_ids'] = [(6, 0, appointments.ids)]
+                if vals:
+                    week.write(vals)
+
+    def _get_week(self, week_number, create=True):
+        """Return the week record of this line, creating it when needed"""
+        self.ensure_one()
+        week_number = int(week_number)
+        week = self.week_ids.filtered(lambda w: w.week_number == week_number)[:1]
+        if not week and create:
+            week = self.env['hms.treatment.schedule.week'].create({
+                'line_id': self.id,
+                'week_number': week_number,
+            })
+        return week
+
+    @api.model
+    def _get_appointments_data(self, appointments):
+        """Serialize appointments for the schedule views, reading patients and physicians in bulk"""
+        if not appointments:
+            return {}
+        rows = appointments.read(['name', 'date', 'state', 'patient_id', 'physician_id'], load=False)
+        patient_names = {patient['id']: patient['name'] for patient in self.env['hms.patient'].browse(
+            list({row['patient_id'] for row in rows if row['patient_id']})).read(['name'])}
+        physician_names = {physician['id']: physician['name'] for physician in self.env['hms.physician'].browse(
+            list({row['physician_id'] for row in rows if row['physician_id']})).read(['name'])}
+        return {row['id']: {
+            'id': row['id'],
+            'name': row['name'] or '',
+            'date': str(row['date']) if row['date'] else '',
+            'state': row['state'] or '',
+            'patient_id': row['patient_id'] or None,
+            'patient_name': patient_names.get(row['patient_id'], ''),
+            'physician_id': row['physician_id'] or None,
+            'physician_name': physician_names.get(row['physician_id'], ''),
+        } for row in rows}
 
     @api.model_create_multi
     def create(self, vals_list):
@@ -244,9 +205,53 @@ class HmsTreatmentScheduleLine(models.Model):
             )
         return super().unlink()
 
+    def _get_session_types_data(self, total_weeks):
+        """Serialize the lines for the schedule grid, reading weeks and appointments in bulk.
+
+        Returns the session types, in the order of ``self``, each with
+        ``week_dates``, ``week_numbers``, ``week_counts`` and ``week_appointments``
+        arrays indexed by week (week 1 first), and the map of the appointments
+        referenced by ``week_appointments``.
+        """
+        lines = self.read(['sequence', 'product_id', 'schedule_id'], load=False)
+        product_names = {product.id: product.display_name for product in self.product_id}
+        weeks = self.env['hms.treatment.schedule.week'].search_read(
+            [('line_id', 'in', self.ids), ('week_number', '<=', total_weeks)],
+            ['line_id', 'week_number', 'date', 'number', 'appointments_count', 'appointment_ids'], load=False)
+        appointments = self.env['hms.appointment'].browse(
+            list({app_id for week in weeks for app_id in week['appointment_ids']}))
+        appointments_data = self._get_appointments_data(appointments)
+
+        session_types = {}
+        for line in lines:
+            session_types[line['id']] = {
+                'id': line['id'],
+                'sequence': line['sequence'],
+                'schedule_id': line['schedule_id'],
+                'product_id': line['product_id'],
+                'product_name': product_names.get(line['product_id'], ''),
+                'week_dates': [''] * total_weeks,
+                'week_numbers': [''] * total_weeks,
+                'week_counts': [0] * total_weeks,
+                'week_appointments': [[] for dummy in range(total_weeks)],
+            }
+        for week in weeks:
+            session_data = session_types.get(week['line_id'])
+            if not session_data or week['week_number'] < 1:
+                continue
+            index = week['week_number'] - 1
+            session_data['week_dates'][index] = str(week['date']) if week['date'] else ''
+            session_data['week_numbers'][index] = week['number'] or ''
+            session_data['week_counts'][index] = week['appointments_count'] or 0
+            session_data['week_appointments'][index] = [
+                app_id for app_id in week['appointment_ids'] if app_id in appointments_data]
+        return list(session_types.values()), appointments_data
+
     @api.model
     def get_line_data(self, line_id):
-        """Get line data for JavaScript view"""
+        """Get line data for JavaScript view, in the session type format of get_schedule_data.
+        ``appointments`` holds the appointments referenced by ``week_appointments``.
+        """
         _logger.info("Fetching line data for ID: %s", line_id)
 
         line = self.browse(line_id)
@@ -254,40 +259,8 @@ class HmsTreatmentScheduleLine(models.Model):
             _logger.warning("Line not found: ID=%s", line_id)
             return {}
 
-        data = {
-            'id': line.id,
-            'sequence': line.sequence,
-            'schedule_id': line.schedule_id.id,
-            'product_id': line.product_id.id,
-            'product_name': line.product_id.display_name,
-        }
-
-        # Add week data dynamically for all 10 weeks
-        for week_num in range(1, 11):
-            date_field = f'wk{week_num}_date'
-            number_field = f'wk{week_num}_number'
-            appointments_field = f'wk{week_num}_appointment_ids'
-            count_field = f'wk{week_num}_appointments_count'
-
-            data[date_field] = str(getattr(line, date_field)) if getattr(line, date_field) else ''
-            data[number_field] = getattr(line, number_field) or ''
-            data[count_field] = getattr(line, count_field) or 0
-
-            # Get appointments details
-            appointments = getattr(line, appointments_field)
-            if appointments:
-                data[f'wk{week_num}_appointments'] = [{
-                    'id': app.id,
-                    'name': app.name,
-                    'date': str(app.date) if app.date else '',
-                    'state': app.state,
-                    'patient_id': app.patient_id.id,
-                    'patient_name': app.patient_id.name,
-                    'physician_id': app.physician_id.id if app.physician_id else None,
-                    'physician_name': app.physician_id.name if app.physician_id else '',
-                } for app in appointments]
-            else:
-                data[f'wk{week_num}_appointments'] = []
+        [data], appointments_data = line._get_session_types_data(int(line.schedule_id.total_weeks))
+        data['appointments'] = appointments_data
 
         _logger.info("Line data fetched: ID=%s", line_id)
         return data
@@ -321,18 +294,18 @@ class HmsTreatmentScheduleLine(models.Model):
             _logger.warning("Line not found for update: ID=%s", line_id)
             return {'success': False, 'error': 'Line not found'}
 
-        date_field = f'wk{week_number}_date'
-        number_field = f'wk{week_number}_number'
+        if not 1 <= int(week_number) <= MAX_WEEKS:
+            return {'success': False, 'error': 'Invalid week number'}
 
         try:
             vals = {}
             if date_value:
-                vals[date_field] = date_value
+                vals['date'] = date_value
             if number_value is not None:
-                vals[number_field] = number_value
+                vals['number'] = number_value
 
             if vals:
-                line.write(vals)
+                line._get_week(week_number).write(vals)
                 _logger.info("Line week updated successfully: ID=%s", line_id)
 
             return {'success': True, 'line': self.get_line_data(line_id)}
@@ -400,12 +373,11 @@ class HmsTreatmentScheduleLine(models.Model):
             return {'success': False, 'error': 'Appointment not found'}
 
         try:
-            appointments_field = f'wk{week_number}_appointment_ids'
-            current_appointments = getattr(line, appointments_field)
+            week = line._get_week(week_number)
 
             # Add appointment to the Many2many relation
-            if appointment_id not in current_appointments.ids:
-                line.write({appointments_field: [(4, appointment_id)]})
+            if appointment_id not in week.appointment_ids.ids:
+                week.write({'appointment_ids': [(4, appointment_id)]})
                 _logger.info(
                     "Appointment added to week: Line=%s, Week=%s, Appointment=%s",
                     line_id, week_number, appointment_id
@@ -424,7 +396,7 @@ class HmsTreatmentScheduleLine(models.Model):
             return {
                 'success': True,
                 'line': self.get_line_data(line_id),
-                'appointments_count': len(getattr(line, appointments_field))
+                'appointments_count': week.appointments_count
             }
         except Exception as e:
             _logger.error("Error adding appointment to week: %s", str(e))
@@ -449,12 +421,11 @@ class HmsTreatmentScheduleLine(models.Model):
             return {'success': False, 'error': 'Appointment not found'}
 
         try:
-            appointments_field = f'wk{week_number}_appointment_ids'
-            current_appointments = getattr(line, appointments_field)
+            week = line._get_week(week_number, create=False)
 
             # Remove appointment from the Many2many relation
-            if appointment_id in current_appointments.ids:
-                line.write({appointments_field: [(3, appointment_id)]})
+            if appointment_id in week.appointment_ids.ids:
+                week.write({'appointment_ids': [(3, appointment_id)]})
                 _logger.info(
                     "Appointment removed from week: Line=%s, Week=%s, Appointment=%s",
                     line_id, week_number, appointment_id
@@ -472,7 +443,7 @@ class HmsTreatmentScheduleLine(models.Model):
             return {
                 'success': True,
                 'line': self.get_line_data(line_id),
-                'appointments_count': len(getattr(line, appointments_field))
+                'appointments_count': week.appointments_count
             }
         except Exception as e:
             _logger.error("Error removing appointment from week: %s", str(e))
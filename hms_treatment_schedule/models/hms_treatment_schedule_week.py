@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import logging
+from odoo import fields, models, api
+
+_logger = logging.getLogger(__name__)
+
+MAX_WEEKS = 52
+WEEK_SELECTION = [(str(i), 'Week %s' % i) for i in range(1, MAX_WEEKS + 1)]
+
+
+class HmsTreatmentScheduleWeek(models.Model):
+    _name = "hms.treatment.schedule.week"
+    _description = "Treatment Schedule Week"
+    _order = "line_id, week_number"
+
+    line_id = fields.Many2one(
+        "hms.treatment.schedule.line",
+        string="Schedule Line",
+        required=True,
+        ondelete="cascade",
+        index=True,
+    )
+
+    schedule_id = fields.Many2one(
+        related="line_id.schedule_id",
+        string="Schedule",
+        store=True,
+        index=True,
+    )
+
+    week_number = fields.Integer(string="Week", required=True)
+    date = fields.Date(string="Date")
+    number = fields.Char(string="Number")
+
+    appointment_ids = fields.Many2many(
+        'hms.appointment',
+        'hms_treatment_schedule_week_appointment_rel',
+        'week_id', 'appointment_id',
+        string='Appointments'
+    )
+    appointments_count = fields.Integer(
+        string="Appointments",
+        compute="_compute_appointments_count",
+        store=True
+    )
+
+    _sql_constraints = [
+        ('line_week_uniq', 'UNIQUE(line_id, week_number)', 'A schedule line can only have one record per week!'),
+    ]
+
+    @api.depends('appointment_ids')
+    def _compute_appointments_count(self):
+        for rec in self:
+            rec.appointments_count = len(rec.appointment_ids)
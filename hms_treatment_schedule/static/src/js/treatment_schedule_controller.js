@@ -188,7 +188,8 @@ export class TreatmentScheduleController extends Component {
                     jsonrpc: '2.0',
                     method: 'call',
                     params: {
-                        schedule_id: this.state.scheduleId
+                        schedule_id: this.state.scheduleId,
+                        if_modified_since: this.state.scheduleData.token || null
                     },
                     id: Math.floor(Math.random() * 1000)
                 })
@@ -213,6 +214,11 @@ export class TreatmentScheduleController extends Component {
                 throw new Error(result.error);
             }
 
+            if (result.not_modified) {
+                console.log('Schedule data unchanged, keeping current grid');
+                return;
+            }
+
             console.log('Setting schedule data...');
             this.state.scheduleData = result;
             this.state.sessionTypes = result.session_types || [];
@@ -896,11 +902,12 @@ export class TreatmentScheduleController extends Component {
     // ========== SESSION/LINE MANAGEMENT ==========
 
     getWeekData(sessionType, weekKey) {
-        const weekNum = weekKey.replace('WK', '').toLowerCase();
-        const date = sessionType[`wk${weekNum}_date`] || '';
-        const number = sessionType[`wk${weekNum}_number`] || '';
-        const appointmentsCount = sessionType[`wk${weekNum}_appointments_count`] || 0;
-        const appointments = sessionType[`wk${weekNum}_appointments`] || [];
+        const index = parseInt(weekKey.replace('WK', '')) - 1;
+        const date = sessionType.week_dates?.[index] || '';
+        const number = sessionType.week_numbers?.[index] || '';
+        const appointmentsCount = sessionType.week_counts?.[index] || 0;
+        const appointmentsById = this.state.scheduleData.appointments || {};
+        const appointments = (sessionType.week_appointments?.[index] || []).map(id => appointmentsById[id]);
 
         return { date, number, appointmentsCount, appointments };
     }
@@ -1090,8 +1097,7 @@ export class TreatmentScheduleController extends Component {
                         console.log('Updating appointments...');
 
                         // Get current appointments for this week from updated line
-                        const currentAppointments = updateResult.line?.[`wk${data.weekNumber}_appointments`] || [];
-                        const currentAppointmentIds = currentAppointments.map(app => app.id);
+                        const currentAppointmentIds = updateResult.line?.week_appointments?.[data.weekNumber - 1] || [];
 
                         console.log('Current appointment IDs from updated line:', currentAppointmentIds);
                         console.log('Selected appointment IDs:', data.selectedAppointments);
@@ -1183,6 +1189,7 @@ export class TreatmentScheduleController extends Component {
                     console.log('Found line at index:', lineIndex);
 
                     if (lineIndex >= 0 && updateResult.line) {
+                        this.state.scheduleData.appointments = Object.assign({}, this.state.scheduleData.appointments, updateResult.line.appointments);
                         this.state.sessionTypes[lineIndex] = updateResult.line;
                         console.log('Local state updated immediately');
                     }
@@ -36,7 +36,7 @@
     add product in invoice""",
     'website': 'https://www.almightycs.com',
     'license': 'OPL-1', 
-    "depends": ["account",'barcodes'],
+    "depends": ["account", 'barcodes', 'stock'],
     "data": [
         "views/account_invoice_view.xml",
     ],
@@ -1,5 +1,6 @@
 # -*- encoding: utf-8 -*-
 
+from . import barcode_resolver
 from . import account_invoice
 
 # vim:expandtab:smartindent:tabstop=4:softtabstop=4:shiftwidth=4:
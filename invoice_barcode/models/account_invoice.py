@@ -21,30 +21,62 @@ class AccountMove(models.Model):
             'display_type': 'product',
         }
  
+    def _acs_get_scanned_product(self, barcode):
+        """Product and lot of a scanned product barcode, reference or lot name"""
+        record = self.env['acs.barcode.resolver'].acs_resolve_barcode(barcode, ('product.product', 'stock.lot'))
+        if record and record._name == 'stock.lot':
+            return record.product_id, record
+        return record, False
+
     def on_barcode_scanned(self, barcode):
         if barcode and self.state=='draft':
-            lot = False
-            ProductObj = self.env['product.product']
-            InvLine = self.env['account.move.line']
-            Lot = self.env['stock.lot']
-            product = ProductObj.search([('barcode','=',barcode)], limit=1)
-            if not product:
-                lot = ProductObj.search([('default_code','=',barcode)], limit=1)
+            product, lot = self._acs_get_scanned_product(barcode)
             if not product:
-                lot = Lot.search([('name','=',barcode)], limit=1)
-                product = lot.product_id
-            if not product and not lot:
                 raise UserError(_('There is no product with Barcode or Reference or Lot: %s') % (barcode))
 
-            flag = True
-            order_line = []
-            for o_line in self.invoice_line_ids:
-                if o_line.product_id == product:
-                    flag = False
-                    o_line.quantity += 1
-
-            if flag:
+            o_line = next((line for line in self.invoice_line_ids if line.product_id == product), False)
+            if o_line:
+                o_line.quantity += 1
+            else:
                 line_data = self.get_scan_line_data(product, lot)
-                self.invoice_line_ids += InvLine.new(line_data)
+                self.invoice_line_ids += self.env['account.move.line'].new(line_data)
+
+    def acs_apply_barcode_scans(self, barcodes):
+        """Apply a list of scanned barcodes to the draft invoice in one write.
+        Each scan adds one unit: quantities of existing lines are increased and
+        one line is added per new product.
+        """
+        self.ensure_one()
+        if self.state!='draft':
+            raise UserError(_('Products can only be scanned on draft invoices.'))
+
+        quantities = {}
+        lots = {}
+        missing = []
+        for barcode in barcodes:
+            product, lot = self._acs_get_scanned_product(barcode)
+            if not product:
+                missing.append(barcode)
+                continue
+            quantities[product] = quantities.get(product, 0) + 1
+            lots.setdefault(product, lot)
+        if missing:
+            raise UserError(_('There is no product with Barcode or Reference or Lot: %s') % (', '.join(missing)))
+
+        invoice_lines = {}
+        for line in self.invoice_line_ids:
+            invoice_lines.setdefault(line.product_id, line)
+        line_commands = []
+        for product, quantity in quantities.items():
+            o_line = invoice_lines.get(product)
+            if o_line:
+                line_commands.append((1, o_line.id, {'quantity': o_line.quantity + quantity}))
+            else:
+                line_data = self.get_scan_line_data(product, lots[product])
+                line_data['quantity'] = quantity
+                line_commands.append((0, 0, line_data))
+        if line_commands:
+            self.write({'invoice_line_ids': line_commands})
+        return True
 
 # vim:expandtab:smartindent:tabstop=4:softtabstop=4:shiftwidth=4:
\ No newline at end of file
@@ -0,0 +1,124 @@
+# -*- encoding: utf-8 -*-
+
+from odoo import api, models, tools
+from odoo.tools import SQL
+
+# Database sequence numbering the changes of the barcode sources, part of the resolver cache key.
+GENERATION_SEQUENCE = 'acs_barcode_resolver_generation'
+
+
+class BarcodeResolver(models.AbstractModel):
+    _name = 'acs.barcode.resolver'
+    _description = 'Barcode Resolver'
+
+    def init(self):
+        self.env.cr.execute(SQL("CREATE SEQUENCE IF NOT EXISTS %s", SQL.identifier(GENERATION_SEQUENCE)))
+
+    @api.model
+    def _get_barcode_generation(self):
+        """Current generation of the barcode sources, shared by all workers"""
+        self.env.cr.execute(SQL("SELECT last_value FROM %s", SQL.identifier(GENERATION_SEQUENCE)))
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _bump_barcode_generation(self):
+        """Drop the cached resolutions, and only them, after a change of a source.
+
+        The generation is bumped at once for the current transaction, and again
+        once it is committed or rolled back, so results cached meanwhile by other
+        transactions from the previous data are not reused.
+        """
+        query = SQL("SELECT nextval(%s)", GENERATION_SEQUENCE)
+        self.env.cr.execute(query)
+        if not self.env.cr.postcommit.data.get(GENERATION_SEQUENCE):
+            registry = self.env.registry
+
+            def bump():
+                with registry.cursor() as cr:
+                    cr.execute(query)
+
+            self.env.cr.postcommit.data[GENERATION_SEQUENCE] = True
+            self.env.cr.postcommit.add(bump)
+            self.env.cr.postrollback.add(bump)
+
+    @api.model
+    def _get_barcode_sources(self):
+        """``(model, field)`` searched for a scanned barcode, by priority.
+        Extended by the modules adding scannable records.
+        """
+        return [
+            ('product.product', 'barcode'),
+            ('product.product', 'default_code'),
+            ('stock.lot', 'name'),
+        ]
+
+    @api.model
+    @tools.ormcache('self._get_barcode_generation()', 'self.env.uid', 'self.env.su',
+                    'tuple(self.env.companies.ids)', 'barcode')
+    def _resolve_barcode(self, barcode):
+        """``(model, id)`` of every record matching ``barcode``, in source priority.
+
+        All sources are searched in one query, with the access rules of the user.
+        Sources the user can not read are skipped.
+        Cached until a field of a source changes, see ``_bump_barcode_generation``.
+        """
+        sources = self._get_barcode_sources()
+        queries = []
+        for priority, (model_name, field_name) in enumerate(sources):
+            Model = self.env[model_name]
+            if not Model.has_access('read'):
+                continue
+            query = Model._search([(field_name, '=', barcode)])
+            queries.append(SQL("(%s)", query.select(SQL("%s, %s", priority, SQL.identifier(Model._table, 'id')))))
+        if not queries:
+            return ()
+        rows = self.env.execute_query(SQL("%s ORDER BY 1, 2", SQL(" UNION ALL ").join(queries)))
+        return tuple((sources[priority][0], res_id) for priority, res_id in rows)
+
+    @api.model
+    def acs_resolve_barcode(self, barcode, model_names=None):
+        """First record matching ``barcode``, among ``model_names`` when given"""
+        if barcode:
+            for model_name, res_id in self._resolve_barcode(barcode):
+                if not model_names or model_name in model_names:
+                    return self.env[model_name].browse(res_id)
+        return False
+
+
+class BarcodeSourceMixin(models.AbstractModel):
+    _name = 'acs.barcode.source.mixin'
+    _description = 'Barcode Source Mixin'
+
+    # Fields changing the result of acs.barcode.resolver for the model.
+    _barcode_source_fields = ('active', 'company_id')
+
+    def _barcode_clear_cache(self, vals_list):
+        if any(not set(self._barcode_source_fields).isdisjoint(vals) for vals in vals_list):
+            self.env['acs.barcode.resolver']._bump_barcode_generation()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self._barcode_clear_cache(vals_list)
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self._barcode_clear_cache([vals])
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['acs.barcode.resolver']._bump_barcode_generation()
+        return super().unlink()
+
+
+class ProductProduct(models.Model):
+    _name = 'product.product'
+    _inherit = ['product.product', 'acs.barcode.source.mixin']
+
+    _barcode_source_fields = ('barcode', 'default_code', 'active', 'company_id')
+
+
+class StockLot(models.Model):
+    _name = 'stock.lot'
+    _inherit = ['stock.lot', 'acs.barcode.source.mixin']
+
+    _barcode_source_fields = ('name', 'product_id', 'company_id')